@@ -20,7 +20,12 @@ from sqlmodel import SQLModel
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from app.models import core  # noqa: F401
+from app import models  # noqa: F401
+from app.db import sync_url
+
+# DATABASE_URL, when set, is the database the app uses; migrate that one
+if os.environ.get("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", sync_url(os.environ["DATABASE_URL"]).replace("%", "%%"))
 
 target_metadata = SQLModel.metadata
 
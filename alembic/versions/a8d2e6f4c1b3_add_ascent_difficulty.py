@@ -0,0 +1,143 @@
+"""add ascent difficulty and consensus difficulty totals
+
+Revision ID: a8d2e6f4c1b3
+Revises: f7a3c9e1b5d2
+Create Date: 2025-05-03 11:47:52.630918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import re
+
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d2e6f4c1b3'
+down_revision: Union[str, None] = 'f7a3c9e1b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_ascent_user_id_difficulty': ['user_id', 'difficulty'],
+    'ix_ascent_climb_id_difficulty': ['climb_id', 'difficulty'],
+}
+BATCH_SIZE = 10000
+
+# The grade parser as it was at this revision (V, YDS, Font and French), frozen so that
+# later changes to app.grades do not change what replaying this revision writes.
+BOULDER_BASE = 100.0
+_V_SCALE = re.compile(r"^V(B|\d{1,2})(?:[-/]V?(\d{1,2})|([+-]))?$")
+_YDS = re.compile(r"^5\.(\d{1,2})(?:([ABCD])(?:/([ABCD]))?|([+-]))?$")
+_FONT_PREFIX = re.compile(r"^(?:FONT|FB|F)(?=\d)", re.IGNORECASE)
+_FONT_OR_FRENCH = re.compile(r"^(\d)([ABCabc])?(\+)?$")
+FONT_TO_V = {
+    "3": -1, "4": 0, "4+": 0.5, "5": 1, "5+": 2, "6A": 3, "6A+": 3.5, "6B": 4, "6B+": 4.5, "6C": 5, "6C+": 5.5,
+    "7A": 6, "7A+": 7, "7B": 8, "7B+": 8.5, "7C": 9, "7C+": 10, "8A": 11, "8A+": 12, "8B": 13, "8B+": 14,
+    "8C": 15, "8C+": 16, "9A": 17,
+}
+FRENCH_TO_YDS = {
+    "4a": 5, "4b": 6, "4c": 7, "5a": 8, "5b": 9, "5c": 9.5, "6a": 10, "6a+": 10.25, "6b": 10.5, "6b+": 10.75,
+    "6c": 11, "6c+": 11.25, "7a": 11.75, "7a+": 12, "7b": 12.25, "7b+": 12.5, "7c": 12.75, "7c+": 13,
+    "8a": 13.25, "8a+": 13.5, "8b": 13.75, "8b+": 14, "8c": 14.25, "8c+": 14.5, "9a": 14.75, "9a+": 15,
+    "9b": 15.25, "9b+": 15.5, "9c": 15.75,
+}
+
+
+def grade_rank(grade):
+    """Stored difficulty of a V, YDS, Font or French grade, or None if unrecognised."""
+    if not grade:
+        return None
+    text = re.sub(r"\s+", "", grade)
+    upper = text.upper()
+    match = _V_SCALE.match(upper)
+    if match:
+        low = -1 if match.group(1) == "B" else int(match.group(1))
+        value = float(low)
+        if match.group(2) is not None and int(match.group(2)) > low:
+            value = (low + int(match.group(2))) / 2
+        elif match.group(3):
+            value += 0.25 if match.group(3) == "+" else -0.25
+        return BOULDER_BASE + value
+    match = _YDS.match(upper)
+    if match:
+        number, letter, split, modifier = int(match.group(1)), match.group(2), match.group(3), match.group(4)
+        value = float(number)
+        if letter:
+            value += "ABCD".index(letter) * 0.25
+            if split and split > letter:
+                value = (value + number + "ABCD".index(split) * 0.25) / 2
+        elif modifier:
+            value += (0.625 if modifier == "+" else 0.125) if number >= 10 else (0.25 if modifier == "+" else -0.25)
+        return value
+    font = _FONT_PREFIX.match(text)
+    match = _FONT_OR_FRENCH.match(text[font.end():] if font else text)
+    if match:
+        digit, letter, plus = match.group(1), match.group(2), match.group(3) or ""
+        if font or (letter and letter.isupper()):
+            name = digit + (letter or "").upper() + plus
+            if name in FONT_TO_V:
+                return BOULDER_BASE + FONT_TO_V[name]
+        elif letter and digit + letter + plus in FRENCH_TO_YDS:
+            return FRENCH_TO_YDS[digit + letter + plus]
+    return None
+
+
+def backfill(bind, table, text_column: str, key: str = 'row_id') -> None:
+    # Grades are parsed in Python; rows whose difficulty is unchanged are skipped
+    update = table.update().where(table.c.id == sa.bindparam(key)).values(difficulty=sa.bindparam('value'))
+    changes = []
+    for row_id, text, current in bind.execute(sa.select(table.c.id, table.c[text_column], table.c.difficulty)):
+        value = grade_rank(text)
+        if text_column == 'setter_grade':
+            value = value or 0.0
+        if value != current:
+            changes.append({key: row_id, 'value': value})
+        if len(changes) >= BATCH_SIZE:
+            bind.execute(update, changes)
+            changes = []
+    if changes:
+        bind.execute(update, changes)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ascent', sa.Column('difficulty', sa.Float(), nullable=True))
+    op.add_column('climbstats', sa.Column('difficulty_sum', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('climbstats', sa.Column('difficulty_count', sa.Integer(), nullable=False, server_default='0'))
+
+    bind = op.get_bind()
+    # Databases created before the ascent model was consolidated call the column personal_grade
+    ascent_columns = {column['name'] for column in sa.inspect(bind).get_columns('ascent')}
+    grade_column = 'grade' if 'grade' in ascent_columns else 'personal_grade'
+    ascent = sa.table('ascent', sa.column('id', sa.Integer), sa.column('climb_id', sa.Integer),
+                      sa.column(grade_column, sa.String), sa.column('difficulty', sa.Float))
+    climb = sa.table('climb', sa.column('id', sa.Integer), sa.column('setter_grade', sa.String),
+                     sa.column('difficulty', sa.Float))
+    # Font and French setter grades were not recognised before, so climbs are re-ranked too
+    backfill(bind, climb, 'setter_grade')
+    backfill(bind, ascent, grade_column)
+
+    stats = sa.table('climbstats', sa.column('climb_id', sa.Integer), sa.column('difficulty_sum', sa.Float),
+                     sa.column('difficulty_count', sa.Integer))
+    ascents_of_climb = ascent.c.climb_id == stats.c.climb_id
+    bind.execute(stats.update().values(
+        difficulty_sum=sa.select(sa.func.coalesce(sa.func.sum(ascent.c.difficulty), 0.0))
+        .where(ascents_of_climb).scalar_subquery(),
+        difficulty_count=sa.select(sa.func.count(ascent.c.difficulty)).where(ascents_of_climb).scalar_subquery(),
+    ))
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'ascent', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name='ascent')
+    with op.batch_alter_table('climbstats') as batch_op:
+        batch_op.drop_column('difficulty_count')
+        batch_op.drop_column('difficulty_sum')
+    with op.batch_alter_table('ascent') as batch_op:
+        batch_op.drop_column('difficulty')
@@ -0,0 +1,37 @@
+"""add climbstats table
+
+Revision ID: b3d1c7a9e2f4
+Revises: 945032eab504
+Create Date: 2025-04-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d1c7a9e2f4'
+down_revision: Union[str, None] = '945032eab504'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('climbstats',
+    sa.Column('climb_id', sa.Integer(), nullable=False),
+    sa.Column('send_count', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('quality_sum', sa.Integer(), nullable=False),
+    sa.Column('quality_count', sa.Integer(), nullable=False),
+    sa.Column('grade_histogram', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['climb_id'], ['climb.id'], ),
+    sa.PrimaryKeyConstraint('climb_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('climbstats')
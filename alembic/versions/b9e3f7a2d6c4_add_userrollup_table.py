@@ -0,0 +1,43 @@
+"""add userrollup table
+
+Revision ID: b9e3f7a2d6c4
+Revises: a8d2e6f4c1b3
+Create Date: 2025-05-06 10:41:52.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e3f7a2d6c4'
+down_revision: Union[str, None] = 'a8d2e6f4c1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing ascents are not rolled up here; run ``python -m app.rollups`` afterwards.
+    """
+    op.create_table('userrollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('period', sa.Date(), nullable=False),
+    sa.Column('gym_id', sa.Integer(), nullable=False),
+    sa.Column('sends', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('hardest', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['gym_id'], ['gym.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'bucket', 'period', 'gym_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('userrollup')
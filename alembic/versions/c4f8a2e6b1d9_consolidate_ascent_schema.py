@@ -0,0 +1,72 @@
+"""consolidate ascent schema and add comment table
+
+Revision ID: c4f8a2e6b1d9
+Revises: b9e3f7a2d6c4
+Create Date: 2025-05-09 14:22:08.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2e6b1d9'
+down_revision: Union[str, None] = 'b9e3f7a2d6c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Until now the app also ran ``create_all`` at startup, so a database may
+    already have the comment table and the grade/notes ascent columns; only
+    what is missing is created. Databases built by the migrations alone get
+    ``personal_grade`` copied into ``grade`` before it is dropped.
+    """
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('comment'):
+        op.create_table('comment',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('climb_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('username', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('text', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_comment_climb_id'), 'comment', ['climb_id'], unique=False)
+        op.create_index(op.f('ix_comment_user_id'), 'comment', ['user_id'], unique=False)
+
+    columns = {column['name'] for column in inspector.get_columns('ascent')}
+    with op.batch_alter_table('ascent') as batch_op:
+        if 'grade' not in columns:
+            batch_op.add_column(sa.Column('grade', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        if 'notes' not in columns:
+            batch_op.add_column(sa.Column('notes', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.alter_column('quality_rating', existing_type=sa.Integer(), nullable=True)
+    if 'personal_grade' in columns:
+        ascent = sa.table('ascent', sa.column('grade', sa.String), sa.column('personal_grade', sa.String))
+        bind.execute(ascent.update().where(ascent.c.grade.is_(None)).values(grade=ascent.c.personal_grade))
+        with op.batch_alter_table('ascent') as batch_op:
+            batch_op.drop_column('personal_grade')
+    op.create_index('ix_ascent_climb_id_date', 'ascent', ['climb_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    The comment table is kept, since older releases created it at startup.
+    """
+    op.drop_index('ix_ascent_climb_id_date', table_name='ascent')
+    with op.batch_alter_table('ascent') as batch_op:
+        batch_op.add_column(sa.Column('personal_grade', sa.String(), nullable=False, server_default=''))
+    ascent = sa.table('ascent', sa.column('grade', sa.String), sa.column('personal_grade', sa.String))
+    op.get_bind().execute(ascent.update().values(personal_grade=sa.func.coalesce(ascent.c.grade, '')))
+    with op.batch_alter_table('ascent') as batch_op:
+        batch_op.drop_column('notes')
+        batch_op.drop_column('grade')
@@ -0,0 +1,44 @@
+"""add climbrating table and profile indexes
+
+Revision ID: c8e4a1f6d0b2
+Revises: b3d1c7a9e2f4
+Create Date: 2025-04-18 14:03:52.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e4a1f6d0b2'
+down_revision: Union[str, None] = 'b3d1c7a9e2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('climbrating',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('climb_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('rated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['climb_id'], ['climb.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'climb_id', name='uq_climbrating_user_climb')
+    )
+    op.create_index(op.f('ix_climbrating_user_id'), 'climbrating', ['user_id'], unique=False)
+    op.create_index(op.f('ix_climb_setter'), 'climb', ['setter'], unique=False)
+    op.create_index('ix_ascent_user_id_date', 'ascent', ['user_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ascent_user_id_date', table_name='ascent')
+    op.drop_index(op.f('ix_climb_setter'), table_name='climb')
+    op.drop_index(op.f('ix_climbrating_user_id'), table_name='climbrating')
+    op.drop_table('climbrating')
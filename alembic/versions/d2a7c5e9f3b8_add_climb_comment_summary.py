@@ -0,0 +1,80 @@
+"""add climb comment count and latest-comment preview
+
+Revision ID: d2a7c5e9f3b8
+Revises: c4f8a2e6b1d9
+Create Date: 2025-05-12 11:40:19.275031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c5e9f3b8'
+down_revision: Union[str, None] = 'c4f8a2e6b1d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREVIEW_LENGTH = 140
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('climb', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('climb', sa.Column('last_comment_id', sa.Integer(), nullable=True))
+    op.add_column('climb', sa.Column('last_comment_at', sa.DateTime(), nullable=True))
+    op.add_column('climb', sa.Column('last_comment_username', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('climb', sa.Column('last_comment_preview', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    # Backfill from the comment table: counts per climb, then each climb's newest comment
+    bind = op.get_bind()
+    comment = sa.table('comment', sa.column('id', sa.Integer), sa.column('climb_id', sa.Integer),
+                       sa.column('username', sa.String), sa.column('text', sa.String),
+                       sa.column('created_at', sa.DateTime))
+    climb = sa.table('climb', sa.column('id', sa.Integer), sa.column('comment_count', sa.Integer),
+                     sa.column('last_comment_id', sa.Integer), sa.column('last_comment_at', sa.DateTime),
+                     sa.column('last_comment_username', sa.String), sa.column('last_comment_preview', sa.String))
+    counts = [
+        {'climb_id': climb_id, 'comment_count': count}
+        for climb_id, count in bind.execute(sa.select(comment.c.climb_id, sa.func.count()).group_by(comment.c.climb_id))
+    ]
+    if counts:
+        bind.execute(
+            climb.update().where(climb.c.id == sa.bindparam('climb_id')).values(comment_count=sa.bindparam('comment_count')),
+            counts,
+        )
+    ranked = sa.select(
+        comment,
+        sa.func.row_number().over(
+            partition_by=comment.c.climb_id, order_by=(comment.c.created_at.desc(), comment.c.id.desc())
+        ).label('position'),
+    ).subquery()
+    latest = [
+        {'climb_id': climb_id, 'comment_id': comment_id, 'created_at': created_at, 'username': username,
+         'preview': text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH - 1].rstrip() + '…'}
+        for comment_id, climb_id, username, text, created_at in bind.execute(
+            sa.select(ranked.c.id, ranked.c.climb_id, ranked.c.username, ranked.c.text, ranked.c.created_at)
+            .where(ranked.c.position == 1)
+        )
+    ]
+    if latest:
+        bind.execute(
+            climb.update().where(climb.c.id == sa.bindparam('climb_id')).values(
+                last_comment_id=sa.bindparam('comment_id'), last_comment_at=sa.bindparam('created_at'),
+                last_comment_username=sa.bindparam('username'), last_comment_preview=sa.bindparam('preview'),
+            ),
+            latest,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('climb') as batch_op:
+        batch_op.drop_column('last_comment_preview')
+        batch_op.drop_column('last_comment_username')
+        batch_op.drop_column('last_comment_at')
+        batch_op.drop_column('last_comment_id')
+        batch_op.drop_column('comment_count')
@@ -0,0 +1,105 @@
+"""add climb sort columns and listing indexes
+
+Revision ID: d5a9f3c1b7e8
+Revises: c8e4a1f6d0b2
+Create Date: 2025-04-19 10:21:07.402915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import re
+
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9f3c1b7e8'
+down_revision: Union[str, None] = 'c8e4a1f6d0b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_climb_gym_id_date_added': ['gym_id', 'date_added', 'id'],
+    'ix_climb_gym_id_difficulty': ['gym_id', 'difficulty', 'id'],
+    'ix_climb_gym_id_ascent_count': ['gym_id', 'ascent_count', 'id'],
+    'ix_climb_gym_id_quality_average': ['gym_id', 'quality_average', 'id'],
+    'ix_climb_gym_id_setter_grade': ['gym_id', 'setter_grade', 'date_added'],
+    'ix_climb_gym_id_setter': ['gym_id', 'setter', 'date_added'],
+    'ix_climb_gym_id_section': ['gym_id', 'section', 'date_added'],
+    'ix_climb_gym_id_color': ['gym_id', 'color', 'date_added'],
+}
+
+# The grade parser as it was at this revision (V-scale and YDS only). Frozen here:
+# app.grades has since learned more scales, and replaying this revision must not change.
+_V_SCALE = re.compile(r"^V(B|\d{1,2})$")
+_YDS = re.compile(r"^5\.(\d{1,2})([ABCD])?$")
+
+
+def grade_rank(grade):
+    """Sortable difficulty of a V-scale or YDS grade, ignoring spacing and case, or None."""
+    if not grade:
+        return None
+    text = re.sub(r"\s+", "", grade).upper()
+    match = _V_SCALE.match(text)
+    if match:
+        value = match.group(1)
+        return 100.0 + (-1 if value == "B" else int(value))
+    match = _YDS.match(text)
+    if match:
+        letter = match.group(2)
+        return int(match.group(1)) + ("ABCD".index(letter) * 0.25 if letter else 0.0)
+    return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('climb', sa.Column('difficulty', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('climb', sa.Column('ascent_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('climb', sa.Column('quality_average', sa.Float(), nullable=False, server_default='0'))
+
+    # Backfill: difficulty is parsed in Python, the counters come from climbstats
+    bind = op.get_bind()
+    climb = sa.table('climb', sa.column('id', sa.Integer), sa.column('setter_grade', sa.String),
+                     sa.column('difficulty', sa.Float), sa.column('ascent_count', sa.Integer),
+                     sa.column('quality_average', sa.Float))
+    stats = sa.table('climbstats', sa.column('climb_id', sa.Integer), sa.column('send_count', sa.Integer),
+                     sa.column('attempt_count', sa.Integer), sa.column('quality_sum', sa.Integer),
+                     sa.column('quality_count', sa.Integer))
+    ranks = [
+        {'climb_id': climb_id, 'difficulty': grade_rank(setter_grade)}
+        for climb_id, setter_grade in bind.execute(sa.select(climb.c.id, climb.c.setter_grade))
+        if grade_rank(setter_grade) is not None
+    ]
+    if ranks:
+        bind.execute(
+            climb.update().where(climb.c.id == sa.bindparam('climb_id')).values(difficulty=sa.bindparam('difficulty')),
+            ranks,
+        )
+    totals = [
+        {'climb_id': climb_id, 'ascent_count': sends + attempts,
+         'quality_average': quality_sum / quality_count if quality_count else 0.0}
+        for climb_id, sends, attempts, quality_sum, quality_count in bind.execute(sa.select(
+            stats.c.climb_id, stats.c.send_count, stats.c.attempt_count, stats.c.quality_sum, stats.c.quality_count,
+        ))
+    ]
+    if totals:
+        bind.execute(
+            climb.update().where(climb.c.id == sa.bindparam('climb_id')).values(
+                ascent_count=sa.bindparam('ascent_count'), quality_average=sa.bindparam('quality_average'),
+            ),
+            totals,
+        )
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'climb', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name='climb')
+    with op.batch_alter_table('climb') as batch_op:
+        batch_op.drop_column('quality_average')
+        batch_op.drop_column('ascent_count')
+        batch_op.drop_column('difficulty')
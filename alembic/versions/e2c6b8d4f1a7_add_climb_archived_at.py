@@ -0,0 +1,29 @@
+"""add climb archived_at for section resets
+
+Revision ID: e2c6b8d4f1a7
+Revises: d5a9f3c1b7e8
+Create Date: 2025-04-21 09:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6b8d4f1a7'
+down_revision: Union[str, None] = 'd5a9f3c1b7e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('climb', sa.Column('archived_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('climb') as batch_op:
+        batch_op.drop_column('archived_at')
@@ -0,0 +1,37 @@
+"""add (climb_id, created_at, id) and (user_id, created_at, id) comment indexes
+
+Revision ID: e6b1f8d3a9c4
+Revises: d2a7c5e9f3b8
+Create Date: 2025-05-13 16:05:52.810447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b1f8d3a9c4'
+down_revision: Union[str, None] = 'd2a7c5e9f3b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The composite indexes lead with the old single-column ones, which are dropped.
+    """
+    op.create_index('ix_comment_climb_id_created_at', 'comment', ['climb_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_comment_user_id_created_at', 'comment', ['user_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_comment_climb_id', table_name='comment')
+    op.drop_index('ix_comment_user_id', table_name='comment')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_comment_user_id', 'comment', ['user_id'], unique=False)
+    op.create_index('ix_comment_climb_id', 'comment', ['climb_id'], unique=False)
+    op.drop_index('ix_comment_user_id_created_at', table_name='comment')
+    op.drop_index('ix_comment_climb_id_created_at', table_name='comment')
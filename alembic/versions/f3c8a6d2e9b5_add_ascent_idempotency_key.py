@@ -0,0 +1,35 @@
+"""add ascent idempotency_key with a unique (user_id, idempotency_key) index
+
+Revision ID: f3c8a6d2e9b5
+Revises: e6b1f8d3a9c4
+Create Date: 2025-05-20 11:42:17.364905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8a6d2e9b5'
+down_revision: Union[str, None] = 'e6b1f8d3a9c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing ascents have no key; NULLs never collide in the unique index.
+    """
+    op.add_column('ascent', sa.Column('idempotency_key', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.create_index('uq_ascent_user_id_idempotency_key', 'ascent', ['user_id', 'idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_ascent_user_id_idempotency_key', table_name='ascent')
+    with op.batch_alter_table('ascent') as batch_op:
+        batch_op.drop_column('idempotency_key')
@@ -0,0 +1,43 @@
+"""add leaderboardscore table
+
+Revision ID: f7a3c9e1b5d2
+Revises: e2c6b8d4f1a7
+Create Date: 2025-04-28 16:03:27.190442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a3c9e1b5d2'
+down_revision: Union[str, None] = 'e2c6b8d4f1a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing ascents are not scored here; run ``python -m app.leaderboard`` afterwards.
+    """
+    op.create_table('leaderboardscore',
+    sa.Column('gym_id', sa.Integer(), nullable=False),
+    sa.Column('window', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('period', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('sends', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('hardest', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['gym_id'], ['gym.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('gym_id', 'window', 'period', 'user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('leaderboardscore')
@@ -0,0 +1,128 @@
+"""
+Async versions of the API routers for async database URLs.
+
+Route handlers are written once, against a sync ``Session``. :func:`async_router`
+rebuilds a router so that every endpoint becomes an ``async def`` that takes an
+``AsyncSession`` and runs the original handler through ``AsyncSession.run_sync``.
+The database I/O then happens on the event loop (via the async driver) instead of
+holding a threadpool worker for the whole request.
+
+Everything else in the handler runs on the event loop too, so CPU-heavy work
+that does not touch the database is handed to the threadpool with :func:`offload`.
+"""
+import functools
+import inspect
+from typing import Callable, Dict, TypeVar
+
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import get_async_session, get_session
+
+T = TypeVar("T")
+
+# Keyword arguments that APIRouter.add_api_route accepts and APIRoute exposes unchanged
+_ROUTE_ATTRS = (
+    "response_model", "status_code", "tags", "dependencies", "summary", "description",
+    "response_description", "responses", "deprecated", "methods", "operation_id",
+    "response_model_include", "response_model_exclude", "response_model_by_alias",
+    "response_model_exclude_unset", "response_model_exclude_defaults",
+    "response_model_exclude_none", "include_in_schema", "response_class", "name",
+)
+
+
+def _uses_session(func: Callable, seen=None) -> bool:
+    """
+    Return True if ``func`` depends on ``get_session`` directly or through sub-dependencies.
+    """
+    seen = seen or set()
+    if func in seen:
+        return False
+    seen.add(func)
+    for param in inspect.signature(func).parameters.values():
+        if isinstance(param.default, DependsParam):
+            dep = param.default.dependency
+            if dep is get_session or (dep is not None and _uses_session(dep, seen)):
+                return True
+    return False
+
+
+def offload(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Call ``func`` from a handler without holding up the event loop.
+
+    Inside ``AsyncSession.run_sync`` the handler runs on the event loop, so ``func``
+    goes to the threadpool and the handler waits for it; in sync mode the handler
+    is already on a threadpool worker and ``func`` is simply called. ``func`` must
+    not use the session.
+    """
+    if in_greenlet():
+        return await_only(run_in_threadpool(func, *args, **kwargs))
+    return func(*args, **kwargs)
+
+
+_wrapped: Dict[Callable, Callable] = {}
+
+
+def asyncify(func: Callable) -> Callable:
+    """
+    Wrap a sync handler or dependency that takes a sync session into an async one.
+
+    ``Depends(get_session)`` parameters become ``Depends(get_async_session)``, other
+    session-using dependencies are wrapped recursively, and the body runs inside
+    ``AsyncSession.run_sync``. FastAPI caches dependencies per request, so the
+    handler and its dependencies share one async session.
+    """
+    if func in _wrapped:
+        return _wrapped[func]
+    # Coroutine handlers manage their own threadpool offloading of sync DB work
+    if inspect.iscoroutinefunction(func) or not _uses_session(func):
+        return func
+
+    signature = inspect.signature(func)
+    session_params = []
+    params = []
+    for param in signature.parameters.values():
+        if isinstance(param.default, DependsParam):
+            dep = param.default.dependency
+            if dep is get_session:
+                session_params.append(param.name)
+                param = param.replace(default=Depends(get_async_session), annotation=AsyncSession)
+            elif dep is not None and _uses_session(dep):
+                param = param.replace(default=Depends(asyncify(dep), use_cache=param.default.use_cache))
+        params.append(param)
+
+    @functools.wraps(func)
+    async def wrapper(**kwargs):
+        async_session = None
+        for name in session_params:
+            async_session = kwargs.pop(name)
+        if async_session is None:
+            # Only its dependencies use the session; the body itself stays off the event loop
+            return await run_in_threadpool(func, **kwargs)
+        return await async_session.run_sync(
+            lambda sync_session: func(**kwargs, **{name: sync_session for name in session_params})
+        )
+
+    wrapper.__signature__ = signature.replace(parameters=params)
+    _wrapped[func] = wrapper
+    return wrapper
+
+
+def async_router(router: APIRouter) -> APIRouter:
+    """
+    Build an async copy of a router whose session-using endpoints run on an AsyncSession.
+    """
+    rebuilt = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            rebuilt.routes.append(route)
+            continue
+        # route.path, tags and dependencies already include the source router's prefix and defaults
+        kwargs = {attr: getattr(route, attr) for attr in _ROUTE_ATTRS}
+        rebuilt.add_api_route(route.path, asyncify(route.endpoint), **kwargs)
+    return rebuilt
@@ -0,0 +1,305 @@
+"""
+Bulk import of ascent histories from CSV or NDJSON.
+
+Records are parsed as they stream in and handled ``IMPORT_CHUNK_SIZE`` at a
+time: the climbs a chunk refers to are resolved with one query, its valid rows
+are written with one driver-level executemany (``COPY`` on PostgreSQL, as in
+:mod:`app.seed`) plus batched stats, leaderboard and rollup updates, and the
+chunk is committed on its own. Bad records are reported by
+line number and do not stop the import. The files written by ``GET /ascents/export`` import as-is.
+
+    python -m app.ascent_import history.csv --username alice
+"""
+import argparse
+import codecs
+import csv
+import json
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app import leaderboard, rollups
+from app.climb_stats import record_ascent_rows
+from app.grades import grade_rank
+from app.http_cache import response_cache
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+from app.schemas.ascents import AscentImportError, AscentImportResult, AscentImportRow
+from app.seed import write_columns
+
+IMPORT_CHUNK_SIZE = 10000
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Split a stream of UTF-8 byte chunks (e.g. a request body) into lines.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Parse lines of CSV (with a header row) or NDJSON into records.
+
+    Yields:
+        tuple: (line number, field dict), or (line number, error message) for
+        a line that could not be parsed.
+    """
+    if fmt == "csv":
+        reader = csv.reader(lines)
+        header = [name.strip() for name in next(reader, [])]
+        for values in reader:
+            if not values:
+                continue
+            if len(values) != len(header):
+                yield reader.line_num, f"Expected {len(header)} fields, got {len(values)}"
+                continue
+            # Empty cells mean "not given", like a missing key in NDJSON
+            yield reader.line_num, {name: value for name, value in zip(header, values) if value != ""}
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, "Expected a JSON object"
+            continue
+        yield number, record
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Dates are stored as naive UTC
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class AscentImporter:
+    """
+    Imports records for one user chunk by chunk, collecting per-line errors.
+
+    Args:
+        session (Session): DB session; each chunk is committed on it.
+        user_id (int): Owner of the imported ascents.
+        chunk_size (int): Records per lookup, INSERT and transaction.
+        max_errors (int): Errors listed in the result; later ones are only counted.
+    """
+
+    def __init__(self, session: Session, user_id: int, chunk_size: int = IMPORT_CHUNK_SIZE,
+                 max_errors: int = MAX_REPORTED_ERRORS):
+        self.session = session
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[AscentImportError] = []
+        # gym id -> ascents imported there, for announcing the import
+        self.gym_counts: Dict[int, int] = defaultdict(int)
+        self._gym_ids: Dict[str, Optional[int]] = {}
+
+    def run(self, records: Iterable[Tuple[int, Any]]) -> AscentImportResult:
+        """
+        Import every record from :func:`iter_records` and summarize the outcome.
+        """
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        return self.result()
+
+    def result(self) -> AscentImportResult:
+        return AscentImportResult(
+            imported=self.imported,
+            failed=self.failed,
+            # Validation and resolution failures are found in separate passes over a chunk
+            errors=sorted(self.errors, key=lambda error: error.line),
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+    def fail(self, line: int, code: str, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(AscentImportError(line=line, code=code, message=message))
+
+    def import_chunk(self, chunk: List[Tuple[int, Any]]) -> None:
+        """
+        Validate, resolve and write one chunk of records in its own transaction.
+        """
+        parsed = []
+        for line, record in chunk:
+            if isinstance(record, str):
+                self.fail(line, "invalid_row", record)
+                continue
+            try:
+                row = AscentImportRow.model_validate(record)
+            except ValidationError as e:
+                error = e.errors()[0]
+                self.fail(line, "invalid_row", f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+                continue
+            if row.climb_id is None and not (
+                (row.gym_id or row.gym_name) and row.color and row.setter and row.section and row.date
+            ):
+                self.fail(line, "invalid_row", "Give climb_id, or gym_id or gym_name with color, setter, section and date")
+                continue
+            parsed.append((line, row))
+
+        now = datetime.utcnow()
+        rows, lines, gyms, climbs = [], [], [], {}
+        dates = [_naive_utc(row.date) if row.date is not None else now for _, row in parsed]
+        for (line, row), date, climb in zip(parsed, dates, self.resolve([row for _, row in parsed], dates)):
+            if climb is None:
+                self.fail(line, "climb_not_found", "No matching climb")
+                continue
+            climb_id, gym_id, difficulty = climb
+            climbs[climb_id] = (gym_id, difficulty)
+            rows.append({
+                "user_id": self.user_id,
+                "climb_id": climb_id,
+                "date": date,
+                "grade": row.grade,
+                "difficulty": grade_rank(row.grade),
+                "notes": row.notes,
+                "sent": row.sent,
+                "quality_rating": row.quality_rating,
+                "idempotency_key": None,
+            })
+            lines.append(line)
+            gyms.append(gym_id)
+        if not rows:
+            return
+
+        try:
+            write_columns(self.session.connection(), Ascent.__table__, {
+                name: list(map(itemgetter(name), rows)) for name in rows[0]
+            })
+            record_ascent_rows(self.session, rows)
+            scores = leaderboard.record_ascent_rows(self.session, rows, climbs=climbs)
+            rollups.record_ascent_rows(self.session, rows, climbs=climbs)
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            for line in lines:
+                self.fail(line, "write_failed", str(e.orig if getattr(e, "orig", None) else e))
+            return
+        leaderboard.scores_changed(self.session, scores)
+        self.imported += len(rows)
+        for gym_id in gyms:
+            self.gym_counts[gym_id] += 1
+        response_cache.bump(self.session, *(f"gym:{gym_id}" for gym_id in set(gyms)))
+
+    def resolve(self, rows: List[AscentImportRow], dates: List[datetime]) -> List[Optional[Tuple[int, int, float]]]:
+        """
+        Find the (climb id, gym id, difficulty) each row refers to with a single query.
+
+        Rows without ``climb_id`` match the latest climb with their gym, color,
+        setter and section that was added on or before the ascent's date, as long
+        as it had not been archived by then.
+        """
+        self._load_gym_names({row.gym_name for row in rows if row.climb_id is None and row.gym_id is None})
+        keys = [
+            None if row.climb_id is not None else
+            (row.gym_id or self._gym_ids.get(row.gym_name), row.color, row.setter, row.section)
+            for row in rows
+        ]
+        ids = {row.climb_id for row in rows if row.climb_id is not None}
+        wanted = {key for key in keys if key is not None and key[0] is not None}
+        conditions = []
+        if ids:
+            conditions.append(Climb.id.in_(ids))
+        if wanted:
+            latest = max(date for date, key in zip(dates, keys) if key in wanted)
+            conditions.append(and_(
+                tuple_(Climb.gym_id, Climb.color, Climb.setter, Climb.section).in_(wanted),
+                Climb.date_added <= latest,
+            ))
+        climb_of: Dict[int, Tuple[int, int, float]] = {}
+        candidates: Dict[tuple, List[tuple]] = defaultdict(list)
+        if conditions:
+            statement = select(
+                Climb.id, Climb.gym_id, Climb.color, Climb.setter, Climb.section, Climb.date_added, Climb.archived_at,
+                Climb.difficulty,
+            ).where(or_(*conditions))
+            for climb_id, gym_id, color, setter, section, added, archived, difficulty in self.session.execute(statement):
+                climb_of[climb_id] = (climb_id, gym_id, difficulty)
+                candidates[(gym_id, color, setter, section)].append((added, climb_id, archived))
+            for climbs in candidates.values():
+                climbs.sort()
+
+        resolved = []
+        for row, date, key in zip(rows, dates, keys):
+            if key is None:
+                resolved.append(climb_of.get(row.climb_id))
+                continue
+            climbs = candidates.get(key, [])
+            index = bisect_right(climbs, (date, float("inf"))) - 1
+            if index < 0 or (climbs[index][2] is not None and climbs[index][2] <= date):
+                resolved.append(None)
+            else:
+                resolved.append(climb_of[climbs[index][1]])
+        return resolved
+
+    def _load_gym_names(self, names: set) -> None:
+        # Gym names are few; each is looked up once per import
+        missing = names - self._gym_ids.keys()
+        if not missing:
+            return
+        found = dict(self.session.exec(select(Gym.name, Gym.id).where(Gym.name.in_(missing))).all())
+        for name in missing:
+            self._gym_ids[name] = found.get(name)
+
+
+def import_ascents(session: Session, user_id: int, lines: Iterable[str], fmt: str) -> AscentImportResult:
+    """
+    Import an ascent history for a user from lines of CSV or NDJSON.
+    """
+    return AscentImporter(session, user_id).run(iter_records(lines, fmt))
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Import an ascent history from CSV or NDJSON.")
+    parser.add_argument("path", help="File to import, or - for stdin")
+    parser.add_argument("--username", required=True, help="User the ascents belong to")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default=None,
+                        help="Input format (default: from the file extension, else ndjson)")
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == args.username)).first()
+        if user is None:
+            sys.exit(f"Unknown user {args.username!r}")
+        source = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8-sig")
+        with source:
+            result = import_ascents(session, user.id, source, fmt)
+    for error in result.errors:
+        print(f"line {error.line}: {error.code}: {error.message}", file=sys.stderr)
+    if result.errors_truncated:
+        print(f"... {result.failed - len(result.errors)} more error(s) not shown", file=sys.stderr)
+    print(f"Imported {result.imported} ascent(s), {result.failed} failed")
+    sys.exit(1 if result.failed else 0)
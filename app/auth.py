@@ -1,21 +1,46 @@
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.models.core import User
+from sqlalchemy import event, inspect
 from sqlmodel import Session, select
+from app.cache import TTLCache
 from app.db import get_session
+from app.hashing import crypt_context
+from app.settings import env_int
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = crypt_context()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Authenticated principals keyed by (engine, token subject). Entries are detached
+# copies of the User row; treat them as read-only.
+principal_cache = TTLCache(
+    "principals",
+    maxsize=env_int("AUTH_CACHE_SIZE", 1024),
+    ttl=env_int("AUTH_CACHE_TTL_SECONDS", 60),
+)
+
+def invalidate_user(username: str) -> int:
+    """
+    Drop cached principals for a username. Call whenever a user changes.
+    """
+    return principal_cache.invalidate(lambda key: key[1] == username)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.username)
+    # A rename must also evict the entry cached under the old name
+    for old_username in inspect(target).attrs.username.history.deleted or ():
+        invalidate_user(old_username)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -41,7 +66,12 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = session.exec(select(User).where(User.username == username)).first()
+    key = (session.get_bind(), username)
+    user = principal_cache.get(key)
     if user is None:
-        raise credentials_exception
+        user = session.exec(select(User).where(User.username == username)).first()
+        if user is None:
+            raise credentials_exception
+        user = User(**user.model_dump())
+        principal_cache.set(key, user)
     return user
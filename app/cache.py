@@ -0,0 +1,98 @@
+"""
+Small in-process caches.
+
+:class:`TTLCache` is a thread-safe LRU with per-entry expiry and hit/miss
+counters. Caches register themselves by name so their stats can be reported
+from ``GET /health/caches``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+# name -> cache, for health/metrics reporting
+registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire ``ttl`` seconds after being set.
+
+    Args:
+        name (str): Registry name used in stats reporting.
+        maxsize (int): Maximum number of entries; 0 disables the cache.
+        ttl (float): Seconds an entry stays valid.
+        on_lookup (callable | None): Metrics hook called with ``(name, hit)`` on every get.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0, on_lookup: Optional[Callable[[str, bool], None]] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_lookup = on_lookup
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for ``key``, or ``default`` if missing or expired.
+        """
+        value = _MISSING
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, cached = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    value = cached
+                else:
+                    del self._data[key]
+            hit = value is not _MISSING
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if self.on_lookup is not None:
+            self.on_lookup(self.name, hit)
+        return value if hit else default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop every entry whose key matches ``predicate``. Returns the number removed.
+        """
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,295 @@
+"""
+Incremental maintenance of per-climb consensus aggregates.
+
+Ascent writes call :func:`record_ascent` inside their own transaction so the
+``ClimbStats`` row, and the sort columns copied onto ``Climb`` for the filtered
+listing, always match the committed ascents. :func:`rebuild_climb_stats`
+recomputes the table from scratch for backfills and drift repair:
+
+    python -m app.climb_stats [--climb-id ID]
+"""
+import argparse
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+from sqlalchemy import case, delete, func, update
+from sqlmodel import Session, select
+from app.db import insert_missing, update_rows
+from app.grades import grade_rank, normalize_grade
+from app.models.ascents import Ascent
+from app.models.core import Climb
+from app.models.stats import ClimbStats
+from app.schemas.stats import ClimbStatsRead
+
+
+def histogram_key(grade: str) -> str:
+    """
+    Grade histogram bucket: the canonical spelling, so "v 7" and "V7" count together;
+    unrecognised grades keep their own text.
+    """
+    return normalize_grade(grade) or grade
+
+
+class StatsDelta:
+    """
+    Net change to one climb's stats from a batch of ascent writes.
+
+    Deltas are summed in plain Python and applied to the ORM row once, so a batch
+    costs one attribute write per column rather than one per ascent.
+    """
+
+    __slots__ = ("send_count", "attempt_count", "quality_sum", "quality_count", "grades",
+                 "difficulty_sum", "difficulty_count")
+
+    def __init__(self):
+        self.send_count = 0
+        self.attempt_count = 0
+        self.quality_sum = 0
+        self.quality_count = 0
+        self.grades: Counter = Counter()
+        self.difficulty_sum = 0.0
+        self.difficulty_count = 0
+
+    def add(self, sent: bool, quality_rating: Optional[int], grade: Optional[str], sign: int = 1) -> None:
+        if sent:
+            self.send_count += sign
+        else:
+            self.attempt_count += sign
+        if quality_rating is not None:
+            self.quality_sum += sign * quality_rating
+            self.quality_count += sign
+        if grade:
+            self.grades[histogram_key(grade)] += sign
+            difficulty = grade_rank(grade)
+            if difficulty is not None:
+                self.difficulty_sum += sign * difficulty
+                self.difficulty_count += sign
+
+    def apply_to(self, stats: ClimbStats) -> None:
+        stats.send_count += self.send_count
+        stats.attempt_count += self.attempt_count
+        stats.quality_sum += self.quality_sum
+        stats.quality_count += self.quality_count
+        stats.difficulty_sum += self.difficulty_sum
+        stats.difficulty_count += self.difficulty_count
+        if any(self.grades.values()):
+            histogram = dict(stats.grade_histogram or {})
+            for grade, change in self.grades.items():
+                count = histogram.get(grade, 0) + change
+                if count > 0:
+                    histogram[grade] = count
+                else:
+                    histogram.pop(grade, None)
+            # Reassign so the JSON column is flagged dirty
+            stats.grade_histogram = histogram
+
+
+def sort_columns(stats: ClimbStats) -> dict:
+    """
+    Values of the denormalized ``Climb`` sort columns for a stats row.
+    """
+    return {
+        "ascent_count": stats.send_count + stats.attempt_count,
+        "quality_average": stats.quality_sum / stats.quality_count if stats.quality_count else 0.0,
+    }
+
+
+def record_ascent(session: Session, ascent: Ascent, sign: int = 1) -> ClimbStats:
+    """
+    Update the climb's stats row for an ascent write. Does not commit.
+
+    Args:
+        session (Session): Session holding the ascent write.
+        ascent (Ascent): The ascent being inserted (sign=1) or deleted (sign=-1).
+        sign (int): Direction of the change.
+    Returns:
+        ClimbStats: The updated (possibly new) stats row.
+    """
+    return record_ascents(session, [ascent], sign)[ascent.climb_id]
+
+
+def record_ascents(session: Session, ascents: Sequence[Ascent], sign: int = 1) -> Dict[int, ClimbStats]:
+    """
+    Update stats rows for a batch of ascent writes with one query per table. Does not commit.
+
+    Args:
+        session (Session): Session holding the ascent writes.
+        ascents (Sequence[Ascent]): Ascents being inserted (sign=1) or deleted (sign=-1).
+        sign (int): Direction of the change.
+    Returns:
+        dict: climb_id -> updated (possibly new) stats row.
+    """
+    deltas: Dict[int, StatsDelta] = defaultdict(StatsDelta)
+    for ascent in ascents:
+        deltas[ascent.climb_id].add(ascent.sent, ascent.quality_rating, ascent.grade, sign)
+    return apply_deltas(session, deltas)
+
+
+def record_ascent_rows(session: Session, rows: Iterable[Mapping], sign: int = 1) -> int:
+    """
+    Bulk-load variant of :func:`record_ascents` for plain column mappings, such as
+    the parameters of an executemany INSERT. Does not commit.
+
+    Stats rows are read as tuples and written back with executemany statements
+    instead of being loaded as ORM objects, so the cost is a few statements per
+    batch however many climbs it touches. Already-loaded ``ClimbStats`` and
+    ``Climb`` objects in the session are not refreshed.
+
+    Returns:
+        int: Number of climbs whose stats changed.
+    """
+    deltas: Dict[int, StatsDelta] = defaultdict(StatsDelta)
+    # Repeats of a climb mostly share their outcome, rating and grade, so count those first
+    same = Counter((row["climb_id"], row["sent"], row["quality_rating"], row["grade"]) for row in rows)
+    for (climb_id, sent, quality_rating, grade), count in same.items():
+        deltas[climb_id].add(sent, quality_rating, grade, sign * count)
+    if not deltas:
+        return 0
+    columns = (
+        "climb_id", "send_count", "attempt_count", "quality_sum", "quality_count", "grade_histogram",
+        "difficulty_sum", "difficulty_count",
+    )
+    def locked(climb_ids):
+        return {
+            row.climb_id: row._mapping
+            for row in session.execute(
+                select(*(getattr(ClimbStats, name) for name in columns))
+                .where(ClimbStats.climb_id.in_(climb_ids))
+                .with_for_update()
+            )
+        }
+
+    current = locked(deltas)
+    missing = [climb_id for climb_id in deltas if climb_id not in current]
+    if missing:
+        create_missing(session, missing)
+        current.update(locked(missing))
+    updates, climbs = [], []
+    for climb_id, delta in deltas.items():
+        stats = SimpleNamespace(**current[climb_id])
+        delta.apply_to(stats)
+        updates.append(vars(stats))
+        climbs.append({"id": climb_id, **sort_columns(stats)})
+    update_rows(session, ClimbStats, updates)
+    update_rows(session, Climb, climbs)
+    return len(deltas)
+
+
+def create_missing(session: Session, climb_ids: Sequence[int]) -> None:
+    """
+    Insert empty stats rows for climbs that have none, skipping any created meanwhile.
+
+    ``SELECT ... FOR UPDATE`` locks nothing for a row that doesn't exist yet, so
+    two first ascents of a climb would both insert it; creating the row with
+    ``ON CONFLICT DO NOTHING`` and then locking it makes the second one wait.
+    """
+    session.execute(insert_missing(session, ClimbStats), [
+        {"climb_id": climb_id, "send_count": 0, "attempt_count": 0, "quality_sum": 0, "quality_count": 0,
+         "grade_histogram": {}, "difficulty_sum": 0.0, "difficulty_count": 0}
+        for climb_id in climb_ids
+    ])
+
+
+def apply_deltas(session: Session, deltas: Dict[int, StatsDelta]) -> Dict[int, ClimbStats]:
+    """
+    Apply per-climb deltas to the stats rows and the ``Climb`` sort columns. Does not commit.
+    """
+    def locked(climb_ids):
+        statement = select(ClimbStats).where(ClimbStats.climb_id.in_(climb_ids)).with_for_update()
+        return {stats.climb_id: stats for stats in session.exec(statement)}
+
+    stats_by_climb = locked(deltas)
+    missing = [climb_id for climb_id in deltas if climb_id not in stats_by_climb]
+    if missing:
+        create_missing(session, missing)
+        stats_by_climb.update(locked(missing))
+    for climb_id, delta in deltas.items():
+        delta.apply_to(stats_by_climb[climb_id])
+    session.add_all(stats_by_climb.values())
+    for climb in session.exec(select(Climb).where(Climb.id.in_(deltas))):
+        for name, value in sort_columns(stats_by_climb[climb.id]).items():
+            setattr(climb, name, value)
+        session.add(climb)
+    return stats_by_climb
+
+
+def to_read(climb_id: int, stats: Optional[ClimbStats]) -> ClimbStatsRead:
+    """
+    Convert a stats row (or its absence) into the public response schema.
+    """
+    if stats is None:
+        return ClimbStatsRead(climb_id=climb_id)
+    histogram = stats.grade_histogram or {}
+    return ClimbStatsRead(
+        climb_id=climb_id,
+        send_count=stats.send_count,
+        attempt_count=stats.attempt_count,
+        quality_average=round(stats.quality_sum / stats.quality_count, 2) if stats.quality_count else None,
+        quality_count=stats.quality_count,
+        consensus_grade=max(histogram, key=histogram.get) if histogram else None,
+        consensus_difficulty=(
+            round(stats.difficulty_sum / stats.difficulty_count, 2) if stats.difficulty_count else None
+        ),
+        grade_histogram=histogram,
+    )
+
+
+def rebuild_climb_stats(session: Session, climb_id: Optional[int] = None) -> int:
+    """
+    Recompute stats rows from the ascent table with two GROUP BY queries,
+    then refresh the matching ``Climb`` sort columns.
+
+    Args:
+        session (Session): DB session; committed on success.
+        climb_id (int | None): Rebuild only this climb, or every climb when None.
+    Returns:
+        int: Number of stats rows written.
+    """
+    totals = select(
+        Ascent.climb_id,
+        func.sum(case((Ascent.sent, 1), else_=0)),
+        func.sum(case((Ascent.sent, 0), else_=1)),
+        func.coalesce(func.sum(Ascent.quality_rating), 0),
+        func.count(Ascent.quality_rating),
+        func.coalesce(func.sum(Ascent.difficulty), 0.0),
+        func.count(Ascent.difficulty),
+    ).group_by(Ascent.climb_id)
+    grades = select(Ascent.climb_id, Ascent.grade, func.count()).where(Ascent.grade.is_not(None)).group_by(Ascent.climb_id, Ascent.grade)
+    wipe = delete(ClimbStats)
+    reset = update(Climb).values(ascent_count=0, quality_average=0.0)
+    if climb_id is not None:
+        totals = totals.where(Ascent.climb_id == climb_id)
+        grades = grades.where(Ascent.climb_id == climb_id)
+        wipe = wipe.where(ClimbStats.climb_id == climb_id)
+        reset = reset.where(Climb.id == climb_id)
+
+    rows = {}
+    for cid, sends, attempts, quality_sum, quality_count, difficulty_sum, difficulty_count in session.exec(totals):
+        rows[cid] = ClimbStats(
+            climb_id=cid, send_count=sends, attempt_count=attempts,
+            quality_sum=quality_sum, quality_count=quality_count, grade_histogram={},
+            difficulty_sum=difficulty_sum, difficulty_count=difficulty_count,
+        )
+    for cid, grade, count in session.exec(grades):
+        if grade:
+            key = histogram_key(grade)
+            rows[cid].grade_histogram[key] = rows[cid].grade_histogram.get(key, 0) + count
+
+    session.execute(wipe)
+    session.add_all(rows.values())
+    session.execute(reset)
+    if rows:
+        session.execute(update(Climb), [{"id": cid, **sort_columns(stats)} for cid, stats in rows.items()])
+    session.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild per-climb consensus stats from ascents.")
+    parser.add_argument("--climb-id", type=int, default=None, help="Only rebuild this climb")
+    args = parser.parse_args()
+    with Session(engine) as session:
+        written = rebuild_climb_stats(session, args.climb_id)
+    print(f"Rebuilt stats for {written} climb(s)")
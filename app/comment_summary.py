@@ -0,0 +1,143 @@
+"""
+Per-climb comment count and latest-comment preview, denormalized onto ``Climb``.
+
+Climb listings show how active each climb's beta thread is without a COUNT or
+"latest comment" query per row. ``add_comment`` and ``delete_comment`` call
+:func:`record_comment` / :func:`remove_comment` in the transaction that writes
+the comment, and the count is changed in SQL (``comment_count + 1``) so
+concurrent writers can't lose an update. :func:`reconcile_comment_summaries`
+recomputes the columns from the comment table and repairs any that drifted:
+
+    python -m app.comment_summary [--climb-id ID]
+"""
+import argparse
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, func, or_, update
+from sqlmodel import Session, select
+
+from app.models.comment import Comment
+from app.models.core import Climb
+
+PREVIEW_LENGTH = 140
+RECONCILE_BATCH_SIZE = 10000
+SUMMARY_COLUMNS = ("comment_count", "last_comment_id", "last_comment_at", "last_comment_username", "last_comment_preview")
+EMPTY = dict.fromkeys(SUMMARY_COLUMNS[1:], None)
+
+
+def preview(text: str) -> str:
+    """
+    The start of a comment, cut at ``PREVIEW_LENGTH`` characters with an ellipsis.
+    """
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[:PREVIEW_LENGTH - 1].rstrip() + "…"
+
+
+def latest_values(comment_id: int, created_at, username: str, text: str) -> dict:
+    return {
+        "last_comment_id": comment_id,
+        "last_comment_at": created_at,
+        "last_comment_username": username,
+        "last_comment_preview": preview(text),
+    }
+
+
+def record_comment(session: Session, comment: Comment) -> None:
+    """
+    Count a new (flushed) comment and make it the climb's latest. Does not commit.
+
+    The preview is only replaced if the comment sorts after the current one
+    (``created_at``, then id, as the thread does), so when concurrent comments
+    commit out of order the newest still wins.
+    """
+    newer = or_(
+        Climb.last_comment_at.is_(None),
+        Climb.last_comment_at < comment.created_at,
+        and_(Climb.last_comment_at == comment.created_at, Climb.last_comment_id < comment.id),
+    )
+    latest = {
+        name: case((newer, value), else_=getattr(Climb, name))
+        for name, value in latest_values(comment.id, comment.created_at, comment.username, comment.text).items()
+    }
+    session.execute(
+        update(Climb)
+        .where(Climb.id == comment.climb_id)
+        .values(comment_count=Climb.comment_count + 1, **latest)
+    )
+
+
+def remove_comment(session: Session, comment: Comment) -> None:
+    """
+    Uncount a deleted comment, flushed beforehand. Does not commit.
+
+    If it was the climb's latest, the next newest comment becomes the preview.
+    """
+    values = {"comment_count": case((Climb.comment_count > 0, Climb.comment_count - 1), else_=0)}
+    last_id = session.exec(select(Climb.last_comment_id).where(Climb.id == comment.climb_id)).first()
+    if last_id == comment.id:
+        latest = session.execute(
+            select(Comment.id, Comment.created_at, Comment.username, Comment.text)
+            .where(Comment.climb_id == comment.climb_id)
+            .order_by(Comment.created_at.desc(), Comment.id.desc())
+            .limit(1)
+        ).first()
+        values.update(latest_values(*latest) if latest else EMPTY)
+    session.execute(update(Climb).where(Climb.id == comment.climb_id).values(**values))
+
+
+def reconcile_comment_summaries(session: Session, climb_id: Optional[int] = None) -> int:
+    """
+    Recompute the comment columns from the comment table and repair climbs that disagree.
+
+    Counts come from one GROUP BY and the latest comments from one ranked scan;
+    climbs are then compared in id order and only drifted rows are written,
+    with executemany UPDATEs of ``RECONCILE_BATCH_SIZE`` rows.
+
+    Args:
+        session (Session): DB session; committed on success.
+        climb_id (int | None): Check only this climb, or every climb when None.
+    Returns:
+        int: Number of climbs repaired.
+    """
+    counts = select(Comment.climb_id, func.count()).group_by(Comment.climb_id)
+    ranked = select(
+        Comment.climb_id, Comment.id, Comment.created_at, Comment.username, Comment.text,
+        func.row_number().over(
+            partition_by=Comment.climb_id, order_by=(Comment.created_at.desc(), Comment.id.desc())
+        ).label("position"),
+    )
+    climbs = select(Climb.id, *(getattr(Climb, name) for name in SUMMARY_COLUMNS)).order_by(Climb.id)
+    if climb_id is not None:
+        counts = counts.where(Comment.climb_id == climb_id)
+        ranked = ranked.where(Comment.climb_id == climb_id)
+        climbs = climbs.where(Climb.id == climb_id)
+    ranked = ranked.subquery()
+
+    expected: Dict[int, dict] = {cid: {"comment_count": count} for cid, count in session.execute(counts)}
+    for cid, *latest in session.execute(
+        select(ranked.c.climb_id, ranked.c.id, ranked.c.created_at, ranked.c.username, ranked.c.text)
+        .where(ranked.c.position == 1)
+    ):
+        expected[cid].update(latest_values(*latest))
+
+    repairs: List[dict] = []
+    for cid, *current in session.execute(climbs.execution_options(yield_per=RECONCILE_BATCH_SIZE)):
+        wanted = {"comment_count": 0, **EMPTY, **expected.get(cid, {})}
+        if dict(zip(SUMMARY_COLUMNS, current)) != wanted:
+            repairs.append({"id": cid, **wanted})
+    for start in range(0, len(repairs), RECONCILE_BATCH_SIZE):
+        session.execute(update(Climb), repairs[start:start + RECONCILE_BATCH_SIZE])
+    session.commit()
+    return len(repairs)
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Repair per-climb comment counts and latest-comment previews.")
+    parser.add_argument("--climb-id", type=int, default=None, help="Only check this climb")
+    args = parser.parse_args()
+    with Session(engine) as session:
+        repaired = reconcile_comment_summaries(session, args.climb_id)
+    print(f"Repaired comment summaries of {repaired} climb(s)")
@@ -1,12 +1,210 @@
 from sqlmodel import create_engine, SQLModel, Session
-from typing import Generator
-import os
-from dotenv import load_dotenv
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import bindparam, event, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from typing import AsyncGenerator, Dict, Generator, List
+import threading
+import time
+from app.settings import DatabaseSettings
 
-load_dotenv()
+# Async drivers and the sync driver used for DDL, CLIs and migrations alongside them
+ASYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql",
+    "postgresql+psycopg_async": "postgresql+psycopg",
+}
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./climb_gym_log.db")
-engine = create_engine(DATABASE_URL, echo=True)
+def is_async_url(url: str) -> bool:
+    """
+    Return True if the database URL names an async driver (e.g. ``sqlite+aiosqlite``).
+    """
+    return make_url(url).drivername in ASYNC_DRIVERS
+
+def sync_url(url: str) -> str:
+    """
+    Return the equivalent sync-driver URL for an async database URL.
+    """
+    parsed = make_url(url)
+    if parsed.drivername not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername]).render_as_string(hide_password=False)
+
+class PoolMetrics:
+    """
+    Thread-safe counters for connection pool activity.
+
+    Wait time is the time a caller spends blocked acquiring a connection from the
+    pool, which is the first thing to grow when pool_size is too small.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool=None) -> Dict[str, float]:
+        """
+        Return counters plus the live pool state, if a pool is given.
+        """
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return data
+
+pool_metrics = PoolMetrics()
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection.
+    """
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.record_wait(time.perf_counter() - started)
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool, TimedQueuePool):
+    """
+    Async-adapted variant of :class:`TimedQueuePool`.
+    """
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def engine_options(settings: DatabaseSettings, url: str, is_async: bool = False) -> dict:
+    """
+    Build create_engine keyword arguments for a URL from settings.
+
+    Pool sizing only applies to queue pools; in-memory SQLite keeps SQLAlchemy's
+    single-connection pool so the database is shared.
+    """
+    parsed = make_url(url)
+    options = {"echo": settings.echo_flag}
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000}
+        if _is_memory_sqlite(parsed):
+            return options
+    elif parsed.get_backend_name() == "postgresql" and settings.statement_timeout_ms:
+        if parsed.drivername == "postgresql+asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.statement_timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.statement_timeout_ms}"}
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+    )
+    return options
+
+def configure_engine(engine: Engine, settings: DatabaseSettings) -> Engine:
+    """
+    Attach pool metrics listeners and, for SQLite, per-connection pragmas.
+    """
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_metrics.count("connects")
+        if engine.dialect.name != "sqlite":
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+        cursor.close()
+
+    event.listen(engine, "checkout", lambda *args: pool_metrics.count("checkouts"))
+    event.listen(engine, "checkin", lambda *args: pool_metrics.count("checkins"))
+    event.listen(engine, "invalidate", lambda *args: pool_metrics.count("invalidations"))
+    return engine
+
+def make_engine(settings: DatabaseSettings) -> Engine:
+    """
+    Create the sync engine for the configured database (sync driver for async URLs).
+    """
+    url = sync_url(settings.url)
+    return configure_engine(create_engine(url, **engine_options(settings, url)), settings)
+
+def make_async_engine(settings: DatabaseSettings):
+    """
+    Create the async engine for an async database URL.
+    """
+    engine = create_async_engine(settings.url, **engine_options(settings, settings.url, is_async=True))
+    configure_engine(engine.sync_engine, settings)
+    return engine
+
+db_settings = DatabaseSettings.from_env()
+DATABASE_URL = db_settings.url
+ASYNC_DB = is_async_url(DATABASE_URL)
+engine = make_engine(db_settings)
+async_engine = make_async_engine(db_settings) if ASYNC_DB else None
+
+def insert_missing(session: Session, model: type) -> Insert:
+    """
+    INSERT into ``model``'s table that skips rows whose key already exists
+    (``ON CONFLICT DO NOTHING``; ``INSERT IGNORE`` on MySQL).
+
+    Get-or-create writers insert the rows they are about to lock with it: a row
+    another transaction is creating at the same time is waited for instead of
+    failing on the primary key.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return insert(model).prefix_with("IGNORE", dialect="mysql")
+
+def update_rows(session: Session, model: type, rows: List[Dict]) -> None:
+    """
+    Executemany UPDATE of ``model``'s table by primary key. Does not commit.
+
+    The Core form of ``session.execute(update(model), rows)``: the ORM's bulk
+    UPDATE checks and regroups every parameter set in Python, which outweighs
+    the UPDATEs themselves for batches of thousands of rows. Every row must
+    have the same keys, including the whole primary key.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    keys = {column.name for column in table.primary_key}
+    # Column names are reserved for the SET clause, so the key parameters are renamed
+    statement = update(table).where(*(table.c[name] == bindparam(f"key_{name}") for name in keys))
+    session.execute(statement, [
+        {f"key_{name}" if name in keys else name: value for name, value in row.items()} for row in rows
+    ])
 
 def get_session() -> Generator[Session, None, None]:
     """
@@ -18,8 +216,21 @@ def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
 
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get an async SQLModel session (async DATABASE_URL only).
+
+    Yields:
+        AsyncSession: Async SQLModel database session.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
 def init_db():
     """
-    Initialize the database and create all tables.
+    Create all tables directly from the models.
+
+    Only for tests and throwaway databases: the app never calls this at startup,
+    and real databases are created and upgraded with ``alembic upgrade head``.
     """
     SQLModel.metadata.create_all(engine)
@@ -0,0 +1,210 @@
+"""
+In-process pub/sub bus behind the per-gym live activity feed.
+
+Write handlers call :func:`publish` after committing; ``GET /gyms/{gym_id}/feed``
+streams the gym's events to browsers as Server-Sent Events so the frontend can
+stop polling the list endpoints.
+
+- Every gym keeps its last ``FEED_HISTORY`` events with increasing ids, so a
+  client reconnecting with ``Last-Event-ID`` gets exactly what it missed. If it
+  fell further behind than the history reaches, it gets a ``reset`` event and
+  should refetch the lists.
+- Each subscriber has a queue of at most ``FEED_QUEUE_SIZE`` events. A consumer
+  that lets it fill up is dropped: it receives a ``dropped`` event and the stream
+  ends, and it can reconnect and resume from its last event id.
+
+Events are only seen by subscribers of the same worker process.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from app.settings import env_int
+
+FEED_HISTORY = env_int("FEED_HISTORY", 1000)
+FEED_QUEUE_SIZE = env_int("FEED_QUEUE_SIZE", 100)
+FEED_HEARTBEAT_SECONDS = env_int("FEED_HEARTBEAT_SECONDS", 15)
+
+_DROPPED = object()
+
+
+@dataclass
+class FeedEvent:
+    id: int
+    gym_id: int
+    type: str
+    data: Dict[str, Any]
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_sse(self) -> str:
+        payload = json.dumps({"type": self.type, "created_at": self.created_at.isoformat(), "data": self.data}, default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class Subscriber:
+    """
+    One connected client: a bounded asyncio queue fed from any thread.
+    """
+
+    def __init__(self, gym_id: int, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.gym_id = gym_id
+        self.loop = loop
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    def offer(self, event: FeedEvent) -> None:
+        """
+        Hand an event to the subscriber's event loop; safe to call from worker threads.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed; the stream is gone
+            self.dropped = True
+
+    def _put(self, event: FeedEvent) -> None:
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow: discard its backlog and tell it to reconnect
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_DROPPED)
+
+
+class FeedBus:
+    """
+    Per-gym event history and subscriber registry.
+
+    Args:
+        history (int): Events kept per gym for resuming.
+        queue_size (int): Events buffered per subscriber before it is dropped.
+    """
+
+    def __init__(self, history: int = FEED_HISTORY, queue_size: int = FEED_QUEUE_SIZE):
+        self.history_size = history
+        self.queue_size = queue_size
+        self._history: Dict[int, Deque[FeedEvent]] = {}
+        self._last_id: Dict[int, int] = {}
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def publish(self, gym_id: int, type: str, data: Dict[str, Any]) -> FeedEvent:
+        """
+        Record an event for a gym and fan it out to its subscribers.
+        """
+        with self._lock:
+            event_id = self._last_id.get(gym_id, 0) + 1
+            self._last_id[gym_id] = event_id
+            event = FeedEvent(id=event_id, gym_id=gym_id, type=type, data=data)
+            self._history.setdefault(gym_id, deque(maxlen=self.history_size)).append(event)
+            subscribers = self._subscribers.get(gym_id, set())
+            # Dropped subscribers whose stream never got to unsubscribe
+            stale = {subscriber for subscriber in subscribers if subscriber.dropped}
+            subscribers -= stale
+            self.dropped += len(stale)
+            subscribers = list(subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(event)
+        return event
+
+    def subscribe(self, gym_id: int, last_event_id: Optional[int] = None) -> Tuple[Subscriber, List[FeedEvent], bool]:
+        """
+        Register a subscriber on the running event loop.
+
+        Returns:
+            tuple: (subscriber, events after ``last_event_id`` to replay, whether
+            events were lost because the history no longer reaches back that far).
+        """
+        subscriber = Subscriber(gym_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(gym_id, set()).add(subscriber)
+            history = list(self._history.get(gym_id, ()))
+        if last_event_id is None:
+            return subscriber, [], False
+        backlog = [event for event in history if event.id > last_event_id]
+        latest = history[-1].id if history else 0
+        oldest = history[0].id if history else 1
+        # Ids from before a restart are ahead of the new counter, and just as unrecoverable
+        gap = last_event_id < oldest - 1 or last_event_id > latest
+        return subscriber, backlog, gap
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.gym_id, set())
+            if subscriber in subscribers:
+                subscribers.discard(subscriber)
+                if subscriber.dropped:
+                    self.dropped += 1
+
+    def history(self, gym_id: int) -> List[FeedEvent]:
+        with self._lock:
+            return list(self._history.get(gym_id, ()))
+
+    def subscriber_count(self, gym_id: Optional[int] = None) -> int:
+        with self._lock:
+            if gym_id is not None:
+                return len(self._subscribers.get(gym_id, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._history.clear()
+            self._last_id.clear()
+            self._subscribers.clear()
+            self.dropped = 0
+
+
+bus = FeedBus()
+
+
+def publish(gym_id: int, type: str, data: Dict[str, Any]) -> FeedEvent:
+    """
+    Publish a committed change to a gym's feed.
+    """
+    return bus.publish(gym_id, type, data)
+
+
+async def sse_stream(subscriber: Subscriber, backlog: List[FeedEvent], gap: bool, is_disconnected,
+                     heartbeat: float = FEED_HEARTBEAT_SECONDS, feed: FeedBus = bus) -> AsyncIterator[str]:
+    """
+    Render a subscription as Server-Sent Events until the client leaves or is dropped.
+
+    Args:
+        subscriber (Subscriber): Subscription from :meth:`FeedBus.subscribe`.
+        backlog (list): Events to replay first.
+        gap (bool): Emit a ``reset`` event first because some events were lost.
+        is_disconnected: Async callable reporting whether the client went away.
+        heartbeat (float): Seconds between keep-alive comments on an idle stream.
+    """
+    last_id = backlog[-1].id if backlog else None
+    try:
+        yield "retry: 3000\n\n"
+        if gap:
+            yield "event: reset\ndata: {}\n\n"
+        for event in backlog:
+            yield event.to_sse()
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is _DROPPED:
+                yield f"event: dropped\ndata: {json.dumps({'last_event_id': last_id})}\n\n"
+                return
+            # Skip anything already sent from the backlog
+            if last_id is not None and event.id <= last_id:
+                continue
+            last_id = event.id
+            yield event.to_sse()
+    finally:
+        feed.unsubscribe(subscriber)
@@ -0,0 +1,182 @@
+"""
+Parsing, comparison and conversion of free-text climbing grades.
+
+Four scales are recognised: V-scale and Fontainebleau for boulders, YDS and
+French for routes. Every grade maps to a numeric difficulty, which is stored
+next to the text (``Climb.difficulty``, ``Ascent.difficulty``) so sorting,
+range filters and averages run in SQL:
+
+* boulders: ``100 + V`` (VB = 99), with Font placed by the usual V conversion;
+* routes: the YDS number plus a quarter per letter (5.10a = 10, 5.10d = 10.75),
+  with French placed by the usual YDS conversion.
+
+Boulders rank above all routes since the two are not compared in a single
+profile. Font and French share digits: an upper-case letter ("6A+") or a
+"Font"/"F" prefix means Font, a lower-case letter ("6a+") means French.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Optional
+
+SCALES = ("v", "yds", "font", "french")
+BOULDER_BASE = 100.0
+
+_V_SCALE = re.compile(r"^V(B|\d{1,2})(?:[-/]V?(\d{1,2})|([+-]))?$")
+_YDS = re.compile(r"^5\.(\d{1,2})(?:([ABCD])(?:/([ABCD]))?|([+-]))?$")
+_FONT_PREFIX = re.compile(r"^(?:FONT|FB|F)(?=\d)", re.IGNORECASE)
+_FONT_OR_FRENCH = re.compile(r"^(\d)([ABCabc])?(\+)?$")
+
+# Font grade -> V equivalent (half steps where a Font grade sits between two V grades)
+FONT_TO_V = {
+    "3": -1, "4": 0, "4+": 0.5, "5": 1, "5+": 2, "6A": 3, "6A+": 3.5, "6B": 4, "6B+": 4.5, "6C": 5, "6C+": 5.5,
+    "7A": 6, "7A+": 7, "7B": 8, "7B+": 8.5, "7C": 9, "7C+": 10, "8A": 11, "8A+": 12, "8B": 13, "8B+": 14,
+    "8C": 15, "8C+": 16, "9A": 17,
+}
+# French grade -> YDS equivalent on the route scale (5.10a = 10)
+FRENCH_TO_YDS = {
+    "4a": 5, "4b": 6, "4c": 7, "5a": 8, "5b": 9, "5c": 9.5, "6a": 10, "6a+": 10.25, "6b": 10.5, "6b+": 10.75,
+    "6c": 11, "6c+": 11.25, "7a": 11.75, "7a+": 12, "7b": 12.25, "7b+": 12.5, "7c": 12.75, "7c+": 13,
+    "8a": 13.25, "8a+": 13.5, "8b": 13.75, "8b+": 14, "8c": 14.25, "8c+": 14.5, "9a": 14.75, "9a+": 15,
+    "9b": 15.25, "9b+": 15.5, "9c": 15.75,
+}
+
+
+@dataclass(frozen=True)
+class Grade:
+    """
+    A recognised grade.
+
+    Attributes:
+        scale (str): One of ``SCALES``.
+        text (str): Canonical spelling, e.g. "V3", "5.11a", "6A+" or "7a".
+        difficulty (float): Position on the boulder or route difficulty scale.
+    """
+    scale: str
+    text: str
+    difficulty: float
+
+    @property
+    def boulder(self) -> bool:
+        return self.scale in ("v", "font")
+
+
+@lru_cache(maxsize=4096)
+def parse_grade(grade: Optional[str]) -> Optional[Grade]:
+    """
+    Parse a V-scale, YDS, Font or French grade, or return None if unrecognised.
+
+    Spacing and case are forgiven except where case tells Font from French.
+    V and YDS grades also accept ``+``/``-`` and split grades ("V3-4", "5.10a/b").
+    """
+    if not grade:
+        return None
+    text = re.sub(r"\s+", "", grade)
+    upper = text.upper()
+
+    match = _V_SCALE.match(upper)
+    if match:
+        low = -1 if match.group(1) == "B" else int(match.group(1))
+        name = "VB" if low == -1 else f"V{low}"
+        value = float(low)
+        if match.group(2) is not None and int(match.group(2)) > low:
+            name, value = f"{name}-{int(match.group(2))}", (low + int(match.group(2))) / 2
+        elif match.group(3):
+            name, value = name + match.group(3), value + (0.25 if match.group(3) == "+" else -0.25)
+        return Grade("v", name, BOULDER_BASE + value)
+
+    match = _YDS.match(upper)
+    if match:
+        number, letter, split, modifier = int(match.group(1)), match.group(2), match.group(3), match.group(4)
+        name, value = f"5.{number}", float(number)
+        if letter:
+            value += "ABCD".index(letter) * 0.25
+            name += letter.lower()
+            if split and split > letter:
+                value = (value + number + "ABCD".index(split) * 0.25) / 2
+                name += "/" + split.lower()
+        elif modifier:
+            # 5.10- is about 5.10a/b and 5.10+ about 5.10c/d; below 5.10 a quarter grade
+            value += (0.625 if modifier == "+" else 0.125) if number >= 10 else (0.25 if modifier == "+" else -0.25)
+            name += modifier
+        return Grade("yds", name, value)
+
+    font = _FONT_PREFIX.match(text)
+    rest = text[font.end():] if font else text
+    match = _FONT_OR_FRENCH.match(rest)
+    if match:
+        digit, letter, plus = match.group(1), match.group(2), match.group(3) or ""
+        if font or (letter and letter.isupper()):
+            name = digit + (letter or "").upper() + plus
+            if name in FONT_TO_V:
+                return Grade("font", name, BOULDER_BASE + FONT_TO_V[name])
+        elif letter:
+            name = digit + letter + plus
+            if name in FRENCH_TO_YDS:
+                return Grade("french", name, FRENCH_TO_YDS[name])
+    return None
+
+
+def normalize_grade(grade: Optional[str]) -> Optional[str]:
+    """
+    Canonical spelling of a recognised grade ("v 3" -> "V3", "5.11A" -> "5.11a", "f6a+" -> "6A+"), or None.
+    """
+    parsed = parse_grade(grade)
+    return parsed.text if parsed else None
+
+
+def grade_rank(grade: Optional[str]) -> Optional[float]:
+    """
+    Map a grade on any supported scale to a sortable number, or None if unrecognised.
+
+    V-grades rank above all YDS grades since boulders and routes are not
+    compared against each other in a single profile.
+    """
+    parsed = parse_grade(grade)
+    return parsed.difficulty if parsed else None
+
+
+def convert_grade(grade: Optional[str], scale: str) -> Optional[str]:
+    """
+    Nearest grade on another scale of the same discipline ("6A+" -> "V4", "5.11a" -> "6c"),
+    or None if the grade is unrecognised or the scales are for different disciplines.
+    """
+    parsed = parse_grade(grade)
+    if parsed is None or scale not in SCALES or parsed.boulder != (scale in ("v", "font")):
+        return None
+    if scale == parsed.scale:
+        return parsed.text
+    return _nearest(parsed.difficulty, scale)
+
+
+def grade_for_difficulty(difficulty: Optional[float]) -> Optional[str]:
+    """
+    Nearest V grade (boulders) or YDS grade (routes) for a stored difficulty, or None for 0/None.
+    """
+    if not difficulty:
+        return None
+    return _nearest(difficulty, "v" if difficulty >= BOULDER_BASE - 1 else "yds")
+
+
+def _nearest(value: float, scale: str) -> str:
+    if scale == "v":
+        v = min(max(round(value - BOULDER_BASE), -1), 17)
+        return "VB" if v == -1 else f"V{v}"
+    if scale == "yds":
+        quarters = round(value * 4)
+        number = quarters // 4
+        if number < 10:
+            return f"5.{round(value)}"
+        return f"5.{number}{'abcd'[quarters % 4]}"
+    table = {name: BOULDER_BASE + v for name, v in FONT_TO_V.items()} if scale == "font" else FRENCH_TO_YDS
+    # Ties go to the easier grade, as the tables are ordered easiest first
+    return min(table, key=lambda name: abs(table[name] - value))
+
+
+def hardest_grade(grades: Iterable[Optional[str]]) -> Optional[str]:
+    """
+    Return the hardest recognised grade from an iterable, or None.
+    """
+    ranked = [(grade_rank(g), g) for g in grades]
+    ranked = [(rank, g) for rank, g in ranked if rank is not None]
+    return max(ranked)[1] if ranked else None
@@ -0,0 +1,116 @@
+"""
+Dedicated, size-bounded executor for bcrypt hashing.
+
+bcrypt is deliberately slow and CPU-bound. Running it inline in request handlers
+ties up the shared Starlette threadpool during login storms, so every other
+endpoint queues behind it. :class:`PasswordHasher` runs hashing on its own small
+thread or process pool and admits at most ``workers + max_pending`` operations at a
+time; beyond that, callers get an immediate 503 instead of joining an unbounded queue.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.settings import env_int, env_str
+
+BCRYPT_ROUNDS = env_int("BCRYPT_ROUNDS", 12)
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    """
+    CryptContext for a bcrypt cost factor. Hashes with a different cost report needs_update.
+    """
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return crypt_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a dedicated executor with backpressure.
+
+    Args:
+        rounds (int): bcrypt cost factor for new hashes.
+        workers (int): Concurrent hashing operations.
+        max_pending (int): Operations allowed to queue behind the workers.
+        use_processes (bool): Use a process pool instead of threads.
+    """
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = 2, max_pending: int = 8, use_processes: bool = False):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hasher")
+            return self._executor
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Released when the job ends, not when the caller stops waiting: a cancelled
+        # request must not free a slot while its hash is still running
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured cost factor.
+        """
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password; also return a new hash if the stored one uses an outdated cost.
+
+        Returns:
+            tuple: (valid, replacement hash or None).
+        """
+        return await self._run(_verify_and_update, password, hashed, self.rounds)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+hasher = PasswordHasher(
+    workers=env_int("HASH_WORKERS", min(4, os.cpu_count() or 1)),
+    max_pending=env_int("HASH_MAX_PENDING", 16),
+    use_processes=env_str("HASH_EXECUTOR", "thread") == "process",
+)
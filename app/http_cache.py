@@ -0,0 +1,294 @@
+"""
+Conditional-GET response cache for read-mostly endpoints.
+
+Cached GET handlers serialize their result once per *version* of the data they
+read. Versions are counters per scope (``gyms`` for the gym list, ``gym:<id>``
+for a gym and everything under it) that write handlers bump after committing
+with :meth:`ResponseCache.bump`. The cache key embeds the current version, so a
+write never has to find and delete stale entries: they simply stop being asked for.
+
+Every cached response carries a strong ``ETag`` (a hash of the body) and a
+``Cache-Control`` header; a matching ``If-None-Match`` gets an empty 304.
+
+Backends, selected with ``RESPONSE_CACHE_BACKEND``:
+
+- ``local`` (default): in-process LRU; versions are only seen by this worker, so
+  it refuses to start under more than one worker (see :func:`backend_from_env`).
+- ``redis``: shared between workers via ``RESPONSE_CACHE_URL`` (needs the ``redis`` package).
+- ``off``: always recompute (ETags and 304s still work).
+
+:class:`FakeRedis` implements the small client surface :class:`RedisBackend`
+uses, so the shared backend can be exercised without a server.
+"""
+import hashlib
+import itertools
+import json
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.cache import TTLCache
+from app.pagination import NEXT_CURSOR_HEADER
+from app.settings import env_int, env_str, worker_count
+
+# Response headers that are part of the cached representation
+CACHED_HEADERS = (NEXT_CURSOR_HEADER,)
+
+_lock = threading.Lock()
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class LocalBackend:
+    """
+    In-process LRU of responses plus a dict of version counters.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 300.0):
+        self.entries = TTLCache("responses", maxsize, ttl)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        self.entries.set(key, value)
+
+    def version(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    def bump(self, scope: str) -> int:
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            return self._versions[scope]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        with self._lock:
+            self._versions.clear()
+
+
+class RedisBackend:
+    """
+    Shared backend on a Redis-compatible client (``get``, ``set(..., ex=)``, ``incr``).
+
+    Args:
+        client: Redis client, or :class:`FakeRedis` in tests.
+        ttl (int): Seconds a response entry lives.
+        prefix (str): Key prefix so several apps can share one server.
+    """
+
+    def __init__(self, client, ttl: int = 300, prefix: str = "cgl:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int = 300) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from e
+        return cls(redis.Redis.from_url(url), ttl)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raw = self.client.get(f"{self.prefix}r:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CachedResponse(body=data["body"].encode(), etag=data["etag"], headers=data["headers"])
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        data = asdict(value)
+        data["body"] = value.body.decode()
+        self.client.set(f"{self.prefix}r:{key}", json.dumps(data), ex=self.ttl)
+
+    def version(self, scope: str) -> int:
+        raw = self.client.get(f"{self.prefix}v:{scope}")
+        return int(raw) if raw is not None else 0
+
+    def bump(self, scope: str) -> int:
+        return int(self.client.incr(f"{self.prefix}v:{scope}"))
+
+
+class FakeRedis:
+    """
+    Thread-safe in-memory stand-in for the parts of a Redis client RedisBackend uses.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value, ex: Optional[float] = None) -> bool:
+        raw = value if isinstance(value, bytes) else str(value).encode()
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex if ex else None, raw)
+        return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            expires_at, raw = self._data.get(key, (None, b"0"))
+            value = int(raw) + 1
+            self._data[key] = (expires_at, str(value).encode())
+            return value
+
+
+class NullBackend:
+    """
+    Backend that stores nothing; every request is recomputed.
+    """
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        pass
+
+    def version(self, scope: str) -> int:
+        return 0
+
+    def bump(self, scope: str) -> int:
+        return 0
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+_memory_namespaces: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+_memory_counter = itertools.count(1)
+
+
+def database_namespace(engine: Engine) -> str:
+    """
+    Identify the database a session reads from, so caches for different databases never mix.
+
+    In-memory SQLite databases are private to their engine, so each engine gets its own token.
+    """
+    url = engine.url
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        with _lock:
+            if engine not in _memory_namespaces:
+                _memory_namespaces[engine] = f"mem{next(_memory_counter)}"
+            return _memory_namespaces[engine]
+    return url.render_as_string(hide_password=True)
+
+
+class ResponseCache:
+    """
+    Versioned response cache with ETag/304 handling.
+
+    Args:
+        backend: LocalBackend, RedisBackend or NullBackend.
+        max_age (int): ``Cache-Control`` max-age in seconds; 0 makes clients revalidate every time.
+    """
+
+    def __init__(self, backend, max_age: int = 0):
+        self.backend = backend
+        self.max_age = max_age
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}, must-revalidate"
+
+    def _scope(self, session: Session, scope: str) -> str:
+        return f"{database_namespace(session.get_bind())}|{scope}"
+
+    def bump(self, session: Session, *scopes: str) -> None:
+        """
+        Invalidate every cached response under ``scopes``. Call after the write commits.
+        """
+        for scope in scopes:
+            self.backend.bump(self._scope(session, scope))
+
+    def respond(self, request: Request, response: Response, session: Session, scope: str,
+                response_type, load: Callable[[], Any]) -> Response:
+        """
+        Serve a GET from cache, or run ``load`` and cache its serialized result.
+
+        Args:
+            request (Request): Incoming request; path, query string and If-None-Match are used.
+            response (Response): Handler response that ``load`` may add headers to (e.g. X-Next-Cursor).
+            session (Session): DB session, identifying the database.
+            scope (str): Version scope the result depends on, e.g. ``gym:3``.
+            response_type: Type the result is serialized as, e.g. ``List[GymRead]``.
+            load (callable): Produces the result on a miss.
+        Returns:
+            Response: 200 with the JSON body, or an empty 304.
+        """
+        scope_key = self._scope(session, scope)
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        key = f"{scope_key}@{self.backend.version(scope_key)}|{request.url.path}?{query}"
+        entry = self.backend.get(key)
+        if entry is None:
+            adapter = _adapter(response_type)
+            body = adapter.dump_json(adapter.validate_python(load(), from_attributes=True))
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+            entry = CachedResponse(body=body, etag=etag, headers=headers)
+            self.backend.set(key, entry)
+
+        headers = {"ETag": entry.etag, "Cache-Control": self.cache_control, **entry.headers}
+        if _matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def backend_from_env():
+    """
+    Build the backend named by ``RESPONSE_CACHE_BACKEND``.
+
+    Raises:
+        RuntimeError: For ``local`` under more than one worker, where a write in one
+            worker would leave the others serving stale bodies and ETags.
+    """
+    kind = env_str("RESPONSE_CACHE_BACKEND", "local")
+    ttl = env_int("RESPONSE_CACHE_TTL_SECONDS", 300)
+    if kind == "off":
+        return NullBackend()
+    if kind == "redis":
+        return RedisBackend.from_url(env_str("RESPONSE_CACHE_URL", "redis://localhost:6379/0"), ttl)
+    workers = worker_count()
+    if workers > 1:
+        raise RuntimeError(
+            f"RESPONSE_CACHE_BACKEND=local only invalidates within one process, but {workers} workers are "
+            "configured; set RESPONSE_CACHE_BACKEND=redis (or off)"
+        )
+    return LocalBackend(env_int("RESPONSE_CACHE_SIZE", 2048), ttl)
+
+
+response_cache = ResponseCache(backend_from_env(), max_age=env_int("RESPONSE_CACHE_MAX_AGE", 0))
@@ -0,0 +1,526 @@
+"""
+Write-behind ascent ingestion (``POST /ascents/ingest``).
+
+With ``ASCENT_INGEST_ENABLED`` set, an ascent is acknowledged (202) once it is
+appended to a local journal and fsynced, not after a database commit of its
+own. A background writer drains the queue every ``ASCENT_INGEST_FLUSH_MS`` or
+as soon as ``ASCENT_INGEST_BATCH_ROWS`` ascents are waiting. Each batch, with
+its climb stats, leaderboard and rollup updates, is written in one transaction,
+so the database commits once per batch instead of once per climber.
+
+* Journal: one JSON line per accepted ascent. Requests that arrive together
+  share an fsync (group commit); each waits only until some fsync covers its line.
+* Idempotency: the client's ``Idempotency-Key`` is stored on the ascent, unique
+  per user. A retried request is answered from the queue or the table, and the
+  writer drops keys that are already stored, so an ascent is never saved twice.
+* Recovery: the journal is replayed on start, so ascents acknowledged before a
+  crash are written then; lines whose key is already stored are skipped. The
+  journal is truncated whenever the queue drains, and rewritten to the pending
+  tail when it grows past ``ASCENT_INGEST_JOURNAL_MAX_BYTES``.
+
+Ingested ascents show up in reads once their batch commits, normally within one
+flush interval. Each worker process journals to its own file, named after
+``ASCENT_INGEST_JOURNAL`` with the process id added (``ascent_journal.<pid>.ndjson``),
+and holds a lock on it. On start a worker also takes over the journals of
+workers that are gone (any whose lock it can get), so their acknowledged
+ascents are written too.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Deque, List, Optional, Set, Tuple
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlmodel import Session, select
+
+from app import climb_stats, feed, leaderboard, rollups
+from app.grades import grade_rank
+from app.http_cache import response_cache
+from app.models.ascents import Ascent
+from app.models.core import Climb
+from app.schemas.ascents import AscentCreate, AscentRead
+from app.settings import env_bool, env_int, env_str
+
+try:
+    import fcntl
+except ImportError:  # Windows: the journal is not locked
+    fcntl = None
+
+ENABLED = env_bool("ASCENT_INGEST_ENABLED", False)
+JOURNAL_PATH = env_str("ASCENT_INGEST_JOURNAL", "ascent_journal.ndjson")
+FLUSH_MS = env_int("ASCENT_INGEST_FLUSH_MS", 50)
+BATCH_ROWS = env_int("ASCENT_INGEST_BATCH_ROWS", 500)
+JOURNAL_MAX_BYTES = env_int("ASCENT_INGEST_JOURNAL_MAX_BYTES", 64 * 1024 * 1024)
+# How long shutdown waits for the writer to drain the queue
+STOP_TIMEOUT_SECONDS = 30
+
+logger = logging.getLogger("app.ingest")
+
+Record = dict
+# Errors that come from one record rather than the database being unavailable: a
+# refused row, or a journal line (adopted, or edited by hand) that can't be read
+RECORD_ERRORS = (IntegrityError, DataError, KeyError, TypeError, ValueError)
+
+
+class Journal:
+    """
+    Append-only file of accepted ascents, one JSON object per line.
+
+    Appends only write to the file buffer; :meth:`sync` makes them durable. One
+    fsync covers every line appended before it, so concurrent callers share it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0
+        self.fsyncs = 0
+        self._file = None
+        self._written = 0  # sequence number of the last appended line
+        self._synced = 0  # sequence number of the last line known to be on disk
+        self._lock = threading.Lock()  # appends, truncation and rewrites
+        self._sync_lock = threading.Lock()  # one fsync at a time
+
+    def open(self) -> List[Record]:
+        """
+        Open the journal for appending and return the records it already holds.
+
+        A torn last line, left by a crash in the middle of a write, is cut off:
+        its request was never acknowledged.
+        """
+        # Lock first so a second process fails before replaying ascents it does not own
+        self._file = self._open_locked(self.path)
+        records = []
+        end = 0
+        with open(self.path, "rb") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.endswith(b"\n"):
+                    break
+                end += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning("skipping unreadable journal line %d of %s", number, self.path)
+        # New lines must not be appended to the torn one
+        self._file.truncate(end)
+        self.size = end
+        return records
+
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, record: Record) -> int:
+        """
+        Buffer one record; returns its sequence number for :meth:`sync`.
+        """
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            self._file.write(line)
+            self.size += len(line)
+            self._written += 1
+            return self._written
+
+    def sync(self, seq: int) -> None:
+        """
+        Return once line ``seq`` is on disk, fsyncing if no other caller already did.
+        """
+        if self._synced >= seq:
+            return
+        with self._sync_lock:
+            # Another caller's fsync may have covered this line while we waited
+            if self._synced >= seq:
+                return
+            with self._lock:
+                self._file.flush()
+                target = self._written
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+            self._synced = target
+
+    def truncate(self) -> None:
+        """
+        Empty the journal once everything in it is committed to the database.
+        """
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            self._file.truncate(0)
+            self._file.seek(0)
+            self.size = 0
+            self._synced = self._written
+
+    def rewrite(self, records: List[Record]) -> None:
+        """
+        Replace the journal with ``records``, the ones not committed yet.
+
+        The new file is written and fsynced beside the old one and renamed over
+        it, so a crash leaves one complete journal or the other.
+        """
+        temporary = self.path + ".tmp"
+        with self._sync_lock, self._lock:
+            replacement = self._open_locked(temporary, mode="wb")
+            for record in records:
+                replacement.write((json.dumps(record, separators=(",", ":")) + "\n").encode())
+            replacement.flush()
+            os.fsync(replacement.fileno())
+            os.replace(temporary, self.path)
+            self._file.close()
+            self._file = replacement
+            self.size = replacement.tell()
+            self._synced = self._written
+
+    @staticmethod
+    def _open_locked(path: str, mode: str = "ab"):
+        f = open(path, mode)
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                raise RuntimeError(f"ascent journal {path} is in use by another process") from None
+        return f
+
+
+def worker_journal_path(base: str, pid: Optional[int] = None) -> str:
+    """
+    This process's journal: ``base`` with the process id before the extension.
+    """
+    root, ext = os.path.splitext(base)
+    return f"{root}.{pid or os.getpid()}{ext}"
+
+
+def worker_journal_pattern(base: str) -> str:
+    """
+    Glob matching every worker's journal for ``base``.
+    """
+    root, ext = os.path.splitext(base)
+    return f"{glob.escape(root)}.*{ext}"
+
+
+def journal_record(user_id: int, ascent: AscentCreate, key: str) -> Record:
+    return {
+        "key": key,
+        "user_id": user_id,
+        "climb_id": ascent.climb_id,
+        "date": (ascent.date or datetime.utcnow()).isoformat(),
+        "grade": ascent.grade,
+        "notes": ascent.notes,
+        "sent": ascent.sent,
+        "quality_rating": ascent.quality_rating,
+    }
+
+
+def ascent_row(record: Record) -> dict:
+    return {
+        "user_id": record["user_id"],
+        "climb_id": record["climb_id"],
+        "date": datetime.fromisoformat(record["date"]),
+        "grade": record["grade"],
+        "difficulty": grade_rank(record["grade"]),
+        "notes": record["notes"],
+        "sent": record["sent"],
+        "quality_rating": record["quality_rating"],
+        "idempotency_key": record["key"],
+    }
+
+
+def valid_record(record: Record) -> bool:
+    """
+    Whether a journal line read back from disk can be written as an ascent.
+    """
+    try:
+        row = ascent_row(record)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return (isinstance(row["user_id"], int) and isinstance(row["climb_id"], int)
+            and isinstance(row["idempotency_key"], str))
+
+
+class AscentIngestor:
+    """
+    Journal-backed ascent queue with a background writer that commits in batches.
+
+    Args:
+        engine (Engine): Database the writer commits to.
+        journal_path (str): Journal file; replayed by :meth:`start`.
+        flush_ms (int): Longest wait between the first queued ascent and its batch's commit.
+        batch_rows (int): Ascents that trigger a commit without waiting; also the largest batch.
+        journal_max_bytes (int): Journal size above which it is rewritten to the pending ascents.
+        adopt (str | None): Glob of other processes' journals to take over on start when unlocked.
+    """
+
+    def __init__(self, engine: Engine, journal_path: str, flush_ms: int = FLUSH_MS, batch_rows: int = BATCH_ROWS,
+                 journal_max_bytes: int = JOURNAL_MAX_BYTES, adopt: Optional[str] = None):
+        self.engine = engine
+        self.journal = Journal(journal_path)
+        self.adopt = adopt
+        self.flush_seconds = flush_ms / 1000
+        self.batch_rows = batch_rows
+        self.journal_max_bytes = journal_max_bytes
+        self.accepted = 0
+        self.committed = 0
+        self.batches = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.replayed = 0
+        self._pending: Deque[Record] = deque()  # accepted, not yet committed; oldest first
+        self._keys: Set[Tuple[int, str]] = set()  # (user_id, key) of the pending records
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> int:
+        """
+        Replay the journal, take over orphaned ones and start the writer.
+
+        Returns:
+            int: Number of journaled ascents queued again.
+        """
+        records = self.journal.open()
+        with self._lock:
+            self._queue_journaled(records, self.journal.path)
+        # Without file locks a running worker's journal cannot be told from an orphan
+        if self.adopt and fcntl is not None:
+            self._adopt_orphans()
+        self.replayed = len(self._pending)
+        if self.replayed:
+            logger.info("replaying %d journaled ascents into %s", self.replayed, self.journal.path)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ascent-ingest", daemon=True)
+        self._thread.start()
+        return self.replayed
+
+    def _adopt_orphans(self) -> None:
+        """
+        Move the records of journals no live process holds into this one.
+
+        They are appended and fsynced here before the orphan is removed, so a
+        crash in between leaves them in both (the writer skips stored keys).
+        """
+        own = os.path.abspath(self.journal.path)
+        for path in sorted(glob.glob(self.adopt)):
+            if os.path.abspath(path) == own:
+                continue
+            orphan = Journal(path)
+            try:
+                records = orphan.open()
+            except (RuntimeError, FileNotFoundError):
+                continue  # a running worker's journal, or adopted by another worker meanwhile
+            seq = 0
+            with self._lock:
+                for record in self._queue_journaled(records, path):
+                    seq = self.journal.append(record)
+            if seq:
+                self.journal.sync(seq)
+                logger.info("took over %d journaled ascents from %s", len(records), path)
+            os.unlink(path)
+            orphan.close()
+
+    def _queue_journaled(self, records: List[Record], path: str) -> List[Record]:
+        """
+        Queue records read back from a journal, skipping unreadable and already queued ones.
+        Called with the lock held.
+
+        Returns:
+            List[Record]: The records queued.
+        """
+        queued = []
+        for record in records:
+            if not valid_record(record):
+                self.rejected += 1
+                logger.warning("dropping unreadable line of %s: %.200r", path, record)
+            elif (record["user_id"], record["key"]) not in self._keys:
+                self._keys.add((record["user_id"], record["key"]))
+                self._pending.append(record)
+                queued.append(record)
+        return queued
+
+    def stop(self) -> None:
+        """
+        Write what is queued and stop the writer. Whatever cannot be written in
+        time stays in the journal for the next start; a drained journal is removed.
+        """
+        with self._lock:
+            self._stopping = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join(STOP_TIMEOUT_SECONDS)
+            if self._thread.is_alive():
+                # The writer still uses the journal; its records are replayed on the next start
+                logger.warning("ascent writer still busy after %ds; leaving %s open",
+                               STOP_TIMEOUT_SECONDS, self.journal.path)
+                return
+            self._thread = None
+        if self.journal.is_open():
+            if not self._pending:
+                os.unlink(self.journal.path)
+            self.journal.close()
+
+    def submit(self, user_id: int, ascent: AscentCreate, key: str) -> bool:
+        """
+        Durably queue an ascent; returns once its journal line is on disk.
+
+        Returns:
+            bool: False if the same key is already queued for this user (a retry).
+        """
+        with self._lock:
+            if (user_id, key) in self._keys:
+                self.duplicates += 1
+                return False
+            record = journal_record(user_id, ascent, key)
+            seq = self.journal.append(record)
+            self._keys.add((user_id, key))
+            self._pending.append(record)
+            self.accepted += 1
+            # The first ascent starts the flush timer; a full batch cuts it short
+            if len(self._pending) in (1, self.batch_rows):
+                self._wake.notify()
+        self.journal.sync(seq)
+        return True
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _next_batch(self) -> List[Record]:
+        """
+        Wait for the oldest queued ascent to be ``flush_ms`` old or for a full batch.
+        """
+        with self._lock:
+            while not self._pending and not self._stopping:
+                self._wake.wait()
+            deadline = time.monotonic() + self.flush_seconds
+            while len(self._pending) < self.batch_rows and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wake.wait(remaining)
+            return [self._pending[i] for i in range(min(len(self._pending), self.batch_rows))]
+
+    def alive(self) -> bool:
+        """
+        Whether the writer is running, i.e. queued ascents will reach the database.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                self._flush(batch)
+            except Exception:
+                # The writer must outlive any failure (database down, disk full); the
+                # batch is still queued and journaled, and stored keys are skipped on retry
+                logger.exception("writing %d queued ascents failed; retrying", len(batch))
+                if self._stopping:
+                    return
+                time.sleep(self.flush_seconds)
+
+    def _flush(self, batch: List[Record]) -> None:
+        try:
+            self._write(batch)
+        except RECORD_ERRORS:
+            # A record that can't be written must not hold up the rest of the queue
+            self._write_one_by_one(batch)
+        self._done(len(batch))
+
+    def _write_one_by_one(self, batch: List[Record]) -> None:
+        for record in batch:
+            try:
+                self._write([record])
+            except RECORD_ERRORS:
+                self.rejected += 1
+                logger.exception("dropping queued ascent %s of user %d", record["key"], record["user_id"])
+
+    def _done(self, count: int) -> None:
+        """
+        Drop a committed batch from the queue and shrink the journal.
+        """
+        with self._lock:
+            for _ in range(count):
+                record = self._pending.popleft()
+                self._keys.discard((record["user_id"], record["key"]))
+            # Holding the lock keeps new records out of the journal while it is cut
+            if not self._pending:
+                self.journal.truncate()
+            elif self.journal.size > self.journal_max_bytes:
+                self.journal.rewrite(list(self._pending))
+
+    def _write(self, batch: List[Record]) -> None:
+        """
+        Insert a batch of ascents and their derived updates in one transaction.
+
+        Keys already stored (a replay, or a retry that raced the writer) and
+        ascents of climbs deleted since they were queued are skipped.
+        """
+        with Session(self.engine) as session:
+            stored = set(session.execute(
+                select(Ascent.user_id, Ascent.idempotency_key).where(
+                    Ascent.user_id.in_({r["user_id"] for r in batch}),
+                    Ascent.idempotency_key.in_({r["key"] for r in batch}),
+                )
+            ).all())
+            climbs = {
+                row.id: (row.gym_id, row.difficulty)
+                for row in session.execute(
+                    select(Climb.id, Climb.gym_id, Climb.difficulty).where(Climb.id.in_({r["climb_id"] for r in batch}))
+                )
+            }
+            rows = []
+            for record in batch:
+                if (record["user_id"], record["key"]) in stored:
+                    self.duplicates += 1
+                elif record["climb_id"] not in climbs:
+                    self.rejected += 1
+                    logger.info("dropping queued ascent %s: climb %d no longer exists", record["key"], record["climb_id"])
+                else:
+                    stored.add((record["user_id"], record["key"]))
+                    rows.append(ascent_row(record))
+            if not rows:
+                return
+            table = Ascent.__table__
+            result = session.execute(insert(table).returning(*table.c), rows)
+            created = [AscentRead.model_validate(dict(row._mapping)) for row in result]
+            climb_stats.record_ascent_rows(session, rows)
+            scores = leaderboard.record_ascent_rows(session, rows, climbs=climbs)
+            rollups.record_ascent_rows(session, rows, climbs=climbs)
+            session.commit()
+            self.committed += len(rows)
+            self.batches += 1
+            # The batch is committed: a failing cache or feed must not get it retried
+            try:
+                leaderboard.scores_changed(session, scores)
+                gyms = {climb_id: gym_id for climb_id, (gym_id, _) in climbs.items()}
+                response_cache.bump(session, *(f"gym:{gym_id}" for gym_id in set(gyms.values())))
+                for ascent in sorted(created, key=lambda ascent: ascent.id):
+                    feed.publish(gyms[ascent.climb_id], "ascent.created", ascent.model_dump(mode="json"))
+            except Exception:
+                logger.exception("announcing %d ingested ascents failed", len(created))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Replay the journal and run the writer for as long as the application is up.
+    """
+    ingestor: AscentIngestor = app.state.ingestor
+    await run_in_threadpool(ingestor.start)
+    try:
+        yield
+    finally:
+        await run_in_threadpool(ingestor.stop)
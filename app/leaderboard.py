@@ -0,0 +1,470 @@
+"""
+Per-gym leaderboards: most sends, hardest send and most active climbers.
+
+Totals live in the ``LeaderboardScore`` table, one row per gym, window
+(``week``, ``month`` or ``all``), period and climber. Ascent writes call
+:func:`record_ascent_rows` inside their own transaction so the table matches
+the committed ascents, then :func:`scores_changed` after commit to move the
+climbers on any board loaded in this process.
+
+Boards are in-memory :class:`RankedScores`, built from one query per gym and
+window the first time they are read and rebuilt when the period rolls over or
+after ``LEADERBOARD_TTL_SECONDS`` (so other workers' writes are picked up).
+Top-N and rank lookups never touch the database.
+
+Week and month totals are kept for the last ``LEADERBOARD_KEEP_WEEKS`` and
+``LEADERBOARD_KEEP_MONTHS`` periods; older rows are removed by compaction.
+
+    python -m app.leaderboard [--gym-id ID]   # rebuild from the ascent table
+    python -m app.leaderboard --compact       # drop expired week/month rows
+"""
+import argparse
+import heapq
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, insert, or_
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.models.ascents import Ascent
+from app.models.core import Climb
+from app.models.stats import LeaderboardScore
+from app.rollups import add_ascent, add_totals, apply_totals, climb_details, daily_deltas, hardest_in
+from app.settings import env_int
+
+WINDOWS = ("week", "month", "all")
+BOARDS = ("sends", "hardest", "active")
+ALL_TIME = date(1970, 1, 1)
+# Difficulty is a float; boards rank integers
+HARDEST_SCALE = 100
+KEEP_WEEKS = env_int("LEADERBOARD_KEEP_WEEKS", 12)
+KEEP_MONTHS = env_int("LEADERBOARD_KEEP_MONTHS", 12)
+BOARD_TTL_SECONDS = env_int("LEADERBOARD_TTL_SECONDS", 300)
+REBUILD_BATCH_SIZE = 10000
+KEY_NAMES = ("gym_id", "window", "period", "user_id")
+
+
+def period_start(window: str, day: date) -> date:
+    """
+    First day of the window's period containing ``day``.
+    """
+    if window == "week":
+        return day - timedelta(days=day.weekday())
+    if window == "month":
+        return day.replace(day=1)
+    return ALL_TIME
+
+
+def period_end(window: str, start: date) -> Optional[date]:
+    """
+    First day after the period starting at ``start`` (None for all-time).
+    """
+    if window == "week":
+        return start + timedelta(days=7)
+    if window == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return None
+
+
+def retained_since(window: str, today: Optional[date] = None) -> date:
+    """
+    Oldest period of a window that is still maintained.
+    """
+    current = period_start(window, today or datetime.utcnow().date())
+    if window == "week":
+        return current - timedelta(weeks=KEEP_WEEKS - 1)
+    if window == "month":
+        months = current.year * 12 + current.month - 1 - (KEEP_MONTHS - 1)
+        return date(months // 12, months % 12 + 1, 1)
+    return ALL_TIME
+
+
+def board_score(board: str, sends: int, attempts: int, hardest: float) -> int:
+    """
+    Integer score of a climber's totals on a board.
+    """
+    if board == "sends":
+        return sends
+    if board == "active":
+        return sends + attempts
+    return round(hardest * HARDEST_SCALE)
+
+
+def display_score(board: str, score: int) -> float:
+    """
+    Score as shown to clients: a count, or the hardest send's difficulty.
+    """
+    return score / HARDEST_SCALE if board == "hardest" else score
+
+
+class RankedScores:
+    """
+    Climbers ranked by a non-negative integer score.
+
+    A Fenwick tree over score values counts climbers per score, so an update, a
+    climber's rank and the k-th best score each cost O(log S) for scores up to S,
+    independent of the number of ascents. Climbers sharing a score share a rank;
+    a score of 0 is unranked.
+    """
+
+    def __init__(self, size: int = 64):
+        self.scores: Dict[int, int] = {}
+        self._size = size
+        self._tree = [0] * (size + 1)
+        self._buckets: Dict[int, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def _add(self, score: int, change: int) -> None:
+        while score <= self._size:
+            self._tree[score] += change
+            score += score & -score
+
+    def _at_most(self, score: int) -> int:
+        # Number of ranked climbers with a score <= score
+        score = min(score, self._size)
+        total = 0
+        while score > 0:
+            total += self._tree[score]
+            score -= score & -score
+        return total
+
+    def _grow(self, score: int) -> None:
+        size = self._size
+        while size < score:
+            size *= 2
+        tree = [0] * (size + 1)
+        for value, users in self._buckets.items():
+            tree[value] = len(users)
+        # Linear-time Fenwick construction
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._size, self._tree = size, tree
+
+    def _kth_smallest(self, k: int) -> int:
+        position, step = 0, 1 << self._size.bit_length()
+        while step:
+            if position + step <= self._size and self._tree[position + step] < k:
+                position += step
+                k -= self._tree[position]
+            step >>= 1
+        return position + 1
+
+    def set(self, user_id: int, score: int) -> None:
+        old = self.scores.pop(user_id, 0)
+        if old:
+            self._add(old, -1)
+            bucket = self._buckets[old]
+            bucket.discard(user_id)
+            if not bucket:
+                del self._buckets[old]
+        if score > 0:
+            if score > self._size:
+                self._grow(score)
+            self._add(score, 1)
+            self._buckets[score].add(user_id)
+            self.scores[user_id] = score
+
+    def rank(self, user_id: int) -> Optional[Tuple[int, int]]:
+        """
+        (rank, score) of a climber, or None if unranked.
+        """
+        score = self.scores.get(user_id)
+        if not score:
+            return None
+        return len(self.scores) - self._at_most(score) + 1, score
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, int, int]]:
+        """
+        (rank, user_id, score) from the ``offset``-th best climber on; ties are listed by user id.
+        """
+        total = len(self.scores)
+        entries: List[Tuple[int, int, int]] = []
+        position = offset
+        while len(entries) < limit and position < total:
+            score = self._kth_smallest(total - position)
+            rank = total - self._at_most(score) + 1
+            skip = position - (rank - 1)
+            take = heapq.nsmallest(skip + limit - len(entries), self._buckets[score])[skip:]
+            entries.extend((rank, user_id, score) for user_id in take)
+            position += len(take)
+        return entries
+
+
+class GymLeaderboard:
+    """
+    One gym's boards for the current period of a window.
+    """
+
+    def __init__(self, gym_id: int, window: str, period: date):
+        self.gym_id = gym_id
+        self.window = window
+        self.period = period
+        self.boards = {board: RankedScores() for board in BOARDS}
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set(self, user_id: int, sends: int, attempts: int, hardest: float) -> None:
+        with self._lock:
+            for board, scores in self.boards.items():
+                scores.set(user_id, board_score(board, sends, attempts, hardest))
+
+    def top(self, board: str, limit: int, offset: int = 0) -> List[Tuple[int, int, int]]:
+        with self._lock:
+            return self.boards[board].top(limit, offset)
+
+    def rank(self, board: str, user_id: int) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            return self.boards[board].rank(user_id)
+
+    def size(self, board: str) -> int:
+        with self._lock:
+            return len(self.boards[board])
+
+
+_leaderboards: Dict[Tuple[Engine, int, str], GymLeaderboard] = {}
+_leaderboards_lock = threading.Lock()
+# One per board: held while it is built or updated after a commit, so an update can't
+# land between a build's query and the swap, and concurrent misses build it once
+_board_locks: Dict[Tuple[Engine, int, str], threading.Lock] = {}
+
+
+def _board_lock(key: Tuple[Engine, int, str]) -> threading.Lock:
+    with _leaderboards_lock:
+        return _board_locks.setdefault(key, threading.Lock())
+
+
+def _is_current(leaderboard: Optional[GymLeaderboard], period: date) -> bool:
+    return (leaderboard is not None and leaderboard.period == period
+            and time.monotonic() - leaderboard.built_at <= BOARD_TTL_SECONDS)
+
+
+def build_leaderboard(session: Session, gym_id: int, window: str, period: date) -> GymLeaderboard:
+    """
+    Build a gym's boards for one period from a single query.
+    """
+    leaderboard = GymLeaderboard(gym_id, window, period)
+    rows = session.exec(
+        select(LeaderboardScore.user_id, LeaderboardScore.sends, LeaderboardScore.attempts, LeaderboardScore.hardest)
+        .where(LeaderboardScore.gym_id == gym_id, LeaderboardScore.window == window, LeaderboardScore.period == period)
+    )
+    for user_id, sends, attempts, hardest in rows:
+        leaderboard.set(user_id, sends, attempts, hardest)
+    return leaderboard
+
+
+def get_leaderboard(session: Session, gym_id: int, window: str) -> GymLeaderboard:
+    """
+    Return the gym's boards for the current period, building them when missing,
+    from an earlier period or older than the TTL.
+    """
+    key = (session.get_bind(), gym_id, window)
+    period = period_start(window, datetime.utcnow().date())
+    leaderboard = _leaderboards.get(key)
+    if not _is_current(leaderboard, period):
+        with _board_lock(key):
+            # Another request may have built it while this one waited
+            leaderboard = _leaderboards.get(key)
+            if not _is_current(leaderboard, period):
+                leaderboard = build_leaderboard(session, gym_id, window, period)
+                with _leaderboards_lock:
+                    _leaderboards[key] = leaderboard
+    return leaderboard
+
+
+@dataclass
+class ScoreUpdate:
+    """
+    New totals for one leaderboard row; :func:`scores_changed` moves its climber on loaded boards.
+    """
+    gym_id: int
+    window: str
+    period: date
+    user_id: int
+    sends: int
+    attempts: int
+    hardest: float
+
+
+def loaded_climbs(session: Session, climb_ids: Iterable[int]) -> Dict[int, Tuple[int, float]]:
+    """
+    Map climb id -> (gym id, difficulty) for climbs already loaded in the session,
+    e.g. by the stats update; climbs not in the session are fetched one by one.
+    """
+    climbs = (session.get(Climb, climb_id) for climb_id in set(climb_ids))
+    return {climb.id: (climb.gym_id, climb.difficulty) for climb in climbs if climb is not None}
+
+
+def record_ascent_rows(session: Session, rows: Iterable[Mapping], sign: int = 1,
+                       climbs: Optional[Mapping[int, Tuple[int, float]]] = None) -> List[ScoreUpdate]:
+    """
+    Update leaderboard totals for a batch of ascent writes. Does not commit.
+
+    One query reads the climbs' gyms and difficulties (unless the caller already
+    has them), one reads the affected rows, and the changes are written with
+    executemany statements. Ascents in week/month periods that are no longer
+    retained only count toward all-time.
+
+    Args:
+        session (Session): Session holding the ascent writes.
+        rows (Iterable[Mapping]): Ascent columns (user_id, climb_id, date, sent).
+        sign (int): 1 for inserted ascents, -1 for deleted ones.
+        climbs (Mapping | None): climb id -> (gym id, difficulty), if known.
+    Returns:
+        list: The rows' new totals, for :func:`scores_changed`.
+    """
+    rows = list(rows)
+    climb_ids = {row["climb_id"] for row in rows}
+    if not climb_ids:
+        return []
+    if climbs is None:
+        climbs = climb_details(session, climb_ids)
+    since = {window: retained_since(window) for window in WINDOWS}
+    deltas: Dict[tuple, list] = {}
+    for (user_id, gym_id, day), totals in daily_deltas(rows, climbs, sign).items():
+        for window in WINDOWS:
+            period = period_start(window, day)
+            if period >= since[window]:
+                add_totals(deltas, (gym_id, window, period, user_id), totals)
+
+    def hardest_of(key):
+        gym_id, window, period, user_id = key
+        end = period_end(window, period)
+        return hardest_in(session, user_id, gym_id, period if end else None, end)
+
+    return [
+        ScoreUpdate(*key, *totals)
+        for key, totals in apply_totals(session, LeaderboardScore, KEY_NAMES, deltas, sign, hardest_of)
+    ]
+
+
+def scores_changed(session: Session, changes: Iterable[ScoreUpdate]) -> None:
+    """
+    After commit: move climbers on the affected boards, if those boards are loaded.
+
+    Their totals are read back from the table, one query per board, rather than
+    taken from ``changes``: writers finish in any order, and an earlier
+    transaction's totals must not overwrite a later one's.
+    """
+    bind = session.get_bind()
+    climbers: Dict[Tuple[Engine, int, str], Set[Tuple[date, int]]] = defaultdict(set)
+    for change in changes:
+        climbers[(bind, change.gym_id, change.window)].add((change.period, change.user_id))
+    for key, changed in climbers.items():
+        # A board being built for the first time has a lock but is not loaded yet
+        if key not in _leaderboards and key not in _board_locks:
+            continue
+        with _board_lock(key):
+            leaderboard = _leaderboards.get(key)
+            user_ids = {user_id for period, user_id in changed if leaderboard and leaderboard.period == period}
+            if not user_ids:
+                continue
+            totals = {
+                user_id: (sends, attempts, hardest)
+                for user_id, sends, attempts, hardest in session.execute(
+                    select(LeaderboardScore.user_id, LeaderboardScore.sends, LeaderboardScore.attempts,
+                           LeaderboardScore.hardest)
+                    .where(LeaderboardScore.gym_id == leaderboard.gym_id,
+                           LeaderboardScore.window == leaderboard.window,
+                           LeaderboardScore.period == leaderboard.period,
+                           LeaderboardScore.user_id.in_(user_ids))
+                )
+            }
+            for user_id in user_ids:
+                leaderboard.set(user_id, *totals.get(user_id, (0, 0, 0.0)))
+
+
+def rebuild_leaderboards(session: Session, gym_id: Optional[int] = None) -> int:
+    """
+    Recompute leaderboard rows from the ascent table and drop loaded boards.
+
+    Ascents are streamed in batches and totalled in memory, so memory grows with
+    the number of leaderboard rows rather than the number of ascents.
+
+    Args:
+        session (Session): DB session; committed on success.
+        gym_id (int | None): Rebuild only this gym, or every gym when None.
+    Returns:
+        int: Number of leaderboard rows written.
+    """
+    since = {window: retained_since(window) for window in WINDOWS}
+    statement = (
+        select(Ascent.user_id, Ascent.date, Ascent.sent, Climb.gym_id, Climb.difficulty)
+        .join(Climb, Climb.id == Ascent.climb_id)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    wipe = delete(LeaderboardScore)
+    if gym_id is not None:
+        statement = statement.where(Climb.gym_id == gym_id)
+        wipe = wipe.where(LeaderboardScore.gym_id == gym_id)
+
+    totals: Dict[tuple, list] = {}
+    for user_id, when, sent, climb_gym_id, difficulty in session.execute(statement):
+        day = when.date()
+        for window in WINDOWS:
+            period = period_start(window, day)
+            if period < since[window]:
+                continue
+            add_ascent(totals, (climb_gym_id, window, period, user_id), sent, difficulty)
+
+    session.execute(wipe)
+    rows = [
+        dict(zip(KEY_NAMES, key), sends=sends, attempts=attempts, hardest=hardest)
+        for key, (sends, attempts, hardest) in totals.items()
+    ]
+    for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+        session.execute(insert(LeaderboardScore), rows[start:start + REBUILD_BATCH_SIZE])
+    session.commit()
+    reset(gym_id)
+    return len(rows)
+
+
+def compact(session: Session) -> int:
+    """
+    Delete week and month rows older than the retention, and drop boards of past periods.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    expired = or_(*(
+        and_(LeaderboardScore.window == window, LeaderboardScore.period < retained_since(window))
+        for window in ("week", "month")
+    ))
+    deleted = session.execute(delete(LeaderboardScore).where(expired)).rowcount
+    session.commit()
+    with _leaderboards_lock:
+        for key, leaderboard in list(_leaderboards.items()):
+            if leaderboard.period != period_start(leaderboard.window, datetime.utcnow().date()):
+                del _leaderboards[key]
+    return deleted
+
+
+def reset(gym_id: Optional[int] = None) -> None:
+    """
+    Drop loaded boards, for one gym or all of them.
+    """
+    with _leaderboards_lock:
+        for key in [key for key in _leaderboards if gym_id is None or key[1] == gym_id]:
+            del _leaderboards[key]
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild or compact the per-gym leaderboards.")
+    parser.add_argument("--gym-id", type=int, default=None, help="Only rebuild this gym")
+    parser.add_argument("--compact", action="store_true", help="Only delete expired week/month rows")
+    args = parser.parse_args()
+    with Session(engine) as session:
+        if args.compact:
+            print(f"Deleted {compact(session)} expired leaderboard row(s)")
+        else:
+            print(f"Rebuilt {rebuild_leaderboards(session, args.gym_id)} leaderboard row(s)")
@@ -1,30 +1,76 @@
 """
 Entry point for the Climb Gym Log FastAPI application.
+
+:func:`create_app` is the one place routers and middleware are registered;
+``main:app`` and ``app.main:app`` are the same application. Startup does no DDL:
+the schema is managed by Alembic (``alembic upgrade head``).
 """
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import gyms, auth, ascents
-from app import models  # Ensures models are registered for SQLModel
-from app.db import init_db
-
-app = FastAPI()
-
-# Ensure all tables are created at startup
-init_db()
-
-# Allow all origins for development; restrict in production
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(gyms.router)
-app.include_router(auth.router)
-app.include_router(ascents.router)
-
-@app.get("/")
-def root():
-    return {"message": "Climb Gym Log API is running."}
+from app.routes import gyms, auth, users, ascents, comments, climbs, leaderboards, health, metrics as metrics_routes
+from app.routes import ingest as ingest_routes
+from app import db, ingest, metrics, models  # noqa: F401 -- models registers every table before the first query
+from app.db import ASYNC_DB
+from app.aio import async_router
+
+ROUTERS = (gyms, auth, users, ascents, comments, climbs, leaderboards)
+
+def create_app(metrics_enabled: Optional[bool] = None, ingest_enabled: Optional[bool] = None) -> FastAPI:
+    """
+    Build the API application with every router mounted.
+
+    Args:
+        metrics_enabled (bool | None): Add request/SQL instrumentation and ``GET /metrics``;
+            defaults to ``METRICS_ENABLED``.
+        ingest_enabled (bool | None): Mount ``POST /ascents/ingest`` and run its journal writer
+            (``app.state.ingestor``) while the app is up; defaults to ``ASCENT_INGEST_ENABLED``.
+    Returns:
+        FastAPI: The application.
+    """
+    ingest_enabled = ingest.ENABLED if ingest_enabled is None else ingest_enabled
+    app = FastAPI(title="Climb Gym Log", lifespan=ingest.lifespan if ingest_enabled else None)
+
+    # Allow all origins for development; restrict in production
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag"],
+    )
+
+    # With an async DATABASE_URL the same handlers are served from async routers
+    for module in ROUTERS:
+        app.include_router(async_router(module.router) if ASYNC_DB else module.router)
+    app.include_router(health.router)
+
+    if ingest_enabled:
+        # One journal per worker process; journals of workers that are gone are taken over on start
+        app.state.ingestor = ingest.AscentIngestor(
+            db.engine, ingest.worker_journal_path(ingest.JOURNAL_PATH),
+            adopt=ingest.worker_journal_pattern(ingest.JOURNAL_PATH),
+        )
+        # Always on the sync engine: the handler blocks on the journal fsync, which belongs in the threadpool
+        app.include_router(ingest_routes.router)
+
+    if metrics.ENABLED if metrics_enabled is None else metrics_enabled:
+        metrics.install()
+        # Added last so it is outermost and times CORS handling too
+        app.add_middleware(metrics.MetricsMiddleware)
+        app.include_router(metrics_routes.router)
+
+    @app.get("/")
+    def read_root():
+        """
+        Root endpoint for health check.
+
+        Returns:
+            dict: Welcome message.
+        """
+        return {"message": "Welcome to Climb Gym Log API!"}
+
+    return app
+
+app = create_app()
@@ -0,0 +1,289 @@
+"""
+Request-level performance instrumentation.
+
+When ``METRICS_ENABLED`` is set, :func:`app.main.create_app` adds
+:class:`MetricsMiddleware` and :func:`install` hooks SQLAlchemy's cursor events
+on every engine. For each route (the path template, e.g. ``/gyms/{gym_id}``)
+they record:
+
+* request count by status and a latency histogram;
+* a histogram of SQL statements per request and the total time spent in them;
+* requests that ran the same statement ``METRICS_N_PLUS_ONE`` or more times,
+  which is what an N+1 loop looks like from the outside.
+
+Statements slower than ``SLOW_QUERY_MS`` are logged as one JSON object per line
+on the ``app.metrics`` logger. ``GET /metrics`` serves everything, plus the pool
+and cache counters, in the Prometheus text format.
+
+Disabled (the default), neither the middleware nor the listeners are installed,
+so requests and statements pay nothing.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.settings import env_bool, env_int
+
+ENABLED = env_bool("METRICS_ENABLED", False)
+SLOW_QUERY_MS = env_int("SLOW_QUERY_MS", 200)
+# Same statement this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = env_int("METRICS_N_PLUS_ONE", 10)
+
+PREFIX = "climb_gym"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Label for requests no route matched, so unknown paths don't create new series
+UNMATCHED = "unmatched"
+
+logger = logging.getLogger("app.metrics")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestStats:
+    """
+    SQL activity of the request being served, collected by the cursor listeners.
+    """
+    __slots__ = ("statements", "db_seconds", "seen")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.seen: Counter = Counter()
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+# Path of the request being served, for the slow-query log
+_current_path: ContextVar[Optional[str]] = ContextVar("request_path", default=None)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus sense (not thread-safe on its own).
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, buckets = 0, []
+        for bound, count in zip(list(self.bounds) + [float("inf")], self.counts):
+            total += count
+            buckets.append(("+Inf" if bound == float("inf") else format_number(bound), total))
+        return buckets
+
+
+class Metrics:
+    """
+    Thread-safe per-route request and SQL counters.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+            self.latency: Dict[Tuple[str, str], Histogram] = {}
+            self.statements: Dict[Tuple[str, str], Histogram] = {}
+            self.db_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+            self.n_plus_one: Dict[Tuple[str, str], int] = defaultdict(int)
+            self.slow_queries = 0
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats,
+                       repeated: bool) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.statements[key] = Histogram(STATEMENT_BUCKETS)
+            self.latency[key].observe(seconds)
+            self.statements[key].observe(stats.statements)
+            self.db_seconds[key] += stats.db_seconds
+            if repeated:
+                self.n_plus_one[key] += 1
+
+    def record_slow_query(self) -> None:
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        from app import db
+        from app.cache import registry
+
+        lines: List[str] = []
+        with self._lock:
+            family(lines, "http_requests_total", "counter", "Requests served, by route and status.",
+                   ((dict(method=m, route=r, status=str(s)), n) for (m, r, s), n in sorted(self.requests.items())))
+            histogram(lines, "http_request_duration_seconds", "Request latency.", self.latency)
+            histogram(lines, "http_request_db_statements", "SQL statements executed per request.", self.statements)
+            family(lines, "http_request_db_seconds_total", "counter", "Time spent in SQL statements.",
+                   ((dict(method=m, route=r), s) for (m, r), s in sorted(self.db_seconds.items())))
+            family(lines, "http_n_plus_one_total", "counter",
+                   f"Requests that ran one statement {N_PLUS_ONE_THRESHOLD} or more times.",
+                   ((dict(method=m, route=r), n) for (m, r), n in sorted(self.n_plus_one.items())))
+            family(lines, "db_slow_queries_total", "counter", f"Statements slower than {SLOW_QUERY_MS} ms.",
+                   [({}, self.slow_queries)])
+        active = db.async_engine if db.ASYNC_DB else db.engine
+        pool = db.pool_metrics.snapshot(active.pool)
+        for name in ("connects", "checkouts", "invalidations"):
+            family(lines, f"db_pool_{name}_total", "counter", f"Connection pool {name}.", [({}, pool[name])])
+        family(lines, "db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection.",
+               [({}, pool["wait_seconds_total"])])
+        caches = sorted((name, cache.stats()) for name, cache in registry.items())
+        family(lines, "cache_hits_total", "counter", "In-process cache hits.",
+               ((dict(cache=name), stats["hits"]) for name, stats in caches))
+        family(lines, "cache_misses_total", "counter", "In-process cache misses.",
+               ((dict(cache=name), stats["misses"]) for name, stats in caches))
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def family(lines: List[str], name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> None:
+    lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{PREFIX}_{name}{format_labels(labels)} {format_number(value)}")
+
+
+def histogram(lines: List[str], name: str, help_text: str, series: Dict[Tuple[str, str], Histogram]) -> None:
+    lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}_{name} histogram")
+    for (method, route), hist in sorted(series.items()):
+        labels = dict(method=method, route=route)
+        for bound, count in hist.cumulative():
+            lines.append(f"{PREFIX}_{name}_bucket{format_labels(dict(labels, le=bound))} {count}")
+        lines.append(f"{PREFIX}_{name}_sum{format_labels(labels)} {format_number(hist.sum)}")
+        lines.append(f"{PREFIX}_{name}_count{format_labels(labels)} {hist.count}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, so one that raises leaves nothing on the pooled connection
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += seconds
+        stats.seen[statement] += 1
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        metrics.record_slow_query()
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "ms": round(seconds * 1000, 1),
+            "statement": _WHITESPACE.sub(" ", statement).strip(),
+            "executemany": executemany,
+            "path": _current_path.get(),
+        }))
+
+
+def install() -> None:
+    """
+    Listen to cursor events on every engine, including ones created later. Idempotent.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstall() -> None:
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def repeated_statements(stats: RequestStats) -> List[Tuple[str, int]]:
+    """
+    Statements the request ran at least ``N_PLUS_ONE_THRESHOLD`` times, most repeated first.
+    """
+    return [(statement, count) for statement, count in stats.seen.most_common() if count >= N_PLUS_ONE_THRESHOLD]
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request and collecting its SQL activity.
+
+    Pure ASGI rather than ``BaseHTTPMiddleware`` so streamed responses are not
+    buffered; the time recorded runs until the last body chunk is sent.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        stats_token = _current.set(stats)
+        path_token = _current_path.set(scope["path"])
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - started
+            _current.reset(stats_token)
+            _current_path.reset(path_token)
+            # The router fills in the matched route on the shared scope
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED
+            repeated = repeated_statements(stats)
+            for statement, count in repeated[:1]:
+                logger.warning(json.dumps({
+                    "event": "n_plus_one",
+                    "method": scope["method"],
+                    "route": route,
+                    "count": count,
+                    "statement": _WHITESPACE.sub(" ", statement).strip(),
+                }))
+            metrics.record_request(scope["method"], route, status, seconds, stats, bool(repeated))
@@ -1 +1,10 @@
+"""
+Table models. Importing this package registers every table on ``SQLModel.metadata``,
+which Alembic compares against and tests create their schema from.
+"""
+from app.models.core import Climb, ClimbRating, Gym, User
+from app.models.ascents import Ascent
+from app.models.comment import Comment
+from app.models.stats import ClimbStats, LeaderboardScore, UserRollup
 
+__all__ = ["Ascent", "Climb", "ClimbRating", "ClimbStats", "Comment", "Gym", "LeaderboardScore", "User", "UserRollup"]
@@ -1,6 +1,8 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index, event
 from sqlmodel import SQLModel, Field, Relationship
+from app.grades import grade_rank
 
 class Ascent(SQLModel, table=True):
     """
@@ -12,11 +14,35 @@ class Ascent(SQLModel, table=True):
         climb_id (int): Foreign key to climb.
         date (datetime): Date of ascent.
         grade (str): User's perceived grade.
+        difficulty (float): Sortable rank of grade (None if missing or unrecognised).
         notes (str): Optional notes.
+        sent (bool): Whether the climb was sent (False for a worked attempt).
+        quality_rating (int): Optional quality rating (1-5).
+        idempotency_key (str): Client key of an ascent logged through the ingest queue, unique per user.
     """
+    __table_args__ = (
+        Index("ix_ascent_user_id_date", "user_id", "date"),
+        Index("ix_ascent_climb_id_date", "climb_id", "date"),
+        Index("ix_ascent_user_id_difficulty", "user_id", "difficulty"),
+        Index("ix_ascent_climb_id_difficulty", "climb_id", "difficulty"),
+        # A retried ingest request finds its ascent here instead of storing it twice
+        Index("uq_ascent_user_id_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     climb_id: int = Field(foreign_key="climb.id")
     date: datetime = Field(default_factory=datetime.utcnow)
     grade: Optional[str] = None
+    difficulty: Optional[float] = None
     notes: Optional[str] = None
+    sent: bool = True
+    quality_rating: Optional[int] = Field(default=None, ge=1, le=5)
+    idempotency_key: Optional[str] = None
+    user: Optional["User"] = Relationship(back_populates="ascents")
+    climb: Optional["Climb"] = Relationship(back_populates="ascents")
+
+@event.listens_for(Ascent, "before_insert")
+@event.listens_for(Ascent, "before_update")
+def _set_difficulty(mapper, connection, ascent: Ascent) -> None:
+    # Core bulk writes set the column themselves with grade_rank()
+    ascent.difficulty = grade_rank(ascent.grade)
@@ -1,11 +1,30 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime
 
 class Comment(SQLModel, table=True):
+    """
+    A comment in a climb's beta thread.
+
+    Attributes:
+        id (int): Primary key.
+        climb_id (int): The climb commented on.
+        user_id (int): Author.
+        username (str): Author's username, copied so threads need no join.
+        text (str): Comment body.
+        created_at (datetime): When the comment was posted.
+    """
+    # Threads and "my comments" are read in created_at order, in either direction;
+    # the indexes serve the filter, the order and the keyset tiebreak without a sort
+    __table_args__ = (
+        Index("ix_comment_climb_id_created_at", "climb_id", "created_at", "id"),
+        Index("ix_comment_user_id_created_at", "user_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    climb_id: int = Field(index=True)
-    user_id: int = Field(index=True)
+    climb_id: int
+    user_id: int
     username: str
     text: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
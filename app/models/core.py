@@ -1,6 +1,8 @@
 from typing import Optional, List
+from sqlalchemy import Index, UniqueConstraint, event
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
+from app.grades import grade_rank, normalize_grade
 
 class Gym(SQLModel, table=True):
     """
@@ -47,37 +49,75 @@ class Climb(SQLModel, table=True):
         setter_grade (str): Grade assigned by setter.
         date_added (datetime): Date climb was added.
         rating (int): User rating for the climb (1-5, 0 if unrated).
+        difficulty (float): Sortable rank of setter_grade (0 if unrecognised).
+        ascent_count (int): Logged sends plus attempts, kept in step with ClimbStats.
+        quality_average (float): Mean ascent quality rating (0 if unrated).
+        archived_at (datetime): When the climb was taken down in a reset (None while it is up).
+        comment_count (int): Number of comments, kept in step by the comment routes.
+        last_comment_id (int): Newest comment (None without comments).
+        last_comment_at (datetime): When the newest comment was posted.
+        last_comment_username (str): Author of the newest comment.
+        last_comment_preview (str): Start of the newest comment's text.
     """
+    # Every list filter and sort leads with gym_id so the listing never scans the table
+    __table_args__ = (
+        Index("ix_climb_gym_id_date_added", "gym_id", "date_added", "id"),
+        Index("ix_climb_gym_id_difficulty", "gym_id", "difficulty", "id"),
+        Index("ix_climb_gym_id_ascent_count", "gym_id", "ascent_count", "id"),
+        Index("ix_climb_gym_id_quality_average", "gym_id", "quality_average", "id"),
+        Index("ix_climb_gym_id_setter_grade", "gym_id", "setter_grade", "date_added"),
+        Index("ix_climb_gym_id_setter", "gym_id", "setter", "date_added"),
+        Index("ix_climb_gym_id_section", "gym_id", "section", "date_added"),
+        Index("ix_climb_gym_id_color", "gym_id", "color", "date_added"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     gym_id: int = Field(foreign_key="gym.id")
     color: str
-    setter: str
+    setter: str = Field(index=True)
     section: str
     setter_grade: str
     date_added: datetime
     rating: int = Field(default=0, ge=0, le=5, description="User rating (1-5), 0 if unrated.")
+    difficulty: float = 0.0
+    ascent_count: int = 0
+    quality_average: float = 0.0
+    archived_at: Optional[datetime] = None
+    comment_count: int = 0
+    last_comment_id: Optional[int] = None
+    last_comment_at: Optional[datetime] = None
+    last_comment_username: Optional[str] = None
+    last_comment_preview: Optional[str] = None
     gym: Optional[Gym] = Relationship(back_populates="climbs")
     ascents: List["Ascent"] = Relationship(back_populates="climb")
 
-class Ascent(SQLModel, table=True):
+def climb_difficulty(setter_grade: str) -> float:
     """
-    Ascent model for representing a user's log of an attempt or send.
+    Value of ``Climb.difficulty`` for a setter grade, for writes that bypass the ORM.
+    """
+    return grade_rank(normalize_grade(setter_grade)) or 0.0
+
+@event.listens_for(Climb, "before_insert")
+@event.listens_for(Climb, "before_update")
+def _set_difficulty(mapper, connection, climb: Climb) -> None:
+    climb.difficulty = climb_difficulty(climb.setter_grade)
+
+class ClimbRating(SQLModel, table=True):
+    """
+    A single user's quality rating of a climb.
 
     Attributes:
         id (int): Primary key.
-        user_id (int): Foreign key to user.
+        user_id (int): Foreign key to user (indexed for profile lookups).
         climb_id (int): Foreign key to climb.
-        date (datetime): Date of ascent.
-        sent (bool): Whether the climb was sent.
-        personal_grade (str): User's personal grade.
-        quality_rating (int): User's quality rating (1-5).
+        rating (int): Quality rating (1-5).
+        rated_at (datetime): When the rating was last changed.
     """
+    __table_args__ = (UniqueConstraint("user_id", "climb_id", name="uq_climbrating_user_climb"),)
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     climb_id: int = Field(foreign_key="climb.id")
-    date: datetime
-    sent: bool
-    personal_grade: str
-    quality_rating: int
-    user: Optional[User] = Relationship(back_populates="ascents")
-    climb: Optional[Climb] = Relationship(back_populates="ascents")
+    rating: int = Field(ge=1, le=5)
+    rated_at: datetime = Field(default_factory=datetime.utcnow)
+
+# Ascent lives in app.models.ascents; import it so the relationships above resolve
+from app.models.ascents import Ascent  # noqa: E402,F401
@@ -0,0 +1,69 @@
+from datetime import date
+from typing import Dict
+from sqlalchemy import Column, JSON
+from sqlmodel import SQLModel, Field
+
+class ClimbStats(SQLModel, table=True):
+    """
+    Materialized consensus aggregates for a climb, maintained on ascent writes.
+
+    Attributes:
+        climb_id (int): Primary key and foreign key to climb.
+        send_count (int): Number of logged sends.
+        attempt_count (int): Number of logged attempts that did not end in a send.
+        quality_sum (int): Sum of quality ratings.
+        quality_count (int): Number of quality ratings.
+        grade_histogram (dict): Personal grade (normalized spelling) -> number of ascents suggesting it.
+        difficulty_sum (float): Sum of the recognised personal grades' difficulties.
+        difficulty_count (int): Number of ascents with a recognised personal grade.
+    """
+    climb_id: int = Field(foreign_key="climb.id", primary_key=True)
+    send_count: int = 0
+    attempt_count: int = 0
+    quality_sum: int = 0
+    quality_count: int = 0
+    grade_histogram: Dict[str, int] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    difficulty_sum: float = 0.0
+    difficulty_count: int = 0
+
+class LeaderboardScore(SQLModel, table=True):
+    """
+    A climber's totals at one gym for one leaderboard period, maintained on ascent writes.
+
+    Attributes:
+        gym_id (int): Gym the ascents were logged at.
+        window (str): ``week``, ``month`` or ``all``.
+        period (date): First day of the week (Monday) or month; 1970-01-01 for all-time.
+        user_id (int): The climber.
+        sends (int): Sends in the period.
+        attempts (int): Logged attempts that did not end in a send.
+        hardest (float): Highest ``Climb.difficulty`` sent in the period (0 if none).
+    """
+    gym_id: int = Field(foreign_key="gym.id", primary_key=True)
+    window: str = Field(primary_key=True)
+    period: date = Field(primary_key=True)
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    sends: int = 0
+    attempts: int = 0
+    hardest: float = 0.0
+
+class UserRollup(SQLModel, table=True):
+    """
+    A climber's activity at one gym in one day or week, maintained on ascent writes.
+
+    Attributes:
+        user_id (int): The climber.
+        bucket (str): ``day`` or ``week``.
+        period (date): The day, or the Monday starting the week.
+        gym_id (int): Gym the ascents were logged at.
+        sends (int): Sends in the period.
+        attempts (int): Logged attempts that did not end in a send.
+        hardest (float): Highest ``Climb.difficulty`` sent in the period (0 if none).
+    """
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    bucket: str = Field(primary_key=True)
+    period: date = Field(primary_key=True)
+    gym_id: int = Field(foreign_key="gym.id", primary_key=True)
+    sends: int = 0
+    attempts: int = 0
+    hardest: float = 0.0
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination helpers shared by the list endpoints.
+
+A cursor is an opaque, URL-safe token that encodes the sort key of the last
+row on a page. The next page is fetched with a ``(key, id) > (last_key, last_id)``
+predicate instead of an OFFSET, so the database can seek straight to the page
+through an index no matter how deep the client has scrolled.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Largest page the gym and climb listings return; bigger limits are clamped to it
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(key: Any, row_id: int) -> str:
+    """
+    Encode a sort key and row id into an opaque cursor token.
+
+    Args:
+        key: Sort key of the last row (datetime, int or str), or None for id-only ordering.
+        row_id (int): Primary key of the last row.
+    Returns:
+        str: URL-safe cursor token.
+    """
+    if isinstance(key, datetime):
+        key = {"dt": key.isoformat()}
+    raw = json.dumps([key, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor token produced by :func:`encode_cursor`.
+
+    Args:
+        token (str): Cursor token from the client.
+    Returns:
+        tuple: (sort key, row id).
+    Raises:
+        HTTPException: 400 if the token is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key["dt"])
+        if not isinstance(row_id, int):
+            raise ValueError("cursor id must be an integer")
+        return key, row_id
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail={"code": "invalid_cursor", "message": "Malformed pagination cursor"})
+
+
+def keyset_page(statement, key_column, id_column, cursor: Optional[str], limit: int, offset: int = 0, descending: bool = False):
+    """
+    Apply ordering plus either a keyset predicate or a legacy offset to a select.
+
+    One extra row is requested so callers can tell whether another page exists.
+
+    Args:
+        statement: SQLModel select to paginate.
+        key_column: Column to sort by, or None to sort by id only.
+        id_column: Primary key column used as the tiebreaker.
+        cursor (str | None): Cursor from the previous page; takes precedence over offset.
+        limit (int): Page size.
+        offset (int): Legacy offset, only used when no cursor is given.
+        descending (bool): Newest/highest first when True.
+    Returns:
+        Select: Paginated statement fetching up to ``limit + 1`` rows.
+    """
+    columns = [c for c in (key_column, id_column) if c is not None]
+    statement = statement.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if cursor:
+        last_key, last_id = decode_cursor(cursor)
+        if key_column is None:
+            predicate = id_column < last_id if descending else id_column > last_id
+        # The leading range term is implied by the OR, but lets the planner seek
+        # into a (…, key, id) index instead of filtering from the start of the range
+        elif descending:
+            predicate = and_(key_column <= last_key,
+                             or_(key_column < last_key, and_(key_column == last_key, id_column < last_id)))
+        else:
+            predicate = and_(key_column >= last_key,
+                             or_(key_column > last_key, and_(key_column == last_key, id_column > last_id)))
+        statement = statement.where(predicate)
+    elif offset:
+        statement = statement.offset(offset)
+    return statement.limit(limit + 1)
+
+
+def finish_page(rows: Sequence, limit: int, response: Response, key_attr: Optional[str] = None) -> List:
+    """
+    Trim the look-ahead row and publish the next cursor as a response header.
+
+    Args:
+        rows (Sequence): Rows fetched by a :func:`keyset_page` statement.
+        limit (int): Requested page size.
+        response (Response): Outgoing response to attach ``X-Next-Cursor`` to.
+        key_attr (str | None): Attribute holding the sort key, None for id-only ordering.
+    Returns:
+        list: At most ``limit`` rows.
+    """
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        key = getattr(last, key_attr) if key_attr else None
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key, last.id)
+    return rows
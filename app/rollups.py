@@ -0,0 +1,312 @@
+"""
+Per-user activity rollups behind ``GET /users/{username}/stats``.
+
+``UserRollup`` holds a climber's sends, attempts and hardest send per day and
+per week at each gym. Ascent writes call :func:`record_ascent_rows` inside their
+own transaction, so a stats request reads one row per bucket and gym rather
+than the climber's whole history. Backfill or repair with:
+
+    python -m app.rollups [--user-id ID]
+
+The totals upsert (:func:`apply_totals`) is shared with the leaderboard table,
+which keeps the same sends / attempts / hardest columns under another key.
+"""
+import argparse
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import bindparam, delete, func, insert
+from sqlmodel import Session, SQLModel, select
+
+from app.db import insert_missing, update_rows
+from app.models.ascents import Ascent
+from app.models.core import Climb
+from app.models.stats import UserRollup
+from app.settings import env_int
+
+BUCKETS = ("day", "week")
+KEY_NAMES = ("user_id", "bucket", "period", "gym_id")
+REBUILD_BATCH_SIZE = 10000
+# Longest range one stats request may cover, in buckets
+MAX_BUCKETS = env_int("STATS_MAX_BUCKETS", 366)
+
+# key -> (sends, attempts, hardest)
+Totals = Tuple[int, int, float]
+
+
+def bucket_start(bucket: str, day: date) -> date:
+    """
+    First day of the day or week (starting Monday) containing ``day``.
+    """
+    return day - timedelta(days=day.weekday()) if bucket == "week" else day
+
+
+def bucket_length(bucket: str) -> timedelta:
+    return timedelta(weeks=1) if bucket == "week" else timedelta(days=1)
+
+
+def periods(bucket: str, start: date, end: date) -> List[date]:
+    """
+    Start of every day or week from the one containing ``start`` to the one containing ``end``.
+    """
+    first, step = bucket_start(bucket, start), bucket_length(bucket)
+    return [first + step * i for i in range((bucket_start(bucket, end) - first) // step + 1)]
+
+
+def read_rollups(session: Session, user_id: int, bucket: str, start: date, end: date) -> List[UserRollup]:
+    """
+    A user's rollup rows for the periods from ``start`` to ``end``, in period order.
+
+    One range scan of the primary key, so the cost follows the number of
+    periods and gyms in the range rather than the number of ascents.
+    """
+    return session.exec(
+        select(UserRollup)
+        .where(
+            UserRollup.user_id == user_id,
+            UserRollup.bucket == bucket,
+            UserRollup.period >= bucket_start(bucket, start),
+            UserRollup.period <= end,
+        )
+        .order_by(UserRollup.period, UserRollup.gym_id)
+    ).all()
+
+
+def add_ascent(deltas: Dict[tuple, list], key: tuple, sent: bool, difficulty: float, sign: int = 1) -> None:
+    """
+    Count one ascent toward ``deltas[key]`` ([sends, attempts, hardest sent]).
+    """
+    delta = deltas.setdefault(key, [0, 0, 0.0])
+    if sent:
+        delta[0] += sign
+        delta[2] = max(delta[2], difficulty)
+    else:
+        delta[1] += sign
+
+
+def add_totals(deltas: Dict[tuple, list], key: tuple, totals: Sequence) -> None:
+    """
+    Merge [sends, attempts, hardest sent] totals into ``deltas[key]``.
+    """
+    delta = deltas.setdefault(key, [0, 0, 0.0])
+    delta[0] += totals[0]
+    delta[1] += totals[1]
+    delta[2] = max(delta[2], totals[2])
+
+
+def daily_deltas(rows: Iterable[Mapping], climbs: Mapping[int, Tuple[int, float]], sign: int = 1) -> Dict[tuple, list]:
+    """
+    Sum ascent rows per (user id, gym id, day), skipping rows whose climb is unknown.
+
+    A batch is mostly a few climbers over a few days, so the per-period deltas
+    are then built from a handful of entries rather than once per ascent.
+    """
+    days: Dict[tuple, list] = {}
+    same = Counter((row["user_id"], row["climb_id"], row["date"].date(), row["sent"]) for row in rows)
+    for (user_id, climb_id, day, sent), count in same.items():
+        climb = climbs.get(climb_id)
+        if climb is not None:
+            add_ascent(days, (user_id, climb[0], day), sent, climb[1], sign * count)
+    return days
+
+
+def apply_totals(session: Session, model: Type[SQLModel], key_names: Sequence[str], deltas: Dict[tuple, list],
+                 sign: int, hardest_of: Callable[[tuple], float]) -> List[Tuple[tuple, Totals]]:
+    """
+    Add per-key deltas to a totals table with a sends/attempts/hardest row per key. Does not commit.
+
+    Rows are read and locked with one query (missing ones are first created with
+    ``INSERT ... ON CONFLICT DO NOTHING``, so concurrent writers of a new key queue
+    on its lock) and changes written with executemany UPDATE and DELETE
+    statements; rows whose counts reach zero are deleted.
+    A maximum can't be decremented, so when a removal may have taken away the
+    hardest send ``hardest_of(key)`` recomputes it.
+
+    Args:
+        session (Session): Session holding the ascent writes.
+        model (type): Table model; its primary key is ``key_names``.
+        key_names (Sequence[str]): Key column names, in the order of the delta keys.
+        deltas (dict): key -> [sends, attempts, hardest sent] from :func:`add_ascent`.
+        sign (int): 1 for inserted ascents, -1 for deleted ones.
+        hardest_of (Callable): Recomputes the hardest send for a key from the ascent table.
+    Returns:
+        list: (key, new totals) for every key in ``deltas``.
+    """
+    if not deltas:
+        return []
+    key_columns = [getattr(model, name) for name in key_names]
+    # One IN list per key column rather than a row-value IN, which SQLite answers
+    # with a table scan; the cross product is small since a batch has few users
+    statement = select(*key_columns, model.sends, model.attempts, model.hardest)
+    size = len(key_names)
+
+    def locked(keys) -> Dict[tuple, Totals]:
+        restricted = statement.where(*(column.in_({key[i] for key in keys}) for i, column in enumerate(key_columns)))
+        return {
+            tuple(row[:size]): tuple(row[size:])
+            for row in session.execute(restricted.with_for_update())
+            if tuple(row[:size]) in keys
+        }
+
+    existing = locked(deltas)
+    missing = [key for key in deltas if key not in existing]
+    if sign > 0 and missing:
+        # FOR UPDATE locks nothing for a row that doesn't exist yet, so concurrent
+        # first ascents would both insert it: create it first, then lock it
+        session.execute(insert_missing(session, model), [
+            dict(zip(key_names, key), sends=0, attempts=0, hardest=0.0) for key in missing
+        ])
+        existing.update(locked(set(missing)))
+    updates, removed, changes = [], [], []
+    for key, (sends, attempts, hardest) in deltas.items():
+        old_sends, old_attempts, old_hardest = existing.get(key, (0, 0, 0.0))
+        new_sends, new_attempts = old_sends + sends, old_attempts + attempts
+        if sign > 0:
+            new_hardest = max(old_hardest, hardest)
+        elif hardest >= old_hardest and new_sends > 0:
+            new_hardest = hardest_of(key)
+        else:
+            new_hardest = old_hardest if new_sends > 0 else 0.0
+        changes.append((key, (max(new_sends, 0), max(new_attempts, 0), new_hardest)))
+        values = dict(zip(key_names, key), sends=new_sends, attempts=new_attempts, hardest=new_hardest)
+        if new_sends + new_attempts <= 0:
+            if key in existing:
+                removed.append(key)
+        elif key in existing:
+            updates.append(values)
+    if updates:
+        update_rows(session, model, updates)
+    if removed:
+        table = model.__table__
+        session.execute(
+            delete(table).where(*(table.c[name] == bindparam(f"key_{name}") for name in key_names)),
+            [{f"key_{name}": value for name, value in zip(key_names, key)} for key in removed],
+        )
+    return changes
+
+
+def climb_details(session: Session, climb_ids: Iterable[int]) -> Dict[int, Tuple[int, float]]:
+    """
+    Map climb id -> (gym id, difficulty) with one query.
+    """
+    return {
+        climb_id: (gym_id, difficulty)
+        for climb_id, gym_id, difficulty in session.execute(
+            select(Climb.id, Climb.gym_id, Climb.difficulty).where(Climb.id.in_(set(climb_ids)))
+        )
+    }
+
+
+def hardest_in(session: Session, user_id: int, gym_id: int, start: Optional[date], end: Optional[date]) -> float:
+    """
+    Hardest climb (by ``Climb.difficulty``) a user sent at a gym between two dates, 0 if none.
+    """
+    statement = (
+        select(func.coalesce(func.max(Climb.difficulty), 0.0))
+        .join(Ascent, Ascent.climb_id == Climb.id)
+        .where(Climb.gym_id == gym_id, Ascent.user_id == user_id, Ascent.sent)
+    )
+    if start is not None:
+        statement = statement.where(
+            Ascent.date >= datetime.combine(start, datetime.min.time()),
+            Ascent.date < datetime.combine(end, datetime.min.time()),
+        )
+    return session.exec(statement).one()
+
+
+def record_ascent_rows(session: Session, rows: Iterable[Mapping], sign: int = 1,
+                       climbs: Optional[Mapping[int, Tuple[int, float]]] = None) -> int:
+    """
+    Update the day and week rollups for a batch of ascent writes. Does not commit.
+
+    Args:
+        session (Session): Session holding the ascent writes.
+        rows (Iterable[Mapping]): Ascent columns (user_id, climb_id, date, sent).
+        sign (int): 1 for inserted ascents, -1 for deleted ones.
+        climbs (Mapping | None): climb id -> (gym id, difficulty), if the caller has it.
+    Returns:
+        int: Number of rollup rows changed.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    if climbs is None:
+        climbs = climb_details(session, (row["climb_id"] for row in rows))
+
+    def hardest_of(key):
+        user_id, bucket, period, gym_id = key
+        return hardest_in(session, user_id, gym_id, period, period + bucket_length(bucket))
+
+    deltas: Dict[tuple, list] = {}
+    for (user_id, gym_id, day), totals in daily_deltas(rows, climbs, sign).items():
+        for bucket in BUCKETS:
+            add_totals(deltas, (user_id, bucket, bucket_start(bucket, day), gym_id), totals)
+    return len(apply_totals(session, UserRollup, KEY_NAMES, deltas, sign, hardest_of))
+
+
+def rebuild_rollups(session: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute rollup rows from the ascent table.
+
+    Ascents are streamed in (user, date) order along ``ix_ascent_user_id_date``
+    and each user's rows are written once the stream moves past them, so
+    memory is bounded by one user's history.
+
+    Args:
+        session (Session): DB session; committed on success.
+        user_id (int | None): Rebuild only this user, or every user when None.
+    Returns:
+        int: Number of rollup rows written.
+    """
+    statement = (
+        select(Ascent.user_id, Ascent.date, Ascent.sent, Climb.gym_id, Climb.difficulty)
+        .join(Climb, Climb.id == Ascent.climb_id)
+        .order_by(Ascent.user_id, Ascent.date)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    wipe = delete(UserRollup)
+    if user_id is not None:
+        statement = statement.where(Ascent.user_id == user_id)
+        wipe = wipe.where(UserRollup.user_id == user_id)
+
+    pending: List[dict] = []
+    written = 0
+
+    def flush(deltas: Dict[tuple, list]) -> None:
+        nonlocal written
+        pending.extend(
+            dict(zip(KEY_NAMES, key), sends=sends, attempts=attempts, hardest=hardest)
+            for key, (sends, attempts, hardest) in deltas.items()
+        )
+        written += len(deltas)
+        deltas.clear()
+        if len(pending) >= REBUILD_BATCH_SIZE:
+            session.execute(insert(UserRollup), pending)
+            pending.clear()
+
+    session.execute(wipe)
+    deltas: Dict[tuple, list] = {}
+    current = None
+    for ascent_user, when, sent, gym_id, difficulty in session.execute(statement):
+        if ascent_user != current:
+            flush(deltas)
+            current = ascent_user
+        day = when.date()
+        for bucket in BUCKETS:
+            add_ascent(deltas, (ascent_user, bucket, bucket_start(bucket, day), gym_id), sent, difficulty)
+    flush(deltas)
+    if pending:
+        session.execute(insert(UserRollup), pending)
+    session.commit()
+    return written
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild per-user day/week activity rollups from ascents.")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    args = parser.parse_args()
+    with Session(engine) as session:
+        print(f"Rebuilt {rebuild_rollups(session, args.user_id)} rollup row(s)")
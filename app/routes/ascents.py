@@ -1,63 +1,327 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
 from sqlmodel import Session, select
-from typing import List
+from typing import Dict, Iterator, List, Literal, Optional
+from datetime import datetime
+import csv
+import io
+import json
+import anyio
+from app import db
 from app.db import get_session
 from app.models.ascents import Ascent
-from app.schemas.ascents import AscentCreate, AscentRead
+from app.schemas.ascents import (
+    AscentBatchCreate, AscentBatchError, AscentBatchResult, AscentCreate, AscentImportResult, AscentRead,
+)
 from app.auth import get_current_user
-from app.models.core import User
+from app.models.core import Climb, Gym, User
+from app.pagination import keyset_page, finish_page
+from app.climb_stats import record_ascent, record_ascents
+from app.grades import grade_rank
+from app.ascent_import import AscentImporter, iter_lines, iter_records
+from app.http_cache import response_cache
+from app import feed, leaderboard, rollups
 
 router = APIRouter(prefix="/ascents", tags=["ascents"])
 
 @router.post("/", response_model=AscentRead, status_code=status.HTTP_201_CREATED)
 def create_ascent(ascent: AscentCreate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    # Loads the climb for the stats and leaderboard updates below
+    if session.get(Climb, ascent.climb_id) is None:
+        raise HTTPException(status_code=404, detail="Climb not found")
     db_ascent = Ascent(
         user_id=current_user.id,
         climb_id=ascent.climb_id,
-        date=ascent.date or None,
+        date=ascent.date or datetime.utcnow(),
         grade=ascent.grade,
-        notes=ascent.notes
+        notes=ascent.notes,
+        sent=ascent.sent,
+        quality_rating=ascent.quality_rating
     )
     session.add(db_ascent)
+    # Consensus aggregates are updated in the same transaction as the ascent
+    record_ascent(session, db_ascent)
+    gyms = gyms_of_climbs(session, [db_ascent.climb_id])
+    climbs = leaderboard.loaded_climbs(session, [db_ascent.climb_id])
+    row = db_ascent.model_dump()
+    scores = leaderboard.record_ascent_rows(session, [row], climbs=climbs)
+    rollups.record_ascent_rows(session, [row], climbs=climbs)
     session.commit()
     session.refresh(db_ascent)
+    leaderboard.scores_changed(session, scores)
+    announce_ascents(session, [AscentRead.model_validate(db_ascent, from_attributes=True)], gyms)
     return db_ascent
 
+@router.delete("/{ascent_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_ascent(ascent_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Delete one of the current user's ascents.
+
+    Climb stats, leaderboard totals and the climber's rollups are taken back in
+    the same transaction as the delete.
+    Raises:
+        HTTPException: 404 if the ascent does not exist, 403 if it belongs to someone else.
+    """
+    ascent = session.get(Ascent, ascent_id)
+    if not ascent:
+        raise HTTPException(status_code=404, detail="Ascent not found")
+    if ascent.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed to delete this ascent")
+    deleted = AscentRead.model_validate(ascent, from_attributes=True)
+    row = ascent.model_dump()
+    session.delete(ascent)
+    # Flush first so a recomputed hardest send no longer sees this ascent
+    session.flush()
+    record_ascent(session, ascent, sign=-1)
+    gyms = gyms_of_climbs(session, [row["climb_id"]])
+    climbs = leaderboard.loaded_climbs(session, [row["climb_id"]])
+    scores = leaderboard.record_ascent_rows(session, [row], sign=-1, climbs=climbs)
+    rollups.record_ascent_rows(session, [row], sign=-1, climbs=climbs)
+    session.commit()
+    leaderboard.scores_changed(session, scores)
+    response_cache.bump(session, *(f"gym:{gym_id}" for gym_id in set(gyms.values())))
+    if row["climb_id"] in gyms:
+        feed.publish(gyms[row["climb_id"]], "ascent.deleted", {"id": deleted.id, "climb_id": deleted.climb_id})
+    return None
+
+def gyms_of_climbs(session: Session, climb_ids) -> Dict[int, int]:
+    """
+    Map climb id -> gym id for climbs an ascent write just touched.
+
+    The climbs are already in the session from the stats update, so this issues no queries.
+    """
+    climbs = (session.get(Climb, climb_id) for climb_id in set(climb_ids))
+    return {climb.id: climb.gym_id for climb in climbs if climb is not None}
+
+def announce_ascents(session: Session, ascents: List[AscentRead], gyms: Dict[int, int]) -> None:
+    """
+    After commit: invalidate the affected gyms' cached responses and publish to their feeds.
+    """
+    response_cache.bump(session, *(f"gym:{gym_id}" for gym_id in set(gyms.values())))
+    for ascent in ascents:
+        if ascent.climb_id in gyms:
+            feed.publish(gyms[ascent.climb_id], "ascent.created", ascent.model_dump(mode="json"))
+
+@router.post("/batch", response_model=AscentBatchResult, status_code=status.HTTP_201_CREATED)
+def create_ascents_batch(batch: AscentBatchCreate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Log several ascents in one request and one transaction.
+
+    Referenced climbs are checked with a single query and the ascents are written
+    with one bulk INSERT ... RETURNING, followed by one batched stats update.
+
+    Args:
+        batch (AscentBatchCreate): Items to log and the failure mode.
+        session (Session): DB session.
+        current_user (User): The authenticated user.
+    Returns:
+        AscentBatchResult: Created ascents, plus per-item errors when not atomic.
+    Raises:
+        HTTPException: 404 if an atomic batch references a missing climb.
+    """
+    climb_ids = {item.climb_id for item in batch.items}
+    existing = set(session.exec(select(Climb.id).where(Climb.id.in_(climb_ids))).all())
+    errors = [
+        AscentBatchError(index=index, code="climb_not_found", message=f"Climb {item.climb_id} not found")
+        for index, item in enumerate(batch.items)
+        if item.climb_id not in existing
+    ]
+    if errors and batch.atomic:
+        raise HTTPException(status_code=404, detail={
+            "code": "climb_not_found",
+            "message": "Batch references missing climbs; nothing was saved",
+            "errors": [error.model_dump() for error in errors],
+        })
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": current_user.id,
+            "climb_id": item.climb_id,
+            "date": item.date or now,
+            "grade": item.grade,
+            "difficulty": grade_rank(item.grade),
+            "notes": item.notes,
+            "sent": item.sent,
+            "quality_rating": item.quality_rating,
+        }
+        for item in batch.items
+        if item.climb_id in existing
+    ]
+    created = []
+    if rows:
+        try:
+            # Core insert so every row shares one multi-row INSERT ... RETURNING, in request order
+            table = Ascent.__table__
+            result = session.execute(insert(table).returning(*table.c, sort_by_parameter_order=True), rows)
+            ascents = [Ascent(**row._mapping) for row in result]
+            record_ascents(session, ascents)
+            # Serialize before commit expires the rows, to avoid a refresh per ascent
+            created = [AscentRead.model_validate(ascent, from_attributes=True) for ascent in ascents]
+            gyms = gyms_of_climbs(session, existing)
+            climbs = leaderboard.loaded_climbs(session, existing)
+            scores = leaderboard.record_ascent_rows(session, rows, climbs=climbs)
+            rollups.record_ascent_rows(session, rows, climbs=climbs)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise HTTPException(status_code=500, detail={"code": "internal_error", "message": str(e)})
+        leaderboard.scores_changed(session, scores)
+        announce_ascents(session, created, gyms)
+    return AscentBatchResult(created=created, errors=errors)
+
 from fastapi import Query
 from pydantic import conint
 
 @router.get("/", response_model=List[AscentRead])
 def list_user_ascents(
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
     limit: conint(ge=1, le=100) = Query(10, description="Max results to return (1-100)"),
-    offset: conint(ge=0) = Query(0, description="Results to skip (pagination)")
+    offset: conint(ge=0) = Query(0, description="Results to skip (legacy pagination)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header")
 ):
+    """
+    List the current user's ascents, newest first.
+    """
+    statement = keyset_page(
+        select(Ascent).where(Ascent.user_id == current_user.id),
+        Ascent.date, Ascent.id, cursor, limit, offset, descending=True,
+    )
     try:
-        ascents = session.exec(
-            select(Ascent)
-            .where(Ascent.user_id == current_user.id)
-            .offset(offset)
-            .limit(limit)
-        ).all()
-        return ascents
+        ascents = session.exec(statement).all()
+        return finish_page(ascents, limit, response, "date")
     except Exception as e:
         raise HTTPException(status_code=500, detail={"code": "internal_error", "message": str(e)})
 
 @router.get("/climb/{climb_id}", response_model=List[AscentRead])
 def list_ascents_for_climb(
     climb_id: int,
+    response: Response,
     session: Session = Depends(get_session),
     limit: conint(ge=1, le=100) = Query(10, description="Max results to return (1-100)"),
-    offset: conint(ge=0) = Query(0, description="Results to skip (pagination)")
+    offset: conint(ge=0) = Query(0, description="Results to skip (legacy pagination)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header")
 ):
+    """
+    List ascents of a climb, newest first.
+    """
+    statement = keyset_page(
+        select(Ascent).where(Ascent.climb_id == climb_id),
+        Ascent.date, Ascent.id, cursor, limit, offset, descending=True,
+    )
     try:
-        ascents = session.exec(
-            select(Ascent)
-            .where(Ascent.climb_id == climb_id)
-            .offset(offset)
-            .limit(limit)
-        ).all()
-        return ascents
+        ascents = session.exec(statement).all()
+        return finish_page(ascents, limit, response, "date")
     except Exception as e:
         raise HTTPException(status_code=500, detail={"code": "internal_error", "message": str(e)})
+
+EXPORT_COLUMNS = (
+    (Ascent.id, "id"), (Ascent.date, "date"), (Ascent.sent, "sent"), (Ascent.grade, "grade"),
+    (Ascent.quality_rating, "quality_rating"), (Ascent.notes, "notes"), (Ascent.climb_id, "climb_id"),
+    (Climb.gym_id, "gym_id"), (Gym.name, "gym_name"), (Climb.color, "color"), (Climb.setter, "setter"),
+    (Climb.section, "section"), (Climb.setter_grade, "setter_grade"),
+)
+EXPORT_BATCH_SIZE = 1000
+
+def export_rows(engine, user_id: int, fmt: str) -> Iterator[str]:
+    """
+    Stream a user's ascents, oldest first, as NDJSON lines or CSV.
+
+    Uses its own session because the request's session is closed before the body
+    is streamed. Rows come off the cursor ``EXPORT_BATCH_SIZE`` at a time, so memory
+    stays flat however long the history is.
+    """
+    names = [name for _, name in EXPORT_COLUMNS]
+    statement = (
+        select(*[column for column, _ in EXPORT_COLUMNS])
+        .join(Climb, Climb.id == Ascent.climb_id)
+        .join(Gym, Gym.id == Climb.gym_id)
+        .where(Ascent.user_id == user_id)
+        .order_by(Ascent.date, Ascent.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE, stream_results=True)
+    )
+    if fmt == "csv":
+        # Header goes out before the query runs, so the first byte is immediate
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        yield buffer.getvalue()
+    with Session(engine) as session:
+        for partition in session.execute(statement).partitions():
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                    for row in partition
+                )
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(dict(zip(names, row)), default=datetime.isoformat) + "\n" for row in partition)
+
+@router.get("/export", response_class=StreamingResponse)
+def export_ascents(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download the current user's whole ascent history with climb and gym details.
+
+    Args:
+        format (str): ``ndjson`` (one JSON object per line) or ``csv``.
+    Returns:
+        StreamingResponse: The history, oldest first, streamed from a server-side cursor.
+    """
+    # Async mode streams through the sync engine; the async session's bind can't be used off the event loop
+    engine = db.engine if db.ASYNC_DB else session.get_bind()
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"ascents-{current_user.username}.{format}"
+    return StreamingResponse(
+        export_rows(engine, current_user.id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/import", response_model=AscentImportResult)
+async def import_ascents(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Import an ascent history for the current user, e.g. a file from ``GET /ascents/export``.
+
+    The file is the raw request body (``curl --data-binary @history.csv``) and is
+    parsed as it arrives, so uploads of any size use flat memory. Records are
+    written in chunks, each in its own transaction; bad records are skipped and
+    reported by line number.
+
+    Args:
+        format (str): ``ndjson`` (one JSON object per line) or ``csv`` with a header row.
+    Returns:
+        AscentImportResult: Counts of imported and failed records, and the first errors.
+    """
+    body = request.stream()
+
+    async def receive() -> Optional[bytes]:
+        try:
+            return await body.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def chunks() -> Iterator[bytes]:
+        # Runs in the worker thread, pulling the body from the event loop as parsing needs it
+        while (chunk := anyio.from_thread.run(receive)) is not None:
+            yield chunk
+
+    importer = AscentImporter(session, current_user.id)
+    result = await run_in_threadpool(importer.run, iter_records(iter_lines(chunks()), format))
+    # One summary event per gym rather than one per imported ascent
+    for gym_id, count in importer.gym_counts.items():
+        feed.publish(gym_id, "ascents.imported", {"user_id": current_user.id, "count": count})
+    return result
@@ -1,32 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from app.schemas.core import UserCreate, UserRead
 from app.models.core import User
-from app.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from app.auth import create_access_token, get_current_user
 from app.db import get_session
+from app.hashing import hasher
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# register and login are async so bcrypt runs on the dedicated hasher executor instead of
+# holding a shared threadpool worker; their short DB calls are offloaded with run_in_threadpool.
+
+def _check_available(session: Session, user: UserCreate) -> None:
+    if session.exec(select(User).where(User.username == user.username)).first():
+        raise HTTPException(status_code=400, detail="Username already registered")
+    if session.exec(select(User).where(User.email == user.email)).first():
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+def _save(session: Session, db_user: User) -> User:
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+    return db_user
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, session: Session = Depends(get_session)):
+async def register(user: UserCreate, session: Session = Depends(get_session)):
     import traceback
     try:
-        if session.exec(select(User).where(User.username == user.username)).first():
-            raise HTTPException(status_code=400, detail="Username already registered")
-        if session.exec(select(User).where(User.email == user.email)).first():
-            raise HTTPException(status_code=400, detail="Email already registered")
+        await run_in_threadpool(_check_available, session, user)
         db_user = User(
             username=user.username,
             email=user.email,
-            hashed_password=get_password_hash(user.password),
+            hashed_password=await hasher.hash(user.password),
             is_public=user.is_public
         )
-        session.add(db_user)
-        session.commit()
-        session.refresh(db_user)
-        return db_user
+        return await run_in_threadpool(_save, session, db_user)
+    except HTTPException:
+        raise
     except Exception as e:
         with open("register_errors.log", "a") as f:
             f.write("[REGISTER ERROR] " + str(e) + "\n")
@@ -41,10 +54,19 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.username == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
+    user = await run_in_threadpool(
+        lambda: session.exec(select(User).where(User.username == form_data.username)).first()
+    )
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+    valid, new_hash = await hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
+    if new_hash:
+        # Stored hash used an outdated cost factor; upgrade it transparently
+        user.hashed_password = new_hash
+        await run_in_threadpool(_save, session, user)
     token = create_access_token({"sub": user.username})
     return {"access_token": token, "token_type": "bearer"}
 
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+from app.db import get_session
+from app.models.core import Climb
+from app.models.stats import ClimbStats
+from app.schemas.stats import ClimbStatsRead
+from app.climb_stats import to_read
+
+router = APIRouter(prefix="/climbs", tags=["climbs"])
+
+@router.get("/{climb_id}/stats", response_model=ClimbStatsRead)
+def get_climb_stats(climb_id: int, session: Session = Depends(get_session)) -> ClimbStatsRead:
+    """
+    Get consensus grade, quality and ascent counts for a climb.
+
+    Reads the materialized ClimbStats row, so cost does not depend on the number of ascents.
+    Raises:
+        HTTPException: 404 if the climb does not exist.
+    """
+    if session.get(Climb, climb_id) is None:
+        raise HTTPException(status_code=404, detail="Climb not found")
+    return to_read(climb_id, session.get(ClimbStats, climb_id))
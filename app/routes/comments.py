@@ -1,36 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Literal, Optional
 from app.db import get_session
 from app.models.comment import Comment
 from app.models.core import Climb, User
 from app.schemas.comment import CommentCreate, CommentRead
 from app.auth import get_current_user
+from app.pagination import keyset_page, finish_page
+from app.cache import TTLCache
+from app.http_cache import response_cache
+from app import comment_summary, feed
 
 router = APIRouter(prefix="/climbs", tags=["comments"])
 
+# A climb never moves gym, so its gym id can be cached for the response-cache scope
+climb_gyms = TTLCache("climb_gyms", maxsize=8192, ttl=3600)
+
+def climb_gym_id(session: Session, climb_id: int) -> Optional[int]:
+    """
+    Return the gym id of a climb, or None if the climb does not exist.
+    """
+    key = (session.get_bind(), climb_id)
+    gym_id = climb_gyms.get(key)
+    if gym_id is None:
+        gym_id = session.exec(select(Climb.gym_id).where(Climb.id == climb_id)).first()
+        if gym_id is not None:
+            climb_gyms.set(key, gym_id)
+    return gym_id
+
 from fastapi import Query
 from pydantic import conint
 
 @router.get("/{climb_id}/comments", response_model=List[CommentRead])
 def list_comments(
     climb_id: int,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     limit: conint(ge=1, le=100) = Query(10, description="Max results to return (1-100)"),
-    offset: conint(ge=0) = Query(0, description="Results to skip (pagination)")
+    offset: conint(ge=0) = Query(0, description="Results to skip (legacy pagination)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    order: Literal["asc", "desc"] = Query("asc", description="asc: oldest first, desc: newest first"),
 ):
     """
-    List comments for a climb with pagination.
+    List comments for a climb, oldest first (``order=desc`` for newest first), with cursor pagination.
+
+    ``ix_comment_climb_id_created_at`` serves the filter, the order in either
+    direction and the cursor seek, so deep pages of a long thread need no sort.
+    A cursor is only valid for the order it came from. Response-cached under the
+    version of the climb's gym.
     """
+    def load():
+        statement = keyset_page(
+            select(Comment).where(Comment.climb_id == climb_id),
+            Comment.created_at, Comment.id, cursor, limit, offset, descending=order == "desc",
+        )
+        try:
+            comments = session.exec(statement).all()
+            return finish_page(comments, limit, response, "created_at")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail={"code": "internal_error", "message": str(e)})
+
+    gym_id = climb_gym_id(session, climb_id)
+    if gym_id is None:
+        return load()
+    return response_cache.respond(request, response, session, f"gym:{gym_id}", List[CommentRead], load)
+
+@router.get("/comments/me", response_model=List[CommentRead])
+def list_my_comments(
+    response: Response,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    limit: conint(ge=1, le=100) = Query(10, description="Max results to return (1-100)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header")
+):
+    """
+    List the current user's comments on any climb, newest first, with cursor pagination.
+
+    Served by ``ix_comment_user_id_created_at``.
+    """
+    statement = keyset_page(
+        select(Comment).where(Comment.user_id == current_user.id),
+        Comment.created_at, Comment.id, cursor, limit, descending=True,
+    )
     try:
-        comments = session.exec(
-            select(Comment)
-            .where(Comment.climb_id == climb_id)
-            .order_by(Comment.created_at)
-            .offset(offset)
-            .limit(limit)
-        ).all()
-        return comments
+        comments = session.exec(statement).all()
+        return finish_page(comments, limit, response, "created_at")
     except Exception as e:
         raise HTTPException(status_code=500, detail={"code": "internal_error", "message": str(e)})
 
@@ -38,6 +93,8 @@ def list_comments(
 def add_comment(climb_id: int, comment: CommentCreate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
     """
     Add a comment to a climb (auth required).
+
+    The climb's comment count and latest-comment preview change in the same transaction.
     """
     climb = session.get(Climb, climb_id)
     if not climb:
@@ -49,9 +106,14 @@ def add_comment(climb_id: int, comment: CommentCreate, session: Session = Depend
         text=comment.text,
     )
     session.add(db_comment)
+    session.flush()
+    comment_summary.record_comment(session, db_comment)
     session.commit()
     session.refresh(db_comment)
-    return db_comment
+    response_cache.bump(session, f"gym:{climb.gym_id}")
+    created = CommentRead.model_validate(db_comment, from_attributes=True)
+    feed.publish(climb.gym_id, "comment.created", created.model_dump(mode="json"))
+    return created
 
 @router.delete("/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_comment(comment_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
@@ -63,6 +125,13 @@ def delete_comment(comment_id: int, session: Session = Depends(get_session), cur
         raise HTTPException(status_code=404, detail="Comment not found")
     if comment.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed to delete this comment")
+    gym_id = climb_gym_id(session, comment.climb_id)
+    deleted = {"id": comment.id, "climb_id": comment.climb_id}
     session.delete(comment)
+    session.flush()
+    comment_summary.remove_comment(session, comment)
     session.commit()
+    if gym_id is not None:
+        response_cache.bump(session, f"gym:{gym_id}")
+        feed.publish(gym_id, "comment.deleted", deleted)
     return None
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, update
 from sqlmodel import Session, select
-from typing import List
+from enum import Enum
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta
 from pydantic import BaseModel, conint
+from app.aio import offload
 from app.db import get_session
-from app.models.core import Gym, Climb
-from app.schemas.core import GymCreate, GymRead, ClimbCreate, ClimbRead
+from app.models.core import Gym, Climb, ClimbRating, climb_difficulty
+from app.schemas.core import GymCreate, GymRead, ClimbBulkCreate, ClimbBulkResult, ClimbCreate, ClimbRead, ClimbSuggestion
+from app import feed, suggest
+from app.grades import grade_rank, normalize_grade
 from app.auth import get_current_user
 from app.models.core import User
+from app.pagination import MAX_PAGE_SIZE, keyset_page, finish_page
+from app.http_cache import response_cache
 
 router = APIRouter(prefix="/gyms", tags=["gyms"])
 
@@ -26,25 +35,43 @@ def create_gym(gym: GymCreate, session: Session = Depends(get_session)) -> GymRe
     except Exception as e:
         session.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create gym: {str(e)}")
+    response_cache.bump(session, "gyms")
     return db_gym
 
 @router.get("/", response_model=List[GymRead])
-def list_gyms(skip: int = 0, limit: int = 100, session: Session = Depends(get_session)) -> List[GymRead]:
+def list_gyms(
+    request: Request,
+    response: Response,
+    skip: conint(ge=0) = 0,
+    limit: conint(ge=1) = MAX_PAGE_SIZE,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    session: Session = Depends(get_session)
+) -> List[GymRead]:
     """
-    List all gyms with pagination.
+    List all gyms ordered by id. Pass ``cursor`` for keyset pagination; ``skip`` is legacy.
+
+    Served through the response cache; new gyms bump the ``gyms`` version.
     """
-    gyms = session.exec(select(Gym).offset(skip).limit(limit)).all()
-    return gyms
+    # These listings took any limit before cursor pagination; a full page beats a 422
+    limit = min(limit, MAX_PAGE_SIZE)
+    def load():
+        gyms = session.exec(keyset_page(select(Gym), None, Gym.id, cursor, limit, skip)).all()
+        return finish_page(gyms, limit, response)
+
+    return response_cache.respond(request, response, session, "gyms", List[GymRead], load)
 
 @router.get("/{gym_id}", response_model=GymRead)
-def get_gym(gym_id: int, session: Session = Depends(get_session)) -> GymRead:
+def get_gym(gym_id: int, request: Request, response: Response, session: Session = Depends(get_session)) -> GymRead:
     """
-    Get a gym by ID.
+    Get a gym by ID (response-cached under the gym's version).
     """
-    gym = session.get(Gym, gym_id)
-    if not gym:
-        raise HTTPException(status_code=404, detail="Gym not found")
-    return gym
+    def load():
+        gym = session.get(Gym, gym_id)
+        if not gym:
+            raise HTTPException(status_code=404, detail="Gym not found")
+        return gym
+
+    return response_cache.respond(request, response, session, f"gym:{gym_id}", GymRead, load)
 
 @router.post("/{gym_id}/climbs/", response_model=ClimbRead, status_code=status.HTTP_201_CREATED)
 def create_climb_for_gym(
@@ -68,15 +95,204 @@ def create_climb_for_gym(
     except Exception as e:
         session.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create climb: {str(e)}")
-    return db_climb
+    suggest.climb_added(session, db_climb)
+    response_cache.bump(session, f"gym:{gym_id}")
+    created = ClimbRead.model_validate(db_climb, from_attributes=True)
+    feed.publish(gym_id, "climb.created", created.model_dump(mode="json"))
+    return created
+
+@router.post("/{gym_id}/climbs/bulk", response_model=ClimbBulkResult, status_code=status.HTTP_201_CREATED)
+def create_climbs_bulk(
+    gym_id: int,
+    batch: ClimbBulkCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+) -> ClimbBulkResult:
+    """
+    Add a set of climbs in one transaction, optionally archiving the section they replace.
+
+    The climbs are written with one multi-row INSERT ... RETURNING, and the suggestion
+    index, response cache and live feed are each updated once for the whole set.
+
+    Args:
+        gym_id (int): The gym being reset.
+        batch (ClimbBulkCreate): New climbs, and the section whose current climbs they replace.
+        session (Session): DB session.
+        current_user (User): The authenticated user.
+    Returns:
+        ClimbBulkResult: The created climbs and the ids of the archived ones.
+    Raises:
+        HTTPException: 404 if the gym does not exist.
+    """
+    if not session.get(Gym, gym_id):
+        raise HTTPException(status_code=404, detail="Gym not found")
+    rows = [
+        {**climb.model_dump(), "gym_id": gym_id, "difficulty": climb_difficulty(climb.setter_grade)}
+        for climb in batch.climbs
+    ]
+    try:
+        archived = []
+        if batch.replace_section is not None:
+            archived = sorted(session.execute(
+                update(Climb)
+                .where(Climb.gym_id == gym_id, Climb.section == batch.replace_section, Climb.archived_at.is_(None))
+                .values(archived_at=datetime.utcnow())
+                .returning(Climb.id)
+            ).scalars())
+        # Core insert so the whole set is one statement, with RETURNING rows in upload order
+        table = Climb.__table__
+        result = session.execute(insert(table).returning(*table.c, sort_by_parameter_order=True), rows)
+        created = [ClimbRead.model_validate(row._mapping) for row in result]
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to create climbs: {str(e)}")
+    suggest.climbs_replaced(session, gym_id, created, archived)
+    response_cache.bump(session, f"gym:{gym_id}")
+    feed.publish(gym_id, "climbs.created", {
+        "climbs": [climb.model_dump(mode="json") for climb in created],
+        "archived": archived,
+    })
+    return ClimbBulkResult(created=created, archived=archived)
+
+@router.get("/{gym_id}/feed", response_class=StreamingResponse)
+async def gym_feed(
+    gym_id: int,
+    request: Request,
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Stream a gym's new climbs, ratings, ascents and comments as Server-Sent Events.
+
+    Browsers' EventSource reconnects with ``Last-Event-ID`` and gets the events it
+    missed; a ``reset`` event means too many were missed and lists should be refetched.
+    Slow consumers receive ``dropped`` and are disconnected.
+    """
+    resume_from = last_event_id if last_event_id is not None else last_event_id_header
+    subscriber, backlog, gap = feed.bus.subscribe(gym_id, resume_from)
+    return StreamingResponse(
+        feed.sse_stream(subscriber, backlog, gap, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{gym_id}/climbs/suggest", response_model=List[ClimbSuggestion])
+def suggest_climbs(
+    gym_id: int,
+    q: Optional[str] = Query(None, description="Free text, e.g. 'blue cave v3'"),
+    color: Optional[str] = None,
+    setter: Optional[str] = None,
+    section: Optional[str] = None,
+    grade: Optional[str] = None,
+    limit: conint(ge=1, le=50) = 10,
+    session: Session = Depends(get_session)
+) -> List[ClimbSuggestion]:
+    """
+    Suggest existing climbs matching what the user is typing, best match first.
+
+    Served from an in-memory per-gym trigram index, so keystrokes do not scan the climb table.
+    """
+    index = suggest.get_index(session, gym_id)
+    matches = offload(index.search, q=q, color=color, setter=setter, section=section, grade=grade, limit=limit)
+    return [ClimbSuggestion(**climb.model_dump(), score=score) for score, climb in matches]
+
+class ClimbSort(str, Enum):
+    date = "date"
+    grade = "grade"
+    popularity = "popularity"
+    quality = "quality"
+
+# Sort option -> (column, attribute carried in the cursor)
+CLIMB_SORT_KEYS = {
+    ClimbSort.date: (Climb.date_added, "date_added"),
+    ClimbSort.grade: (Climb.difficulty, "difficulty"),
+    ClimbSort.popularity: (Climb.ascent_count, "ascent_count"),
+    ClimbSort.quality: (Climb.quality_average, "quality_average"),
+}
+DEFAULT_CLIMB_WINDOW = timedelta(days=183)
+
+def filter_climbs(gym_id: int, since: Optional[datetime] = None, grade: Optional[str] = None,
+                  setter: Optional[str] = None, section: Optional[str] = None, color: Optional[str] = None,
+                  include_archived: bool = False, min_difficulty: Optional[float] = None,
+                  max_difficulty: Optional[float] = None):
+    """
+    Select a gym's climbs matching the listing filters.
+
+    Recognised grades match on the numeric difficulty so "v3" finds "V3" and
+    "6A" finds "f6a"; anything else must equal the setter grade exactly. The
+    difficulty bounds are inclusive. Archived climbs are left out unless
+    ``include_archived`` is set.
+    """
+    statement = select(Climb).where(Climb.gym_id == gym_id)
+    if not include_archived:
+        statement = statement.where(Climb.archived_at.is_(None))
+    if since is not None:
+        statement = statement.where(Climb.date_added >= since)
+    if grade:
+        rank = grade_rank(normalize_grade(grade))
+        statement = statement.where(Climb.difficulty == rank if rank is not None else Climb.setter_grade == grade)
+    if min_difficulty is not None:
+        statement = statement.where(Climb.difficulty >= min_difficulty)
+    if max_difficulty is not None:
+        statement = statement.where(Climb.difficulty <= max_difficulty)
+    for column, value in ((Climb.setter, setter), (Climb.section, section), (Climb.color, color)):
+        if value:
+            statement = statement.where(column == value)
+    return statement
 
 @router.get("/{gym_id}/climbs/", response_model=List[ClimbRead])
-def list_climbs_for_gym(gym_id: int, skip: int = 0, limit: int = 100, session: Session = Depends(get_session)) -> List[ClimbRead]:
+def list_climbs_for_gym(
+    gym_id: int,
+    request: Request,
+    response: Response,
+    skip: conint(ge=0) = 0,
+    limit: conint(ge=1) = MAX_PAGE_SIZE,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    since: Optional[datetime] = Query(None, description="Oldest date_added to include; defaults to six months ago"),
+    all_time: bool = Query(False, description="Ignore the default six-month window"),
+    grade: Optional[str] = None,
+    min_grade: Optional[str] = Query(None, description="Easiest grade to include, on any supported scale"),
+    max_grade: Optional[str] = Query(None, description="Hardest grade to include, on any supported scale"),
+    setter: Optional[str] = None,
+    section: Optional[str] = None,
+    color: Optional[str] = None,
+    include_archived: bool = Query(False, description="Also list climbs taken down in a reset"),
+    sort: ClimbSort = ClimbSort.date,
+    order: Literal["asc", "desc"] = "desc",
+    session: Session = Depends(get_session)
+) -> List[ClimbRead]:
     """
-    List all climbs for a gym with pagination.
+    List climbs for a gym, newest first by default.
+
+    Only climbs added in the last six months are returned unless ``since`` or
+    ``all_time`` is given, and archived climbs only with ``include_archived``. Every filter/sort combination is served by one of the
+    ``ix_climb_gym_id_*`` indexes. Pass ``cursor`` for keyset pagination (the cursor
+    is only valid for the sort it came from); ``skip`` is legacy. Responses are cached
+    under the gym's version, so the default window's lower edge can lag by up to the cache TTL.
+    Raises:
+        HTTPException: 422 if ``min_grade`` or ``max_grade`` is not a recognised grade.
     """
-    climbs = session.exec(select(Climb).where(Climb.gym_id == gym_id).offset(skip).limit(limit)).all()
-    return climbs
+    limit = min(limit, MAX_PAGE_SIZE)
+    key_column, key_attr = CLIMB_SORT_KEYS[sort]
+    bounds = []
+    for name, value in (("min_grade", min_grade), ("max_grade", max_grade)):
+        rank = grade_rank(value) if value else None
+        if value and rank is None:
+            raise HTTPException(status_code=422, detail=f"Unrecognised grade for {name}: {value!r}")
+        bounds.append(rank)
+
+    def load(since=since):
+        if since is None and not all_time:
+            since = datetime.utcnow() - DEFAULT_CLIMB_WINDOW
+        statement = keyset_page(
+            filter_climbs(gym_id, since, grade, setter, section, color, include_archived, *bounds),
+            key_column, Climb.id, cursor, limit, skip, descending=order == "desc",
+        )
+        climbs = session.exec(statement).all()
+        return finish_page(climbs, limit, response, key_attr)
+
+    return response_cache.respond(request, response, session, f"gym:{gym_id}", List[ClimbRead], load)
 
 class ClimbRatingUpdate(BaseModel):
     rating: conint(ge=1, le=5)
@@ -90,6 +306,8 @@ def update_climb_rating(
 ) -> ClimbRead:
     """
     Update the rating for a climb. Requires authentication.
+
+    The rating is stored per user in ClimbRating; Climb.rating keeps the latest value.
     Args:
         climb_id (int): The climb's ID.
         rating_update (ClimbRatingUpdate): The new rating (1-5).
@@ -103,8 +321,19 @@ def update_climb_rating(
     climb = session.get(Climb, climb_id)
     if not climb:
         raise HTTPException(status_code=404, detail="Climb not found")
+    user_rating = session.exec(
+        select(ClimbRating).where(ClimbRating.user_id == current_user.id, ClimbRating.climb_id == climb_id)
+    ).first()
+    if user_rating is None:
+        user_rating = ClimbRating(user_id=current_user.id, climb_id=climb_id, rating=rating_update.rating)
+    else:
+        user_rating.rating = rating_update.rating
+        user_rating.rated_at = datetime.utcnow()
     climb.rating = rating_update.rating
+    session.add(user_rating)
     session.add(climb)
     session.commit()
     session.refresh(climb)
+    response_cache.bump(session, f"gym:{climb.gym_id}")
+    feed.publish(climb.gym_id, "climb.rated", {"climb_id": climb.id, "rating": climb.rating})
     return climb
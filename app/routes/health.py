@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from app import db
+from app.cache import registry
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/db")
+def database_health() -> dict:
+    """
+    Report connection pool checkout/wait metrics for the active engine.
+    """
+    active = db.async_engine if db.ASYNC_DB else db.engine
+    return {
+        "dialect": active.dialect.name,
+        "async": db.ASYNC_DB,
+        "pool": db.pool_metrics.snapshot(active.pool),
+    }
+
+@router.get("/caches")
+def cache_health() -> dict:
+    """
+    Report size and hit rate for every in-process cache.
+    """
+    return {name: cache.stats() for name, cache in registry.items()}
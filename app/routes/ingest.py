@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlmodel import Session, select
+from typing import Optional
+from uuid import uuid4
+from app.db import get_session
+from app.ingest import AscentIngestor
+from app.models.ascents import Ascent
+from app.models.core import User
+from app.schemas.ascents import AscentCreate, AscentQueued, MAX_IDEMPOTENCY_KEY_LENGTH
+from app.auth import get_current_user
+from app.routes.comments import climb_gym_id
+
+router = APIRouter(prefix="/ascents", tags=["ascents"])
+
+def get_ingestor(request: Request) -> AscentIngestor:
+    return request.app.state.ingestor
+
+@router.post("/ingest", response_model=AscentQueued, status_code=status.HTTP_202_ACCEPTED)
+def ingest_ascent(
+    ascent: AscentCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=MAX_IDEMPOTENCY_KEY_LENGTH),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    ingestor: AscentIngestor = Depends(get_ingestor),
+):
+    """
+    Log an ascent through the write-behind queue (only mounted with ``ASCENT_INGEST_ENABLED``).
+
+    Answers 202 once the ascent is in the journal on disk; it is written to the
+    database with the next batch. Send the same ``Idempotency-Key`` header when
+    retrying: a queued ascent is not queued twice, and a stored one is answered
+    with 200 and its id. Without the header a key is generated and returned.
+
+    Raises:
+        HTTPException: 503 if the queue's writer is not running, 404 if the climb does not exist.
+    """
+    if not ingestor.alive():
+        # Nothing would drain the queue; let the client retry elsewhere or later
+        raise HTTPException(status_code=503, detail="Ascent ingest queue is not running")
+    if climb_gym_id(session, ascent.climb_id) is None:
+        raise HTTPException(status_code=404, detail="Climb not found")
+    key = idempotency_key or uuid4().hex
+    stored = session.exec(
+        select(Ascent.id).where(Ascent.user_id == current_user.id, Ascent.idempotency_key == key)
+    ).first()
+    if stored is not None:
+        response.status_code = status.HTTP_200_OK
+        return AscentQueued(idempotency_key=key, status="stored", id=stored)
+    # Hand the connection back to the pool before waiting on the journal fsync
+    session.close()
+    ingestor.submit(current_user.id, ascent, key)
+    return AscentQueued(idempotency_key=key, status="queued")
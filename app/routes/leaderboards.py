@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import conint
+from sqlmodel import Session, select
+from typing import Dict, Iterable, Literal
+from app.auth import get_current_user
+from app.db import get_session
+from app.leaderboard import display_score, get_leaderboard
+from app.models.core import Gym, User
+from app.schemas.stats import LeaderboardEntry, LeaderboardRead
+
+router = APIRouter(prefix="/gyms", tags=["leaderboards"])
+
+Board = Literal["sends", "hardest", "active"]
+Window = Literal["week", "month", "all"]
+
+def usernames(session: Session, user_ids: Iterable[int]) -> Dict[int, str]:
+    ids = set(user_ids)
+    if not ids:
+        return {}
+    return dict(session.exec(select(User.id, User.username).where(User.id.in_(ids))).all())
+
+@router.get("/{gym_id}/leaderboard", response_model=LeaderboardRead)
+def read_leaderboard(
+    gym_id: int,
+    board: Board = Query("sends", description="sends, hardest (best send's difficulty) or active (sends + attempts)"),
+    window: Window = Query("week", description="Current week, current month or all time"),
+    limit: conint(ge=1, le=100) = 10,
+    offset: conint(ge=0) = 0,
+    session: Session = Depends(get_session),
+) -> LeaderboardRead:
+    """
+    Get the top climbers at a gym for the current week, month or all time.
+
+    Served from an in-memory ranking kept up to date by ascent writes, so the
+    cost does not depend on the number of ascents; ties share a rank.
+    Raises:
+        HTTPException: 404 if the gym does not exist.
+    """
+    if session.get(Gym, gym_id) is None:
+        raise HTTPException(status_code=404, detail="Gym not found")
+    leaderboard = get_leaderboard(session, gym_id, window)
+    top = leaderboard.top(board, limit, offset)
+    names = usernames(session, (user_id for _, user_id, _ in top))
+    return LeaderboardRead(
+        gym_id=gym_id,
+        board=board,
+        window=window,
+        period_start=leaderboard.period,
+        total=leaderboard.size(board),
+        entries=[
+            LeaderboardEntry(rank=rank, user_id=user_id, username=names.get(user_id, ""), score=display_score(board, score))
+            for rank, user_id, score in top
+        ],
+    )
+
+@router.get("/{gym_id}/leaderboard/me", response_model=LeaderboardEntry)
+def read_my_rank(
+    gym_id: int,
+    board: Board = "sends",
+    window: Window = "week",
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> LeaderboardEntry:
+    """
+    Get the current user's rank and score on a gym leaderboard.
+
+    Raises:
+        HTTPException: 404 if the gym does not exist.
+    """
+    if session.get(Gym, gym_id) is None:
+        raise HTTPException(status_code=404, detail="Gym not found")
+    ranked = get_leaderboard(session, gym_id, window).rank(board, current_user.id)
+    entry = LeaderboardEntry(user_id=current_user.id, username=current_user.username)
+    if ranked is not None:
+        entry.rank, score = ranked
+        entry.score = display_score(board, score)
+    return entry
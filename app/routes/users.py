@@ -1,32 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, func
 from sqlmodel import Session, select
+from datetime import date, datetime, timedelta
 from app.db import get_session
-from app.models.core import User, Climb
-from typing import List, Optional
+from app.grades import grade_for_difficulty
+from app.models.ascents import Ascent
+from app.models.core import User, Climb, ClimbRating
+from app.rollups import MAX_BUCKETS, bucket_length, bucket_start, periods, read_rollups
+from app.schemas.core import UserProfile
+from app.schemas.stats import GymActivity, StatsBucket, UserStatsRead
+from typing import List, Literal, Optional
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/{username}")
-def get_user_profile(username: str, session: Session = Depends(get_session)):
+@router.get("/{username}", response_model=UserProfile)
+def get_user_profile(username: str, session: Session = Depends(get_session)) -> UserProfile:
     """
-    Get public profile for a user, including climbs and ratings.
+    Get public profile for a user, including climbs set, ratings and ascent summary.
+
+    Every query is scoped to the user through an index, so cost grows with the
+    user's own activity rather than the size of the climb catalog.
     Args:
         username (str): Username to fetch.
         session (Session): DB session.
     Returns:
-        dict: User info and activity.
+        UserProfile: User info and activity.
     Raises:
         HTTPException: 404 if user not found.
     """
     user = session.exec(select(User).where(User.username == username)).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    climbs = session.exec(select(Climb).where(Climb.setter == username)).all()
-    ratings = session.exec(select(Climb).where(Climb.rating != None)).all()
-    user_ratings = [c for c in ratings if getattr(c, 'rated_by', None) == username]
-    return {
-        "username": user.username,
-        "email": user.email,
-        "climbs_set": [c.id for c in climbs],
-        "ratings": [{"climb_id": c.id, "rating": c.rating} for c in user_ratings],
-    }
+    climbs_set = session.exec(select(Climb.id).where(Climb.setter == username).order_by(Climb.id)).all()
+    ratings = session.exec(
+        select(ClimbRating.climb_id, ClimbRating.rating).where(ClimbRating.user_id == user.id).order_by(ClimbRating.climb_id)
+    ).all()
+    ascent_count, send_count = session.exec(
+        select(func.count(Ascent.id), func.coalesce(func.sum(case((Ascent.sent, 1), else_=0)), 0))
+        .where(Ascent.user_id == user.id)
+    ).one()
+    # Top of ix_ascent_user_id_difficulty; unrecognised grades have no difficulty
+    hardest_send = session.exec(
+        select(Ascent.grade)
+        .where(Ascent.user_id == user.id, Ascent.sent, Ascent.difficulty.is_not(None))
+        .order_by(Ascent.difficulty.desc())
+        .limit(1)
+    ).first()
+    return UserProfile(
+        username=user.username,
+        email=user.email,
+        climbs_set=list(climbs_set),
+        ratings=[{"climb_id": climb_id, "rating": rating} for climb_id, rating in ratings],
+        ascent_count=ascent_count,
+        send_count=send_count,
+        hardest_send=hardest_send,
+    )
+
+@router.get("/{username}/stats", response_model=UserStatsRead)
+def get_user_stats(
+    username: str,
+    start: Optional[date] = Query(None, alias="from", description="First day to include (default: 12 weeks or 30 days before to)"),
+    end: Optional[date] = Query(None, alias="to", description="Last day to include (default: today)"),
+    bucket: Literal["day", "week"] = Query("week", description="Group by day or by week (starting Monday)"),
+    session: Session = Depends(get_session),
+) -> UserStatsRead:
+    """
+    Get a climber's sends, attempts, hardest send and per-gym volume over time.
+
+    Read from the per-user rollup rows kept up to date by ascent writes, so the
+    cost grows with the number of buckets requested, not with the climber's history.
+    The range is widened to whole buckets (Monday to Sunday for weeks), and the
+    response's ``start``/``end`` are the widened ones that its totals cover.
+    Args:
+        username (str): Username to fetch.
+        start (date | None): Start of the range (``from``).
+        end (date | None): End of the range (``to``), inclusive.
+        bucket (str): ``day`` or ``week``.
+        session (Session): DB session.
+    Returns:
+        UserStatsRead: One entry per bucket in the range, empty ones included, and range totals.
+    Raises:
+        HTTPException: 404 if user not found, 422 if the range is reversed or longer than MAX_BUCKETS buckets.
+    """
+    user = session.exec(select(User).where(User.username == username)).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    end = end or datetime.utcnow().date()
+    start = start or end - (timedelta(weeks=11) if bucket == "week" else timedelta(days=29))
+    if start > end:
+        raise HTTPException(status_code=422, detail="from must not be after to")
+    starts = periods(bucket, start, end)
+    if len(starts) > MAX_BUCKETS:
+        raise HTTPException(status_code=422, detail=f"Range covers more than {MAX_BUCKETS} {bucket} buckets")
+    # Rollups hold whole buckets, so the edge buckets count every day of theirs
+    start = bucket_start(bucket, start)
+    end = bucket_start(bucket, end) + bucket_length(bucket) - timedelta(days=1)
+
+    buckets = {period: StatsBucket(period_start=period) for period in starts}
+    for row in read_rollups(session, user.id, bucket, start, end):
+        entry = buckets[row.period]
+        entry.sends += row.sends
+        entry.attempts += row.attempts
+        if row.hardest and row.hardest > (entry.hardest or 0):
+            entry.hardest = row.hardest
+        entry.gyms.append(GymActivity(gym_id=row.gym_id, sends=row.sends, attempts=row.attempts))
+    for entry in buckets.values():
+        entry.hardest_grade = grade_for_difficulty(entry.hardest)
+    hardest = max((entry.hardest for entry in buckets.values() if entry.hardest), default=None)
+    return UserStatsRead(
+        username=user.username,
+        bucket=bucket,
+        start=start,
+        end=end,
+        sends=sum(entry.sends for entry in buckets.values()),
+        attempts=sum(entry.attempts for entry in buckets.values()),
+        hardest=hardest,
+        hardest_grade=grade_for_difficulty(hardest),
+        buckets=list(buckets.values()),
+    )
@@ -1,10 +1,12 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, conint
 
 class AscentBase(BaseModel):
     grade: Optional[str] = None
     notes: Optional[str] = None
+    sent: bool = True
+    quality_rating: Optional[conint(ge=1, le=5)] = None
 
 class AscentCreate(AscentBase):
     climb_id: int
@@ -15,6 +17,68 @@ class AscentRead(AscentBase):
     user_id: int
     climb_id: int
     date: datetime
+    difficulty: Optional[float] = None
 
     class Config:
         orm_mode = True
+
+MAX_BATCH_SIZE = 100
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+class AscentQueued(BaseModel):
+    """
+    Acknowledgement of ``POST /ascents/ingest``.
+
+    ``queued``: journaled, to be written with the next batch. ``stored``: a retry
+    of an ascent that is already saved, with its ``id``.
+    """
+    idempotency_key: str
+    status: Literal["queued", "stored"]
+    id: Optional[int] = None
+
+class AscentBatchCreate(BaseModel):
+    """
+    Ascents logged in one request, e.g. at the end of a session.
+
+    With ``atomic`` (the default) the batch is rejected if any item fails;
+    otherwise valid items are saved and failures are reported per item.
+    """
+    items: List[AscentCreate] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    atomic: bool = True
+
+class AscentBatchError(BaseModel):
+    index: int
+    code: str
+    message: str
+
+class AscentBatchResult(BaseModel):
+    created: List[AscentRead]
+    errors: List[AscentBatchError] = []
+
+class AscentImportRow(AscentBase):
+    """
+    One record of an uploaded ascent history.
+
+    The climb is given either by ``climb_id`` or by gym (``gym_id`` or ``gym_name``),
+    color, setter and section; the latter resolves to the matching climb that was
+    on the wall on the ascent's date. Unknown columns, such as the extra ones in
+    an export, are ignored.
+    """
+    date: Optional[datetime] = None
+    climb_id: Optional[int] = None
+    gym_id: Optional[int] = None
+    gym_name: Optional[str] = None
+    color: Optional[str] = None
+    setter: Optional[str] = None
+    section: Optional[str] = None
+
+class AscentImportError(BaseModel):
+    line: int
+    code: str
+    message: str
+
+class AscentImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[AscentImportError] = []
+    errors_truncated: bool = False
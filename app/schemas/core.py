@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, constr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, constr
+from typing import List, Optional
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -20,6 +20,22 @@ class UserRead(BaseModel):
     email: EmailStr
     is_public: bool
 
+class ClimbRatingRead(BaseModel):
+    climb_id: int
+    rating: int
+
+class UserProfile(BaseModel):
+    """
+    Public profile summary, computed from per-user indexed queries.
+    """
+    username: str
+    email: EmailStr
+    climbs_set: List[int] = []
+    ratings: List[ClimbRatingRead] = []
+    ascent_count: int = 0
+    send_count: int = 0
+    hardest_send: Optional[str] = None
+
 class GymCreate(BaseModel):
     name: str
     location: str
@@ -38,7 +54,10 @@ class ClimbCreate(BaseModel):
     date_added: datetime
     rating: int = 0  # 1-5, 0 if unrated
 
-class ClimbRead(BaseModel):
+class ClimbSummary(BaseModel):
+    """
+    A climb without its comment-thread summary, e.g. as held by the suggest index.
+    """
     id: int
     gym_id: int
     color: str
@@ -47,20 +66,37 @@ class ClimbRead(BaseModel):
     setter_grade: str
     date_added: datetime
     rating: int = 0  # 1-5, 0 if unrated
+    ascent_count: int = 0  # sends plus attempts
+    quality_average: float = 0.0  # mean ascent quality, 0 if unrated
+    archived_at: Optional[datetime] = None  # set once the climb is taken down
 
-class AscentCreate(BaseModel):
-    user_id: int
-    climb_id: int
-    date: datetime
-    sent: bool
-    personal_grade: str
-    quality_rating: int
+class ClimbRead(ClimbSummary):
+    comment_count: int = 0
+    last_comment_at: Optional[datetime] = None  # newest comment, None without comments
+    last_comment_username: Optional[str] = None
+    last_comment_preview: Optional[str] = None  # first 140 characters
 
-class AscentRead(BaseModel):
-    id: int
-    user_id: int
-    climb_id: int
-    date: datetime
-    sent: bool
-    personal_grade: str
-    quality_rating: int
+MAX_CLIMB_BATCH_SIZE = 100
+
+class ClimbBulkCreate(BaseModel):
+    """
+    A set of new climbs, e.g. from a section reset.
+
+    With ``replace_section`` the gym's current climbs in that section are archived
+    in the same transaction. Each item's ``gym_id`` is ignored in favour of the path's.
+    """
+    climbs: List[ClimbCreate] = Field(min_length=1, max_length=MAX_CLIMB_BATCH_SIZE)
+    replace_section: Optional[str] = None
+
+class ClimbBulkResult(BaseModel):
+    created: List[ClimbRead]
+    archived: List[int] = []  # ids of the climbs taken down
+
+class ClimbSuggestion(ClimbSummary):
+    """
+    A possible match for a climb being logged, with its similarity score (0-1).
+
+    Served from the suggest index, which comment writes don't update, so it has
+    no comment count or preview.
+    """
+    score: float
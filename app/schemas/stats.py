@@ -0,0 +1,71 @@
+from datetime import date
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+class ClimbStatsRead(BaseModel):
+    """
+    Consensus statistics for a climb.
+    """
+    climb_id: int
+    send_count: int = 0
+    attempt_count: int = 0
+    quality_average: Optional[float] = None
+    quality_count: int = 0
+    consensus_grade: Optional[str] = None
+    consensus_difficulty: Optional[float] = None
+    grade_histogram: Dict[str, int] = {}
+
+class LeaderboardEntry(BaseModel):
+    """
+    A climber's place on a leaderboard; rank is None when they have no score yet.
+    """
+    rank: Optional[int] = None
+    user_id: int
+    username: str
+    score: float = 0
+
+class LeaderboardRead(BaseModel):
+    """
+    A page of a gym leaderboard for the current week, month or all time.
+    """
+    gym_id: int
+    board: str
+    window: str
+    period_start: date
+    total: int
+    entries: List[LeaderboardEntry] = []
+
+class GymActivity(BaseModel):
+    """
+    A climber's sends and attempts at one gym within a stats bucket.
+    """
+    gym_id: int
+    sends: int = 0
+    attempts: int = 0
+
+class StatsBucket(BaseModel):
+    """
+    One day or week of a climber's activity; empty periods are listed with zeros.
+    """
+    period_start: date
+    sends: int = 0
+    attempts: int = 0
+    hardest: Optional[float] = None
+    hardest_grade: Optional[str] = None
+    gyms: List[GymActivity] = []
+
+class UserStatsRead(BaseModel):
+    """
+    A climber's activity over a date range, per day or week, with totals for the range.
+
+    ``start`` and ``end`` are widened to whole buckets, e.g. Monday to Sunday for weeks.
+    """
+    username: str
+    bucket: str
+    start: date
+    end: date
+    sends: int = 0
+    attempts: int = 0
+    hardest: Optional[float] = None
+    hardest_grade: Optional[str] = None
+    buckets: List[StatsBucket] = []
@@ -0,0 +1,325 @@
+"""
+Deterministic synthetic data for staging databases, load tests and benchmarks.
+
+Gyms, users, climbs, ascents and comments come from a seeded RNG, so the same
+arguments always build the same database. Loading is built for volume:
+
+* rows are generated a column at a time per chunk (``random.choices`` and list
+  comprehensions) and only zipped into tuples for the driver;
+* every user shares one precomputed bcrypt hash of ``PASSWORD``, so bcrypt never runs;
+* each chunk is one driver-level executemany, or ``COPY ... FROM STDIN`` on
+  PostgreSQL, bypassing the ORM and SQLAlchemy's per-row parameter handling;
+* secondary indexes are dropped before loading and built once at the end, and
+  SQLite loads with ``synchronous=OFF`` and a large page cache.
+
+Climb stats, leaderboards and rollups are then rebuilt from the ascents, and
+the climbs' comment counts and previews from the comments.
+The target database must have the current schema (``alembic upgrade head``)
+and no gyms, users, climbs, ascents or comments yet:
+
+    python -m app.seed --ascents 10000000 --users 100000 --climbs 1000000
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Table, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session
+
+from app.grades import grade_rank
+from app.models.ascents import Ascent
+from app.models.comment import Comment
+from app.models.core import Climb, Gym, User, climb_difficulty
+
+CHUNK_SIZE = 50_000
+PASSWORD = "password"
+# bcrypt (cost 12) of PASSWORD; logins rehash it if BCRYPT_ROUNDS differs
+PASSWORD_HASH = "$2b$12$UUY2PQaZIZDsWOU2kpoKDeXYmaCVmP1tD5U2TlwhHxXC8LQQ4VTtK"
+COLORS = ("Red", "Blue", "Green", "Yellow", "Black", "White", "Purple", "Orange", "Pink")
+SECTIONS = ("Cave", "Slab", "Arete", "Prow", "Roof", "Lead Wall", "Top Rope", "Kids Wall")
+GRADES = tuple(f"V{v}" for v in range(11)) + ("5.8", "5.9", "5.10a", "5.10c", "5.11a", "5.11c", "5.12a", "5.12c")
+# Seconds of history: climbs are up to two years old
+HISTORY = 730 * 86400
+TABLES = (Gym, User, Climb, Ascent, Comment)
+
+# A chunk is column name -> values, every list the same length
+Columns = Dict[str, list]
+
+
+class Generator:
+    """
+    Column-wise row generator for one dataset.
+
+    Climbs remember their age and grade so ascents fall after the climb was
+    set and mostly agree with its grade. Activity is Pareto-skewed, so a few
+    climbers log most of the ascents and comments.
+    """
+    def __init__(self, gyms: int, users: int, climbs: int, seed: int = 0, now: Optional[datetime] = None):
+        self.gyms, self.users, self.climbs = gyms, users, climbs
+        self.rng = random.Random(seed)
+        self.now = now or datetime.utcnow().replace(microsecond=0)
+        self.climb_age: List[int] = []
+        self.climb_grade: List[str] = []
+        self.difficulty = {grade: climb_difficulty(grade) for grade in GRADES}
+        self.ascent_difficulty = {grade: grade_rank(grade) for grade in GRADES}
+
+    def ago(self, seconds: Sequence[int]) -> List[datetime]:
+        now = self.now
+        return [now - timedelta(seconds=s) for s in seconds]
+
+    def active_users(self, n: int) -> List[int]:
+        rng, users, spread = self.rng, self.users, self.users // 10 or 1
+        return [(int(rng.paretovariate(1.2)) * 7919 + rng.randrange(spread)) % users + 1 for _ in range(n)]
+
+    def gym_rows(self, start: int, n: int) -> Columns:
+        ids = range(start + 1, start + n + 1)
+        return {"name": [f"Gym {i}" for i in ids], "location": [f"City {i % 50}" for i in ids]}
+
+    def user_rows(self, start: int, n: int) -> Columns:
+        ids = range(start + 1, start + n + 1)
+        return {
+            "username": [f"climber{i}" for i in ids],
+            "email": [f"climber{i}@example.com" for i in ids],
+            "hashed_password": [PASSWORD_HASH] * n,
+            "is_public": [i % 10 != 0 for i in ids],
+        }
+
+    def climb_rows(self, start: int, n: int) -> Columns:
+        rng = self.rng
+        grades = rng.choices(GRADES, k=n)
+        ages = [int(r * HISTORY) for r in [rng.random() for _ in range(n)]]
+        self.climb_grade.extend(grades)
+        self.climb_age.extend(ages)
+        return {
+            "gym_id": [i % self.gyms + 1 for i in range(start, start + n)],
+            "color": rng.choices(COLORS, k=n),
+            "setter": [f"setter{s}" for s in rng.choices(range(50), k=n)],
+            "section": rng.choices(SECTIONS, k=n),
+            "setter_grade": grades,
+            "date_added": self.ago(ages),
+            "rating": [0] * n,
+            "difficulty": [self.difficulty[g] for g in grades],
+            "ascent_count": [0] * n,
+            "quality_average": [0.0] * n,
+            "archived_at": [None] * n,
+            # Filled in from the comments once they are loaded
+            "comment_count": [0] * n,
+            "last_comment_id": [None] * n,
+            "last_comment_at": [None] * n,
+            "last_comment_username": [None] * n,
+            "last_comment_preview": [None] * n,
+        }
+
+    def ascent_rows(self, start: int, n: int) -> Columns:
+        rng = self.rng
+        random_ = rng.random
+        climbs = rng.choices(range(self.climbs), k=n)
+        age, climb_grade = self.climb_age, self.climb_grade
+        grades = [climb_grade[c] if random_() < 0.8 else None for c in climbs]
+        return {
+            "user_id": self.active_users(n),
+            "climb_id": [c + 1 for c in climbs],
+            "date": self.ago([int(random_() * age[c]) for c in climbs]),
+            "grade": grades,
+            "difficulty": [self.ascent_difficulty.get(g) for g in grades],
+            "notes": [None] * n,
+            "sent": [random_() < 0.7 for _ in range(n)],
+            "quality_rating": [int(random_() * 5) + 1 if random_() < 0.3 else None for _ in range(n)],
+            "idempotency_key": [None] * n,
+        }
+
+    def comment_rows(self, start: int, n: int) -> Columns:
+        rng = self.rng
+        users = self.active_users(n)
+        return {
+            "climb_id": [c + 1 for c in rng.choices(range(self.climbs), k=n)],
+            "user_id": users,
+            "username": [f"climber{u}" for u in users],
+            "text": [f"Beta #{b}: trust the feet" for b in rng.choices(range(1000), k=n)],
+            "created_at": self.ago([int(rng.random() * HISTORY) for _ in range(n)]),
+        }
+
+
+def write_columns(connection: Connection, table: Table, columns: Columns) -> int:
+    """
+    Insert one chunk of column values in a single driver call. Does not commit.
+
+    Values are converted with each column type's bind processor, as SQLAlchemy
+    would, but a column at a time. PostgreSQL gets ``COPY ... FROM STDIN`` (CSV),
+    other positional-parameter drivers one ``executemany``, and anything else
+    a Core executemany INSERT.
+
+    Returns:
+        int: Rows written.
+    """
+    names = list(columns)
+    rows = len(columns[names[0]])
+    if not rows:
+        return 0
+    if not connection.in_transaction():
+        # Driver-level writes don't start SQLAlchemy's transaction, so commit() would skip them
+        connection.begin()
+    dialect = connection.dialect
+    missing = {c.name for c in table.columns if not c.primary_key} - set(names)
+    if missing:
+        # Raw inserts skip Python-side column defaults
+        raise ValueError(f"{table.name}: no values for {sorted(missing)}")
+    preparer = dialect.identifier_preparer
+    column_list = ", ".join(preparer.quote(name) for name in names)
+
+    if dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(zip(*columns.values()))
+        sql = f"COPY {preparer.format_table(table)} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+        with connection.connection.driver_connection.cursor() as cursor:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        return rows
+
+    if dialect.paramstyle not in ("qmark", "format"):
+        connection.execute(insert(table), [dict(zip(names, row)) for row in zip(*columns.values())])
+        return rows
+    values = []
+    for name, column in columns.items():
+        process = table.c[name].type.bind_processor(dialect)
+        values.append(column if process is None else [None if v is None else process(v) for v in column])
+    mark = "?" if dialect.paramstyle == "qmark" else "%s"
+    connection.exec_driver_sql(
+        f"INSERT INTO {preparer.format_table(table)} ({column_list}) VALUES ({', '.join([mark] * len(names))})",
+        list(zip(*values)),
+    )
+    return rows
+
+
+@contextmanager
+def bulk_load(connection: Connection, tables: Sequence[Table]) -> Iterator[None]:
+    """
+    Drop the secondary indexes of ``tables`` for the duration of a load and build them once afterwards.
+
+    On SQLite the connection also runs with ``synchronous=OFF`` and a 256 MB page
+    cache (restored afterwards, as the connection goes back to the pool).
+    """
+    indexes = [index for table in tables for index in table.indexes]
+    sqlite = connection.dialect.name == "sqlite"
+    if sqlite:
+        saved = {
+            pragma: connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+            for pragma in ("synchronous", "cache_size")
+        }
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        connection.exec_driver_sql("PRAGMA cache_size=-262144")
+    for index in indexes:
+        index.drop(connection, checkfirst=True)
+    connection.commit()
+    try:
+        yield
+    finally:
+        connection.rollback()
+        for index in indexes:
+            index.create(connection, checkfirst=True)
+        connection.commit()
+        if sqlite:
+            for pragma, value in saved.items():
+                connection.exec_driver_sql(f"PRAGMA {pragma}={int(value)}")
+
+
+def seed_database(
+    bind: Engine,
+    gyms: int = 10,
+    users: int = 10_000,
+    climbs: int = 100_000,
+    ascents: int = 1_000_000,
+    comments: int = 100_000,
+    seed: int = 0,
+    derived: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[Callable[[str], None]] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Fill an empty database with synthetic gyms, users, climbs, ascents and comments.
+
+    Args:
+        bind (Engine): Engine for a database with the current schema and none of these rows.
+        gyms, users, climbs, ascents, comments (int): Rows to create.
+        seed (int): RNG seed; the same arguments (chunk size included) give the same rows.
+        derived (bool): Rebuild climb stats, leaderboards, rollups and comment summaries afterwards.
+        chunk_size (int): Rows per insert (and per commit).
+        progress (Callable | None): Called with a message after each table and phase.
+        now (datetime | None): End of the generated history (default: the current time).
+    Returns:
+        dict: Rows written per table.
+    """
+    from app.climb_stats import rebuild_climb_stats
+    from app.comment_summary import reconcile_comment_summaries
+    from app.leaderboard import rebuild_leaderboards
+    from app.rollups import rebuild_rollups
+
+    if (climbs and gyms < 1) or ((ascents or comments) and min(users, climbs) < 1):
+        raise ValueError("climbs need a gym, and ascents and comments a user and a climb")
+    report = progress or (lambda message: None)
+    generator = Generator(gyms, users, climbs, seed, now)
+    plan = (
+        (Gym, gyms, generator.gym_rows),
+        (User, users, generator.user_rows),
+        (Climb, climbs, generator.climb_rows),
+        (Ascent, ascents, generator.ascent_rows),
+        (Comment, comments, generator.comment_rows),
+    )
+    counts = {}
+    started = time.perf_counter()
+    with bind.connect() as connection:
+        for model in TABLES:
+            if connection.execute(select(model.__table__).limit(1)).first() is not None:
+                raise ValueError(f"table {model.__tablename__} already has rows")
+        with bulk_load(connection, [model.__table__ for model in TABLES]):
+            for model, total, rows in plan:
+                written = 0
+                for start in range(0, total, chunk_size):
+                    written += write_columns(connection, model.__table__, rows(start, min(chunk_size, total - start)))
+                    connection.commit()
+                counts[model.__tablename__] = written
+                report(f"{model.__tablename__}: {written} rows ({time.perf_counter() - started:.1f}s)")
+        report(f"indexes built ({time.perf_counter() - started:.1f}s)")
+    if derived and (ascents or comments):
+        with Session(bind) as session:
+            if ascents:
+                rebuild_climb_stats(session)
+                rebuild_leaderboards(session)
+                rebuild_rollups(session)
+            if comments:
+                reconcile_comment_summaries(session)
+        report(f"derived tables rebuilt ({time.perf_counter() - started:.1f}s)")
+    return counts
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Fill an empty database with deterministic synthetic data.")
+    parser.add_argument("--gyms", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--climbs", type=int, default=100_000)
+    parser.add_argument("--ascents", type=int, default=1_000_000)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per insert and commit")
+    parser.add_argument("--skip-derived", action="store_true",
+                        help="Don't rebuild climb stats, leaderboards, rollups and comment summaries")
+    args = parser.parse_args()
+    try:
+        counts = seed_database(engine, args.gyms, args.users, args.climbs, args.ascents, args.comments, seed=args.seed,
+                      derived=not args.skip_derived, chunk_size=args.chunk_size, progress=print)
+    except ValueError as exc:
+        parser.exit(1, f"error: {exc}\n")
+    print(f"Seeded {counts}; users log in as climber1..climber{args.users} with password {PASSWORD!r}")
@@ -0,0 +1,105 @@
+"""
+Environment-driven settings.
+
+Values are read once at import time, after ``.env`` is loaded, so they can be
+set in the environment or in a ``.env`` file like ``DATABASE_URL`` and ``SECRET_KEY``.
+"""
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    value = env_str(name)
+    return int(value) if value is not None else default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def worker_count(argv: Optional[list] = None) -> int:
+    """
+    Server worker processes this app runs in: ``--workers``/``-w`` on the server's
+    command line (uvicorn and gunicorn workers inherit it), else ``WEB_CONCURRENCY``.
+    """
+    args = sys.argv if argv is None else argv
+    for i, arg in enumerate(args):
+        if arg.startswith("--workers="):
+            return int(arg.split("=", 1)[1])
+        if arg in ("--workers", "-w") and i + 1 < len(args):
+            return int(args[i + 1])
+    return env_int("WEB_CONCURRENCY", 1)
+
+
+@dataclass
+class DatabaseSettings:
+    """
+    Engine and connection settings.
+
+    Attributes:
+        url (str): SQLAlchemy database URL (``DATABASE_URL``).
+        echo (str): ``false`` (default), ``true`` to log statements, ``debug`` to also log rows.
+        pool_size (int): Persistent connections kept in the pool.
+        max_overflow (int): Extra connections allowed above pool_size under load.
+        pool_timeout (int): Seconds to wait for a free connection before failing.
+        pool_recycle (int): Recycle connections older than this many seconds (-1 disables).
+        pool_pre_ping (bool): Test connections on checkout to survive server restarts.
+        statement_timeout_ms (int): Per-statement timeout (PostgreSQL only; 0 disables).
+        sqlite_journal_mode (str): SQLite journal mode; WAL lets readers run alongside the writer.
+        sqlite_synchronous (str): SQLite synchronous level; NORMAL is safe with WAL.
+        sqlite_busy_timeout_ms (int): How long SQLite waits on a locked database.
+        sqlite_mmap_size (int): Bytes of the database file to memory-map.
+        sqlite_cache_size (int): Page cache size (negative values are KiB).
+    """
+    url: str = "sqlite:///./climb_gym_log.db"
+    echo: str = "false"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int = 0
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456
+    sqlite_cache_size: int = -65536
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        defaults = cls()
+        return cls(
+            url=env_str("DATABASE_URL", defaults.url),
+            echo=env_str("DB_ECHO", defaults.echo).lower(),
+            pool_size=env_int("DB_POOL_SIZE", defaults.pool_size),
+            max_overflow=env_int("DB_MAX_OVERFLOW", defaults.max_overflow),
+            pool_timeout=env_int("DB_POOL_TIMEOUT", defaults.pool_timeout),
+            pool_recycle=env_int("DB_POOL_RECYCLE", defaults.pool_recycle),
+            pool_pre_ping=env_bool("DB_POOL_PRE_PING", defaults.pool_pre_ping),
+            statement_timeout_ms=env_int("DB_STATEMENT_TIMEOUT_MS", defaults.statement_timeout_ms),
+            sqlite_journal_mode=env_str("SQLITE_JOURNAL_MODE", defaults.sqlite_journal_mode),
+            sqlite_synchronous=env_str("SQLITE_SYNCHRONOUS", defaults.sqlite_synchronous),
+            sqlite_busy_timeout_ms=env_int("SQLITE_BUSY_TIMEOUT_MS", defaults.sqlite_busy_timeout_ms),
+            sqlite_mmap_size=env_int("SQLITE_MMAP_SIZE", defaults.sqlite_mmap_size),
+            sqlite_cache_size=env_int("SQLITE_CACHE_SIZE", defaults.sqlite_cache_size),
+        )
+
+    @property
+    def echo_flag(self):
+        """Value for create_engine's ``echo`` argument."""
+        if self.echo == "debug":
+            return "debug"
+        return self.echo in ("1", "true", "yes", "on")
@@ -0,0 +1,203 @@
+"""
+In-memory fuzzy search over a gym's climbs for the "is this climb already logged?" flow.
+
+Each gym gets a :class:`GymClimbIndex`: a trigram inverted index over color,
+setter and section plus a normalized-grade bucket. Indexes are built lazily
+from one query the first time a gym is searched, kept current by
+:func:`climb_added` when climbs are created, and rebuilt after
+``SUGGEST_INDEX_TTL_SECONDS`` so other workers' writes are picked up.
+Lookups touch only the posting lists for the query's trigrams, never the table.
+"""
+import heapq
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.aio import offload
+from app.grades import normalize_grade
+from app.models.core import Climb
+from app.schemas.core import ClimbSummary
+from app.settings import env_int
+
+FIELDS = ("color", "setter", "section")
+INDEX_TTL_SECONDS = env_int("SUGGEST_INDEX_TTL_SECONDS", 300)
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Padded, lowercased character trigrams of a string.
+    """
+    padded = f"  {text.strip().lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GymClimbIndex:
+    """
+    Trigram index over one gym's climbs.
+    """
+
+    def __init__(self):
+        self.climbs: Dict[int, ClimbSummary] = {}
+        self.field_grams: Dict[int, Dict[str, Set[str]]] = {}
+        self.postings: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self.grades: Dict[str, Set[int]] = defaultdict(set)
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, climb: ClimbSummary) -> None:
+        with self._lock:
+            self._add(climb)
+
+    def replace(self, added: Iterable[ClimbSummary], removed: Iterable[int]) -> None:
+        """
+        Apply a batch of additions and removals under one lock acquisition.
+        """
+        with self._lock:
+            for climb_id in removed:
+                self._remove(climb_id)
+            for climb in added:
+                self._add(climb)
+
+    def _add(self, climb: ClimbSummary) -> None:
+        self._remove(climb.id)
+        self.climbs[climb.id] = climb
+        grams = {field: trigrams(getattr(climb, field)) for field in FIELDS}
+        self.field_grams[climb.id] = grams
+        for field, field_grams in grams.items():
+            for gram in field_grams:
+                self.postings[(field, gram)].add(climb.id)
+        grade = normalize_grade(climb.setter_grade) or climb.setter_grade.strip().lower()
+        self.grades[grade].add(climb.id)
+
+    def remove(self, climb_id: int) -> None:
+        with self._lock:
+            self._remove(climb_id)
+
+    def _remove(self, climb_id: int) -> None:
+        climb = self.climbs.pop(climb_id, None)
+        if climb is None:
+            return
+        for field, field_grams in self.field_grams.pop(climb_id).items():
+            for gram in field_grams:
+                self.postings[(field, gram)].discard(climb_id)
+        grade = normalize_grade(climb.setter_grade) or climb.setter_grade.strip().lower()
+        self.grades[grade].discard(climb_id)
+
+    def _field_scores(self, fields: Iterable[str], value: str) -> Dict[int, float]:
+        """
+        Best Dice similarity of ``value`` against any of ``fields``, per candidate climb.
+        """
+        query = trigrams(value)
+        scores: Dict[int, float] = {}
+        for field in fields:
+            overlap: Dict[int, int] = defaultdict(int)
+            for gram in query:
+                for climb_id in self.postings.get((field, gram), ()):
+                    overlap[climb_id] += 1
+            for climb_id, shared in overlap.items():
+                score = 2 * shared / (len(query) + len(self.field_grams[climb_id][field]))
+                scores[climb_id] = max(scores.get(climb_id, 0.0), score)
+        return scores
+
+    def search(self, q: Optional[str] = None, color: Optional[str] = None, setter: Optional[str] = None,
+               section: Optional[str] = None, grade: Optional[str] = None, limit: int = 10,
+               min_score: float = 0.3) -> List[Tuple[float, ClimbSummary]]:
+        """
+        Rank climbs against free text and/or per-field criteria.
+
+        Free-text words that parse as grades match the grade bucket; other words
+        match whichever field they resemble most. The score is the mean over all criteria.
+        """
+        criteria: List[Dict[int, float]] = []
+        with self._lock:
+            words = (q or "").split()
+            for word in words:
+                normalized = normalize_grade(word)
+                if normalized:
+                    criteria.append({climb_id: 1.0 for climb_id in self.grades.get(normalized, ())})
+                else:
+                    criteria.append(self._field_scores(FIELDS, word))
+            for field, value in (("color", color), ("setter", setter), ("section", section)):
+                if value and value.strip():
+                    criteria.append(self._field_scores((field,), value))
+            if grade and grade.strip():
+                key = normalize_grade(grade) or grade.strip().lower()
+                criteria.append({climb_id: 1.0 for climb_id in self.grades.get(key, ())})
+            if not criteria:
+                return []
+            candidates = set().union(*criteria)
+            scored = []
+            for climb_id in candidates:
+                score = sum(c.get(climb_id, 0.0) for c in criteria) / len(criteria)
+                if score >= min_score:
+                    scored.append((round(score, 4), self.climbs[climb_id]))
+        # Best score first, newest climb breaks ties
+        return heapq.nlargest(limit, scored, key=lambda item: (item[0], item[1].date_added, item[1].id))
+
+
+_indexes: Dict[Tuple[Engine, int], GymClimbIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def build_index(session: Session, gym_id: int) -> GymClimbIndex:
+    """
+    Build a gym's index of climbs still on the wall from a single query.
+
+    Only the query uses the session; indexing the rows is offloaded, as it can take
+    a while for a large gym.
+    """
+    climbs = session.exec(select(Climb).where(Climb.gym_id == gym_id, Climb.archived_at.is_(None))).all()
+    return offload(index_climbs, climbs)
+
+
+def index_climbs(climbs: Iterable[Climb]) -> GymClimbIndex:
+    """
+    Index already loaded climbs; does not touch the database.
+    """
+    index = GymClimbIndex()
+    for climb in climbs:
+        index.add(ClimbSummary.model_validate(climb, from_attributes=True))
+    return index
+
+
+def get_index(session: Session, gym_id: int) -> GymClimbIndex:
+    """
+    Return the gym's index, building or refreshing it when missing or older than the TTL.
+    """
+    key = (session.get_bind(), gym_id)
+    index = _indexes.get(key)
+    if index is None or time.monotonic() - index.built_at > INDEX_TTL_SECONDS:
+        index = build_index(session, gym_id)
+        with _indexes_lock:
+            _indexes[key] = index
+    return index
+
+
+def climb_added(session: Session, climb: Climb) -> None:
+    """
+    Add a committed climb to its gym's index, if that index is loaded.
+    """
+    index = _indexes.get((session.get_bind(), climb.gym_id))
+    if index is not None:
+        index.add(ClimbSummary.model_validate(climb, from_attributes=True))
+
+
+def climbs_replaced(session: Session, gym_id: int, added: Iterable[ClimbSummary], archived: Iterable[int]) -> None:
+    """
+    Apply a committed bulk upload to the gym's index, if that index is loaded.
+    """
+    index = _indexes.get((session.get_bind(), gym_id))
+    if index is not None:
+        index.replace(added, archived)
+
+
+def reset() -> None:
+    """
+    Drop every loaded index.
+    """
+    with _indexes_lock:
+        _indexes.clear()
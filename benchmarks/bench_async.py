@@ -0,0 +1,153 @@
+"""
+Load test: sync vs async database mode under concurrent clients.
+
+Seeds a SQLite database, then for each mode starts ``uvicorn main:app`` in a
+subprocess (``DATABASE_URL=sqlite:///...`` vs ``sqlite+aiosqlite:///...``) and
+drives it with N concurrent HTTP clients for a fixed duration, reporting
+requests/sec and p50/p99 latency per concurrency level. The mix includes climb
+suggestions, whose index is rebuilt every ``--index-ttl`` seconds, so CPU-heavy
+work in a handler shows up in every other route's latency.
+
+    python -m benchmarks.bench_async --concurrency 50,200,1000 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.models.comment import Comment
+from app.models.core import Climb, Gym
+from app.models.stats import ClimbStats  # noqa: F401
+
+
+def seed(path: str, climbs: int, comments: int) -> None:
+    """Create the schema and a single gym with climbs and comments."""
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Gym(name="Load Gym", location="Bench"))
+        session.commit()
+        session.execute(insert(Climb), [
+            {"gym_id": 1, "color": "Blue", "setter": "S", "section": "A", "setter_grade": "V3",
+             "date_added": datetime.utcnow(), "rating": 0}
+            for _ in range(climbs)
+        ])
+        session.execute(insert(Comment), [
+            {"climb_id": 1, "user_id": 1, "username": "u", "text": "beta", "created_at": datetime(2025, 1, 1)}
+            for _ in range(comments)
+        ])
+        session.commit()
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, port: int, **extra_env: str) -> subprocess.Popen:
+    """Start uvicorn for the root app and wait until it answers."""
+    env = dict(os.environ, DATABASE_URL=database_url, **extra_env)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+async def drive(base_url: str, paths, concurrency: int, duration: float) -> dict:
+    """Run ``concurrency`` client loops for ``duration`` seconds."""
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        stop_at = time.perf_counter() + duration
+
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                try:
+                    res = await client.get(paths[i % len(paths)])
+                    if res.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2) if latencies else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="50,200,1000", help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--climbs", type=int, default=5000)
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--index-ttl", default="1", help="SUGGEST_INDEX_TTL_SECONDS for the server")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",")]
+    paths = ["/gyms/1/climbs/?limit=20", "/climbs/1/comments?limit=20", "/gyms/1", "/climbs/1/stats",
+             "/gyms/1/climbs/suggest?q=blue"]
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    seed(path, args.climbs, args.comments)
+    results = {}
+    try:
+        for mode, url in (("sync", f"sqlite:///{path}"), ("async", f"sqlite+aiosqlite:///{path}")):
+            port = free_port()
+            server = start_server(url, port, SUGGEST_INDEX_TTL_SECONDS=args.index_ttl)
+            try:
+                results[mode] = [asyncio.run(drive(f"http://127.0.0.1:{port}", paths, c, args.duration)) for c in levels]
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        os.unlink(path)
+
+    for mode, rows in results.items():
+        for row in rows:
+            print(f"{mode:>5} c={row['concurrency']:>5}  rps={row['rps']:>8}  p50={row['p50_ms']:>8} ms  "
+                  f"p99={row['p99_ms']:>8} ms  errors={row['errors']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
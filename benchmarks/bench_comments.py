@@ -0,0 +1,111 @@
+"""
+Comment thread benchmark: single-column vs composite ``(…, created_at, id)`` indexes.
+
+Seeds a SQLite file with one climb whose thread has N comments, one user who
+wrote N comments spread over other climbs, and background comments, then times
+the statements ``list_comments`` and ``list_my_comments`` run (first page in
+each order, a page deep into the thread via its cursor) under both index sets:
+
+* ``single``: the old ``ix_comment_climb_id`` / ``ix_comment_user_id``;
+* ``composite``: ``ix_comment_climb_id_created_at`` / ``ix_comment_user_id_created_at``.
+
+Each line also shows whether SQLite's plan needs a temp B-tree, i.e. a sort of the whole thread.
+
+    python -m benchmarks.bench_comments --comments 100000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Index, insert, text
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from app.models.comment import Comment
+from app.pagination import encode_cursor, keyset_page
+
+CHUNK = 50_000
+PAGE = 20
+INDEXES = {
+    "single": [Index("ix_comment_climb_id", Comment.climb_id), Index("ix_comment_user_id", Comment.user_id)],
+    "composite": list(Comment.__table__.indexes),
+}
+
+
+def seed(engine, comments: int) -> None:
+    """A ``comments``-long thread on climb 1, as many by user 1 elsewhere, and as many in the background."""
+    base = datetime(2020, 1, 1)
+    with Session(engine) as session:
+        for lo in range(0, comments, CHUNK):
+            rows = []
+            for i in range(lo, min(comments, lo + CHUNK)):
+                when = base + timedelta(seconds=i * 60)
+                rows.append({"climb_id": 1, "user_id": i % 5000 + 2, "username": "other", "text": f"thread {i}", "created_at": when})
+                rows.append({"climb_id": i % 10_000 + 2, "user_id": 1, "username": "bench", "text": f"mine {i}", "created_at": when})
+                rows.append({"climb_id": i % 10_000 + 2, "user_id": i % 5000 + 2, "username": "other", "text": f"noise {i}",
+                             "created_at": when})
+            session.execute(insert(Comment), rows)
+        session.commit()
+
+
+def use_indexes(engine, name: str) -> None:
+    with engine.begin() as connection:
+        for index in (i for indexes in INDEXES.values() for i in indexes):
+            index.drop(connection, checkfirst=True)
+        for index in INDEXES[name]:
+            index.create(connection)
+        connection.execute(text("ANALYZE"))
+
+
+def statements(comments: int) -> dict:
+    thread = select(Comment).where(Comment.climb_id == 1)
+    deep = datetime(2020, 1, 1) + timedelta(seconds=int(comments * 0.9) * 60)
+    return {
+        "thread_oldest": keyset_page(thread, Comment.created_at, Comment.id, None, PAGE),
+        "thread_newest": keyset_page(thread, Comment.created_at, Comment.id, None, PAGE, descending=True),
+        "thread_deep_90%": keyset_page(thread, Comment.created_at, Comment.id, encode_cursor(deep, 1 << 40), PAGE),
+        "my_newest": keyset_page(select(Comment).where(Comment.user_id == 1), Comment.created_at, Comment.id,
+                                 None, PAGE, descending=True),
+    }
+
+
+def time_statement(engine, statement, repeat: int) -> dict:
+    with Session(engine) as session:
+        compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+        plan = " / ".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        session.exec(statement).all()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = session.exec(statement).all()
+            samples.append((time.perf_counter() - started) * 1000)
+    assert len(rows) == PAGE + 1
+    return {"p50_ms": round(statistics.median(samples), 3), "sort": "TEMP B-TREE" in plan}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comments", type=int, default=100_000, help="Comments in the thread (and by the user)")
+    parser.add_argument("--repeat", type=int, default=50, help="Executions timed per statement")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        SQLModel.metadata.tables["comment"].create(engine)
+        seed(engine, args.comments)
+        for name in INDEXES:
+            use_indexes(engine, name)
+            for label, statement in statements(args.comments).items():
+                print({"indexes": name, "query": label, **time_statement(engine, statement, args.repeat)})
+    finally:
+        engine.dispose()
+        os.unlink(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
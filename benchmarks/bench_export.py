@@ -0,0 +1,118 @@
+"""
+Export benchmark: streamed history export vs paging through the list endpoint.
+
+Seeds one user with N ascents in a SQLite file, then measures for each export
+format the time to the first chunk, total time and peak Python memory
+(tracemalloc) while draining ``export_rows``, and compares it with fetching the
+same history through ``GET /ascents/`` 100 rows at a time with OFFSET.
+Memory is measured on a separate pass since tracemalloc slows allocation.
+
+    python -m benchmarks.bench_export --ascents 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.main import app
+from app.auth import create_access_token
+from app.db import get_session
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+from app.routes.ascents import export_rows
+
+CHUNK = 50_000
+
+
+def seed(engine, ascents: int) -> None:
+    """One gym, 500 climbs and ``ascents`` ascents for user 1."""
+    base = datetime(2020, 1, 1)
+    with Session(engine) as session:
+        session.add(Gym(name="Bench Gym", location="Nowhere"))
+        session.add(User(username="bench", email="bench@example.com", hashed_password="x"))
+        session.commit()
+        session.execute(insert(Climb), [
+            {"gym_id": 1, "color": "Blue", "setter": f"setter{i % 20}", "section": "Wall",
+             "setter_grade": f"V{i % 10}", "date_added": base, "rating": 0}
+            for i in range(500)
+        ])
+        for lo in range(0, ascents, CHUNK):
+            session.execute(insert(Ascent), [
+                {"user_id": 1, "climb_id": i % 500 + 1, "date": base + timedelta(minutes=i), "sent": i % 3 != 0,
+                 "grade": f"V{i % 10}", "notes": None, "quality_rating": i % 5 + 1}
+                for i in range(lo, min(ascents, lo + CHUNK))
+            ])
+        session.commit()
+
+
+def time_export(engine, fmt: str) -> dict:
+    """Drain the export once for timing and once under tracemalloc for peak memory."""
+    started = time.perf_counter()
+    first_chunk_ms, size = None, 0
+    for chunk in export_rows(engine, 1, fmt):
+        if first_chunk_ms is None:
+            first_chunk_ms = (time.perf_counter() - started) * 1000
+        size += len(chunk)
+    total = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in export_rows(engine, 1, fmt):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "format": fmt,
+        "first_chunk_ms": round(first_chunk_ms, 2),
+        "total_s": round(total, 2),
+        "mb": round(size / 1e6, 1),
+        "peak_python_mb": round(peak / 1e6, 2),
+    }
+
+
+def time_paging(engine, ascents: int) -> float:
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    started = time.perf_counter()
+    fetched = 0
+    for offset in range(0, ascents, 100):
+        fetched += len(client.get(f"/ascents/?limit=100&offset={offset}", headers=headers).json())
+    app.dependency_overrides.clear()
+    assert fetched == ascents
+    return round(time.perf_counter() - started, 2)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ascents", type=int, default=100_000, help="Ascents in the exported history")
+    parser.add_argument("--skip-paging", action="store_true", help="Skip the OFFSET paging comparison")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    try:
+        SQLModel.metadata.create_all(engine)
+        seed(engine, args.ascents)
+        for fmt in ("ndjson", "csv"):
+            print(time_export(engine, fmt))
+        if not args.skip_paging:
+            print({"paging_100_per_request_s": time_paging(engine, args.ascents)})
+    finally:
+        engine.dispose()
+        os.unlink(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""
+Import benchmark: rows/sec for CSV and NDJSON ascent imports into SQLite with WAL.
+
+Seeds two gyms with 1000 climbs in a SQLite file opened through the app's engine
+settings (WAL, synchronous=NORMAL), writes N records in each format to a temp
+file, then times ``import_ascents`` reading the file. Half the records name
+their climb by id and half by gym/color/setter/section/date, as an export from
+another logbook would. Exits non-zero if a format misses ``--min-rate``.
+
+    python -m benchmarks.bench_import --rows 200000
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+from sqlmodel import SQLModel, Session, select
+
+from app.ascent_import import import_ascents
+from app.db import make_engine
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+from app.settings import DatabaseSettings
+
+CLIMBS = 1000
+FIELDS = ["date", "sent", "grade", "quality_rating", "notes", "climb_id", "gym_name", "color", "setter", "section"]
+
+
+def seed(engine) -> None:
+    base = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        session.add_all([Gym(name="Bench North", location="N"), Gym(name="Bench South", location="S")])
+        session.add(User(username="bench", email="bench@example.com", hashed_password="x"))
+        session.commit()
+        session.execute(insert(Climb), [
+            {"gym_id": i % 2 + 1, "color": f"color{i % 8}", "setter": f"setter{i % 25}", "section": f"wall{i % 5}",
+             "setter_grade": f"V{i % 10}", "date_added": base + timedelta(days=i // 50), "rating": 0}
+            for i in range(CLIMBS)
+        ])
+        session.commit()
+
+
+def records(rows: int):
+    base = datetime(2024, 3, 1)
+    for i in range(rows):
+        climb = i % CLIMBS
+        record = {"date": (base + timedelta(minutes=i)).isoformat(), "sent": i % 3 != 0,
+                  "grade": f"V{i % 10}", "quality_rating": i % 5 + 1, "notes": None}
+        if i % 2:
+            record["climb_id"] = climb + 1
+        else:
+            record.update(gym_name="Bench North" if climb % 2 == 0 else "Bench South",
+                          color=f"color{climb % 8}", setter=f"setter{climb % 25}", section=f"wall{climb % 5}")
+        yield record
+
+
+def write_file(path: str, fmt: str, rows: int) -> None:
+    with open(path, "w", newline="") as out:
+        if fmt == "csv":
+            writer = csv.DictWriter(out, FIELDS)
+            writer.writeheader()
+            writer.writerows(records(rows))
+        else:
+            out.writelines(json.dumps(record) + "\n" for record in records(rows))
+
+
+def time_import(engine, fmt: str, rows: int) -> dict:
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        write_file(path, fmt, rows)
+        with Session(engine) as session, open(path, newline="") as source:
+            started = time.perf_counter()
+            result = import_ascents(session, 1, source, fmt)
+            elapsed = time.perf_counter() - started
+        with Session(engine) as session:
+            stored = session.exec(select(func.count()).select_from(Ascent)).one()
+    finally:
+        os.unlink(path)
+    return {
+        "format": fmt,
+        "rows": rows,
+        "imported": result.imported,
+        "failed": result.failed,
+        "stored_total": stored,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Records per format")
+    parser.add_argument("--min-rate", type=int, default=50_000, help="Required rows/sec")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = make_engine(DatabaseSettings(url=f"sqlite:///{path}"))
+    ok = True
+    try:
+        SQLModel.metadata.create_all(engine)
+        seed(engine)
+        with engine.connect() as conn:
+            print({"journal_mode": conn.exec_driver_sql("PRAGMA journal_mode").scalar()})
+        for fmt in ("csv", "ndjson"):
+            stats = time_import(engine, fmt, args.rows)
+            print(stats)
+            ok = ok and stats["failed"] == 0 and stats["rows_per_sec"] >= args.min_rate
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+    print("target met" if ok else f"below target of {args.min_rate} rows/sec")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
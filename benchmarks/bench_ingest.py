@@ -0,0 +1,113 @@
+"""
+Ascent write throughput: one commit per request vs the write-behind ingest queue.
+
+Seeds a SQLite file with climbers and climbs, then sends the same ascents from
+N concurrent clients (httpx over ``ASGITransport``, in-process) to
+
+* ``per_request``: ``POST /ascents/``, which commits each ascent with its stats,
+  leaderboard and rollup updates before answering;
+* ``ingest``: ``POST /ascents/ingest``, which answers once the ascent is in the
+  fsynced journal and group-commits batches in the background.
+
+For each it prints acknowledged requests/sec and p50/p99 latency; for ``ingest``
+also the rate until every ascent is committed (the queue drained), and how many
+fsyncs and database commits the run took.
+
+    python -m benchmarks.bench_ingest --requests 5000 --concurrency 1,16,64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+
+async def drive(app, path: str, requests: int, concurrency: int, tokens: list, run: str) -> dict:
+    latencies, errors = [], 0
+    next_index = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal next_index, errors
+        while next_index < requests:
+            i, next_index = next_index, next_index + 1
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}", "Idempotency-Key": f"{run}-{i}"}
+            started = time.perf_counter()
+            res = await client.post(path, json={"climb_id": i % 100 + 1, "grade": "V4", "sent": i % 3 > 0},
+                                    headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += res.status_code >= 400
+
+    # Failures such as SQLite's "database is locked" under write contention count as errors
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": round(requests / elapsed),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "errors": errors,
+        "seconds": elapsed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Ascents sent per mode and concurrency")
+    parser.add_argument("--concurrency", default="1,16,64", help="Comma-separated client counts")
+    parser.add_argument("--users", type=int, default=100, help="Climbers the ascents are spread over")
+    parser.add_argument("--flush-ms", type=int, default=50, help="Ingest flush interval")
+    parser.add_argument("--batch-rows", type=int, default=500, help="Ingest batch size")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "bench.db")
+    # The app's engine is built from DATABASE_URL on import, so set it first
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # One connection per threadpool worker, so neither path waits on the pool
+    os.environ.setdefault("DB_POOL_SIZE", "40")
+    from sqlmodel import SQLModel
+    from app.auth import create_access_token
+    from app.db import engine
+    from app.ingest import AscentIngestor
+    from app.main import create_app
+    from app.seed import seed_database
+
+    try:
+        SQLModel.metadata.create_all(engine)
+        seed_database(engine, gyms=1, users=args.users, climbs=100, ascents=0, comments=0)
+        tokens = [create_access_token({"sub": f"climber{u + 1}"}) for u in range(args.users)]
+        app = create_app(ingest_enabled=True)
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            run = f"c{concurrency}"
+            result = asyncio.run(drive(app, "/ascents/", args.requests, concurrency, tokens, run + "p"))
+            result.pop("seconds")
+            print({"mode": "per_request", "concurrency": concurrency, **result})
+
+            ingestor = AscentIngestor(engine, os.path.join(workdir, f"{run}.ndjson"), flush_ms=args.flush_ms,
+                                      batch_rows=args.batch_rows)
+            app.state.ingestor = ingestor
+            ingestor.start()
+            started = time.perf_counter()
+            result = asyncio.run(drive(app, "/ascents/ingest", args.requests, concurrency, tokens, run + "i"))
+            ingestor.stop()
+            drained = time.perf_counter() - started
+            result.pop("seconds")
+            print({"mode": "ingest", "concurrency": concurrency, **result,
+                   "committed_rps": round(ingestor.committed / drained), "fsyncs": ingestor.journal.fsyncs,
+                   "commits": ingestor.batches})
+    finally:
+        engine.dispose()
+        for name in os.listdir(workdir):
+            os.unlink(os.path.join(workdir, name))
+        os.rmdir(workdir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
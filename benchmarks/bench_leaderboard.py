@@ -0,0 +1,157 @@
+"""
+Leaderboard benchmark: in-memory boards against the naive GROUP BY query.
+
+Seeds a SQLite file (WAL, through the app's engine settings) with ``--ascents``
+ascents by ``--users`` climbers over the last two years, spread over four gyms
+with a skew toward a few very active climbers, then times:
+
+* the naive SQL for a gym's top 10 and one climber's rank, per window;
+* ``rebuild_leaderboards`` over the whole ascent table;
+* building a board on first read, then ``top`` and ``rank`` on the loaded board;
+* the incremental cost of one ascent write (leaderboard rows + board update).
+
+    python -m benchmarks.bench_leaderboard --ascents 10000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import SQLModel, Session
+
+from app import leaderboard
+from app.db import make_engine
+from app.leaderboard import WINDOWS, get_leaderboard, period_start, rebuild_leaderboards, record_ascent_rows
+from app.models.core import climb_difficulty
+from app.settings import DatabaseSettings
+
+GYMS = 4
+CLIMBS = 2000
+SEED_BATCH = 100_000
+
+NAIVE_TOP = """
+    SELECT a.user_id, COUNT(*) AS n FROM ascent a JOIN climb c ON c.id = a.climb_id
+    WHERE c.gym_id = ? AND a.sent AND a.date >= ?
+    GROUP BY a.user_id ORDER BY n DESC LIMIT 10
+"""
+NAIVE_RANK = """
+    WITH totals AS (
+        SELECT a.user_id, COUNT(*) AS n FROM ascent a JOIN climb c ON c.id = a.climb_id
+        WHERE c.gym_id = ? AND a.sent AND a.date >= ? GROUP BY a.user_id
+    )
+    SELECT 1 + COUNT(*) FROM totals WHERE n > (SELECT n FROM totals WHERE user_id = ?)
+"""
+
+
+def seed(path: str, users: int, ascents: int, now: datetime) -> None:
+    rng = random.Random(16)
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO gym (id, name, location) VALUES (?, ?, ?)",
+                     [(i + 1, f"Gym {i + 1}", "Bench") for i in range(GYMS)])
+    conn.executemany("INSERT INTO user (id, username, email, hashed_password, is_public) VALUES (?, ?, ?, ?, 1)",
+                     [(i + 1, f"climber{i + 1}", f"climber{i + 1}@example.com", "x") for i in range(users)])
+    added = now - timedelta(days=730)
+    conn.executemany(
+        "INSERT INTO climb (id, gym_id, color, setter, section, setter_grade, date_added, rating, difficulty,"
+        " ascent_count, quality_average) VALUES (?, ?, 'Blue', 'Bench', 'Wall', ?, ?, 0, ?, 0, 0)",
+        [(i + 1, i % GYMS + 1, f"V{i % 11}", added, climb_difficulty(f"V{i % 11}")) for i in range(CLIMBS)],
+    )
+    span = 730 * 86400
+
+    def rows(count):
+        for _ in range(count):
+            # Pareto-distributed activity: a few climbers log most of the ascents
+            user_id = min(int(rng.paretovariate(1.2)), users)
+            user_id = (user_id * 7919 + rng.randrange(users // 10 or 1)) % users + 1
+            yield (user_id, rng.randrange(CLIMBS) + 1, now - timedelta(seconds=rng.randrange(span)), rng.random() < 0.7)
+
+    for start in range(0, ascents, SEED_BATCH):
+        conn.executemany("INSERT INTO ascent (user_id, climb_id, date, sent) VALUES (?, ?, ?, ?)",
+                         rows(min(SEED_BATCH, ascents - start)))
+        conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat: int = 1):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ascents", type=int, default=10_000_000, help="Ascents to seed")
+    parser.add_argument("--users", type=int, default=50_000, help="Climbers to seed")
+    parser.add_argument("--writes", type=int, default=1000, help="Single-ascent writes to time")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = make_engine(DatabaseSettings(url=f"sqlite:///{path}"))
+    now = datetime.utcnow()
+    ok = True
+    try:
+        SQLModel.metadata.create_all(engine)
+        _, seconds = timed(lambda: seed(path, args.users, args.ascents, now))
+        print({"seeded_ascents": args.ascents, "users": args.users, "seconds": round(seconds, 1)})
+
+        with Session(engine) as session:
+            rows, seconds = timed(lambda: rebuild_leaderboards(session))
+        print({"rebuild_rows": rows, "seconds": round(seconds, 1), "ascents_per_sec": round(args.ascents / seconds)})
+
+        conn = sqlite3.connect(path)
+        for window in WINDOWS:
+            since = datetime.combine(period_start(window, now.date()), datetime.min.time()).isoformat(" ")
+            with Session(engine) as session:
+                board, build = timed(lambda: get_leaderboard(session, 1, window))
+            leader = board.top("sends", 1)[0][1] if board.size("sends") else 1
+            naive_top, naive_top_s = timed(lambda: conn.execute(NAIVE_TOP, (1, since)).fetchall(), 3)
+            naive_rank, naive_rank_s = timed(lambda: conn.execute(NAIVE_RANK, (1, since, leader)).fetchone(), 3)
+            top, top_s = timed(lambda: board.top("sends", 10), 1000)
+            rank, rank_s = timed(lambda: board.rank("sends", leader), 1000)
+            # Same counts as the naive query (ties may be listed in another order)
+            agrees = [n for _, n in naive_top] == [score for _, _, score in top] and naive_rank[0] == rank[0]
+            ok = ok and agrees
+            print({
+                "window": window,
+                "ranked": board.size("sends"),
+                "naive_top10_ms": round(naive_top_s * 1000, 1),
+                "naive_rank_ms": round(naive_rank_s * 1000, 1),
+                "board_build_ms": round(build * 1000, 1),
+                "board_top10_us": round(top_s * 1e6, 1),
+                "board_rank_us": round(rank_s * 1e6, 1),
+                "agrees": agrees,
+            })
+        conn.close()
+
+        rng = random.Random(25)
+        samples = []
+        with Session(engine) as session:
+            for _ in range(args.writes):
+                row = {"user_id": rng.randrange(args.users) + 1, "climb_id": rng.randrange(CLIMBS) + 1,
+                       "date": now, "sent": True}
+                started = time.perf_counter()
+                changes = record_ascent_rows(session, [row])
+                session.commit()
+                leaderboard.scores_changed(session, changes)
+                samples.append(time.perf_counter() - started)
+        print({"incremental_writes": args.writes, "median_ms": round(statistics.median(samples) * 1000, 2),
+               "p99_ms": round(sorted(samples)[int(len(samples) * 0.99) - 1] * 1000, 2)})
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+    print("boards agree with the naive query" if ok else "boards disagree with the naive query")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
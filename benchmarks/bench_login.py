@@ -0,0 +1,119 @@
+"""
+Login storm benchmark: login throughput and the latency of unrelated endpoints.
+
+Starts ``uvicorn main:app`` against a seeded SQLite database, then runs
+``--logins`` clients hammering ``POST /auth/login`` alongside ``--readers``
+clients reading ``GET /gyms/1``. Reports login throughput (and 503 rejections
+from the hashing executor's backpressure) and p50/p99 of the unrelated reads,
+which should stay low while logins are saturated.
+
+    python -m benchmarks.bench_login --logins 200 --readers 20 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import Session, create_engine
+
+from app.hashing import crypt_context
+from app.models.core import User
+from benchmarks.bench_async import free_port, seed, start_server
+
+USERS = 50
+PASSWORD = "benchmark-password"
+
+
+def seed_users(path: str, rounds: int) -> None:
+    hashed = crypt_context(rounds).hash(PASSWORD)
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"username": f"climber{i}", "email": f"climber{i}@example.com", "hashed_password": hashed, "is_public": True}
+            for i in range(USERS)
+        ])
+        session.commit()
+    engine.dispose()
+
+
+def percentile(samples, pct):
+    return round(samples[max(0, int(len(samples) * pct) - 1)], 2) if samples else None
+
+
+async def storm(base_url: str, logins: int, readers: int, duration: float) -> dict:
+    login_ok, login_busy, login_failed, read_latencies = 0, 0, 0, []
+    limits = httpx.Limits(max_connections=logins + readers)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        stop_at = time.perf_counter() + duration
+
+        async def login_worker(n: int):
+            nonlocal login_ok, login_busy, login_failed
+            while time.perf_counter() < stop_at:
+                res = await client.post("/auth/login", data={"username": f"climber{n % USERS}", "password": PASSWORD})
+                if res.status_code == 200:
+                    login_ok += 1
+                elif res.status_code == 503:
+                    login_busy += 1
+                    await asyncio.sleep(float(res.headers.get("retry-after", "1")) / 10)
+                else:
+                    login_failed += 1
+
+        async def read_worker():
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                await client.get("/gyms/1")
+                read_latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker(n) for n in range(logins)), *(read_worker() for _ in range(readers)))
+        elapsed = time.perf_counter() - started
+    read_latencies.sort()
+    return {
+        "logins_per_sec": round(login_ok / elapsed, 1),
+        "login_rejected_503": login_busy,
+        "login_failed": login_failed,
+        "reads": len(read_latencies),
+        "read_p50_ms": percentile(read_latencies, 0.5),
+        "read_p99_ms": percentile(read_latencies, 0.99),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="Concurrent login clients")
+    parser.add_argument("--readers", type=int, default=20, help="Concurrent clients on an unrelated endpoint")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    seed(path, climbs=10, comments=10)
+    seed_users(path, args.rounds)
+    port = free_port()
+    server = start_server(f"sqlite:///{path}", port, BCRYPT_ROUNDS=str(args.rounds), HASH_EXECUTOR=args.executor)
+    try:
+        result = asyncio.run(storm(f"http://127.0.0.1:{port}", args.logins, args.readers, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+        os.unlink(path)
+
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Regression benchmark: profile latency must stay flat as the climb catalog grows.
+
+Grows a SQLite catalog through the given sizes while keeping one user's own
+activity fixed, and times GET /users/{username} at each size. Exits non-zero
+if the slowest median exceeds ``--max-ratio`` times the fastest.
+
+    python -m benchmarks.bench_profile --sizes 1000,10000,100000,1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, create_engine
+
+from main import app
+from app.db import get_session
+from app.models.ascents import Ascent
+from app.models.core import Climb, ClimbRating, Gym, User
+
+CHUNK = 50_000
+
+
+def grow_catalog(engine, start: int, stop: int) -> None:
+    """Insert climbs ``start..stop`` set by other setters."""
+    with Session(engine) as session:
+        for lo in range(start, stop, CHUNK):
+            rows = [
+                {"gym_id": 1, "color": "Blue", "setter": f"setter{i % 500}", "section": "Wall",
+                 "setter_grade": f"V{i % 10}", "date_added": datetime(2025, 1, 1), "rating": i % 6}
+                for i in range(lo, min(stop, lo + CHUNK))
+            ]
+            session.execute(insert(Climb), rows)
+        session.commit()
+
+
+def seed_user(engine) -> None:
+    """Create the profiled user with a fixed amount of activity."""
+    with Session(engine) as session:
+        session.add(Gym(name="Bench Gym", location="Nowhere"))
+        session.add(User(username="bench", email="bench@example.com", hashed_password="x"))
+        session.commit()
+        for i in range(20):
+            session.add(Climb(gym_id=1, color="Red", setter="bench", section="Cave", setter_grade="V4", date_added=datetime(2025, 1, 1)))
+        session.commit()
+        for climb_id in range(1, 21):
+            session.add(ClimbRating(user_id=1, climb_id=climb_id, rating=4))
+            session.add(Ascent(user_id=1, climb_id=climb_id, grade=f"V{climb_id % 8}", sent=climb_id % 3 != 0))
+        session.commit()
+
+
+def time_profile(client: TestClient, repeat: int) -> float:
+    """Median latency of the profile endpoint in milliseconds."""
+    client.get("/users/bench")
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        res = client.get("/users/bench")
+        samples.append((time.perf_counter() - started) * 1000)
+        assert res.status_code == 200
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=50, help="Requests timed per size")
+    parser.add_argument("--max-ratio", type=float, default=3.0, help="Allowed slowest/fastest median ratio")
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    seed_user(engine)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    results, catalog = [], 20
+    try:
+        for size in sizes:
+            grow_catalog(engine, catalog, size)
+            catalog = max(catalog, size)
+            median_ms = time_profile(client, args.repeat)
+            results.append((size, median_ms))
+            print(f"climbs={size:>9}  profile p50={median_ms:7.2f} ms")
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+        os.unlink(path)
+
+    medians = [ms for _, ms in results]
+    ratio = max(medians) / min(medians)
+    print(f"slowest/fastest ratio: {ratio:.2f} (limit {args.max_ratio})")
+    return 0 if ratio <= args.max_ratio else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+API benchmark suite: every endpoint, in-process and against a real server.
+
+Seeds a SQLite database at the chosen scale with :func:`app.seed.seed_database`,
+or reuses ``--db`` if it already holds data. Then each scenario (one per
+endpoint) runs ``--requests`` requests from ``--concurrency`` clients:
+
+* ``inprocess``: httpx over ``ASGITransport`` against ``create_app()``, no network;
+* ``server``: a ``uvicorn main:app`` subprocess over HTTP.
+
+For each scenario it records RPS, p50/p95/p99 latency, errors, and SQL
+statements per request. Statement counts come from the app's own ``/metrics``,
+so metrics are enabled in both modes. Results are written as JSON with
+``--output``. With ``--baseline`` they are compared against an earlier results
+file, and the exit status is 1 if any scenario regressed beyond ``--tolerance``.
+A scenario regresses when p95 rises, RPS drops, or it runs more statements per
+request.
+
+    python -m benchmarks.suite --scale small --output baseline.json
+    python -m benchmarks.suite --scale small --db /tmp/small.db --baseline baseline.json
+    python -m benchmarks.suite --compare new.json --baseline baseline.json
+
+Routes that no scenario covers make the run fail, so new endpoints get one.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+SCALES = {
+    "tiny": dict(gyms=2, users=200, climbs=2_000, ascents=20_000, comments=2_000),
+    "small": dict(gyms=10, users=10_000, climbs=100_000, ascents=1_000_000, comments=100_000),
+    "large": dict(gyms=50, users=100_000, climbs=1_000_000, ascents=10_000_000, comments=1_000_000),
+}
+# Routes not driven, with the reason
+SKIPPED = {
+    ("GET", "/gyms/{gym_id}/feed"): "Server-Sent Events stream that never completes",
+    ("GET", "/metrics"): "scraped by the suite itself",
+    ("POST", "/ascents/ingest"): "write-behind, only mounted with ASCENT_INGEST_ENABLED; see benchmarks.bench_ingest",
+}
+USER = "climber1"
+STATEMENTS = "climb_gym_http_request_db_statements"
+_SAMPLE = re.compile(r'^(\w+)\{(.*)\} ([0-9.eE+-]+)$')
+
+
+@dataclass
+class Scenario:
+    """
+    One endpoint under load.
+
+    Attributes:
+        name (str): Key in the results.
+        method (str): HTTP method.
+        route (str): Route template, as reported by ``/metrics``.
+        path (Callable): Request number -> URL path (with query string).
+        auth (bool): Send the bench user's bearer token.
+        json (Callable | None): Request number -> JSON body.
+        data (Callable | None): Request number -> form body.
+        content (Callable | None): Request number -> raw body.
+        setup (Callable | None): Called with (client, count, headers) before timing; returns ids for ``path``.
+    """
+    name: str
+    method: str
+    route: str
+    path: Callable[..., str]
+    auth: bool = False
+    json: Optional[Callable[[int], dict]] = None
+    data: Optional[Callable[[int], dict]] = None
+    content: Optional[Callable[[int], str]] = None
+    setup: Optional[Callable] = None
+    ids: List[int] = field(default_factory=list)
+
+
+def scenarios(scale: Dict[str, int], run: str) -> List[Scenario]:
+    """
+    A scenario for every route, spreading ids over the seeded rows.
+    """
+    rng = random.Random(21)
+    gyms, climbs, users = scale["gyms"], scale["climbs"], scale["users"]
+
+    def gym(i):
+        return rng.randrange(gyms) + 1
+
+    def climb(i):
+        return rng.randrange(climbs) + 1
+
+    def climber(i):
+        return f"climber{rng.randrange(users) + 1}"
+
+    def new_climb(i):
+        return {"gym_id": 1, "color": "Blue", "setter": "bench", "section": "Cave", "setter_grade": f"V{i % 10}",
+                "date_added": "2025-01-01T00:00:00"}
+
+    async def created_ascents(client, count, headers):
+        ids = []
+        for start in range(0, count, 100):
+            items = [{"climb_id": climb(i)} for i in range(min(100, count - start))]
+            res = await client.post("/ascents/batch", json={"items": items}, headers=headers)
+            ids.extend(a["id"] for a in res.json()["created"])
+        return ids
+
+    async def created_comments(client, count, headers):
+        ids = []
+        for i in range(count):
+            res = await client.post("/climbs/1/comments", json={"text": f"bench {run} {i}"}, headers=headers)
+            ids.append(res.json()["id"])
+        return ids
+
+    return [
+        Scenario("root", "GET", "/", lambda i: "/"),
+        Scenario("health_db", "GET", "/health/db", lambda i: "/health/db"),
+        Scenario("health_caches", "GET", "/health/caches", lambda i: "/health/caches"),
+        Scenario("gyms_list", "GET", "/gyms/", lambda i: "/gyms/?limit=20"),
+        Scenario("gym_read", "GET", "/gyms/{gym_id}", lambda i: f"/gyms/{gym(i)}"),
+        Scenario("gym_create", "POST", "/gyms/", lambda i: "/gyms/",
+                 json=lambda i: {"name": f"Bench {run} {i}", "location": "Bench"}),
+        Scenario("climbs_list", "GET", "/gyms/{gym_id}/climbs/", lambda i: f"/gyms/{gym(i)}/climbs/?limit=20"),
+        Scenario("climbs_list_filtered", "GET", "/gyms/{gym_id}/climbs/",
+                 lambda i: f"/gyms/{gym(i)}/climbs/?limit=20&sort=grade&order=desc&min_grade=V3&max_grade=V6"),
+        Scenario("climbs_suggest", "GET", "/gyms/{gym_id}/climbs/suggest",
+                 lambda i: f"/gyms/{gym(i)}/climbs/suggest?q=blue+cave+v{i % 10}"),
+        Scenario("climb_create", "POST", "/gyms/{gym_id}/climbs/", lambda i: "/gyms/1/climbs/", auth=True,
+                 json=new_climb),
+        Scenario("climbs_bulk", "POST", "/gyms/{gym_id}/climbs/bulk", lambda i: "/gyms/1/climbs/bulk", auth=True,
+                 json=lambda i: {"climbs": [new_climb(i * 10 + n) for n in range(10)]}),
+        Scenario("climb_rate", "PATCH", "/gyms/climbs/{climb_id}/rating",
+                 lambda i: f"/gyms/climbs/{climb(i)}/rating", auth=True, json=lambda i: {"rating": i % 5 + 1}),
+        Scenario("climb_stats", "GET", "/climbs/{climb_id}/stats", lambda i: f"/climbs/{climb(i)}/stats"),
+        Scenario("comments_list", "GET", "/climbs/{climb_id}/comments",
+                 lambda i: f"/climbs/{climb(i)}/comments?limit=20"),
+        Scenario("comments_newest", "GET", "/climbs/{climb_id}/comments",
+                 lambda i: f"/climbs/{climb(i)}/comments?limit=20&order=desc"),
+        Scenario("my_comments", "GET", "/climbs/comments/me", lambda i: "/climbs/comments/me?limit=20", auth=True),
+        Scenario("comment_create", "POST", "/climbs/{climb_id}/comments", lambda i: f"/climbs/{climb(i)}/comments",
+                 auth=True, json=lambda i: {"text": f"bench {run} {i}"}),
+        Scenario("comment_delete", "DELETE", "/climbs/comments/{comment_id}",
+                 lambda i, ids: f"/climbs/comments/{ids[i]}", auth=True, setup=created_comments),
+        Scenario("register", "POST", "/auth/register", lambda i: "/auth/register",
+                 json=lambda i: {"username": f"b{run}x{i}", "email": f"b{run}x{i}@example.com", "password": "password"}),
+        Scenario("login", "POST", "/auth/login", lambda i: "/auth/login",
+                 data=lambda i: {"username": climber(i), "password": "password"}),
+        Scenario("me", "GET", "/auth/me", lambda i: "/auth/me", auth=True),
+        Scenario("profile", "GET", "/users/{username}", lambda i: f"/users/{climber(i)}"),
+        Scenario("user_stats", "GET", "/users/{username}/stats", lambda i: f"/users/{climber(i)}/stats?bucket=week"),
+        Scenario("ascent_create", "POST", "/ascents/", lambda i: "/ascents/", auth=True,
+                 json=lambda i: {"climb_id": climb(i), "grade": f"V{i % 10}"}),
+        Scenario("ascent_batch", "POST", "/ascents/batch", lambda i: "/ascents/batch", auth=True,
+                 json=lambda i: {"items": [{"climb_id": climb(i)} for _ in range(10)]}),
+        Scenario("ascent_delete", "DELETE", "/ascents/{ascent_id}", lambda i, ids: f"/ascents/{ids[i]}", auth=True,
+                 setup=created_ascents),
+        Scenario("ascents_mine", "GET", "/ascents/", lambda i: "/ascents/?limit=20", auth=True),
+        Scenario("ascents_for_climb", "GET", "/ascents/climb/{climb_id}",
+                 lambda i: f"/ascents/climb/{climb(i)}?limit=20"),
+        Scenario("ascents_export", "GET", "/ascents/export", lambda i: "/ascents/export?format=csv", auth=True),
+        Scenario("ascents_import", "POST", "/ascents/import", lambda i: "/ascents/import?format=csv", auth=True,
+                 content=lambda i: "climb_id,sent\n" + "".join(f"{climb(i)},true\n" for _ in range(10))),
+        Scenario("leaderboard", "GET", "/gyms/{gym_id}/leaderboard", lambda i: f"/gyms/{gym(i)}/leaderboard"),
+        Scenario("leaderboard_me", "GET", "/gyms/{gym_id}/leaderboard/me",
+                 lambda i: f"/gyms/{gym(i)}/leaderboard/me?window=all", auth=True),
+    ]
+
+
+def uncovered_routes(app, covered: List[Scenario]) -> List[Tuple[str, str]]:
+    """
+    API routes that no scenario drives and that are not in ``SKIPPED``.
+    """
+    driven = {(s.method, s.route) for s in covered} | set(SKIPPED)
+    missing = []
+    for route in app.routes:
+        for method in sorted(getattr(route, "methods", None) or ()):
+            if method != "HEAD" and (method, route.path) not in driven and route.path not in (
+                "/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc",
+            ):
+                missing.append((method, route.path))
+    return missing
+
+
+def statement_totals(text: str) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    """
+    (method, route) -> (statements, requests) from a ``/metrics`` scrape.
+    """
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or match.group(1) not in (f"{STATEMENTS}_sum", f"{STATEMENTS}_count"):
+            continue
+        labels = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2)))
+        entry = totals.setdefault((labels["method"], labels["route"]), [0.0, 0.0])
+        entry[0 if match.group(1).endswith("_sum") else 1] = float(match.group(3))
+    return {key: (value[0], value[1]) for key, value in totals.items()}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, warmup: int,
+                       concurrency: int, scrape: Callable, auth: Dict[str, str]) -> dict:
+    """
+    Time ``requests`` requests of one scenario after ``warmup`` untimed ones.
+    """
+    if scenario.setup is not None:
+        scenario.ids = await scenario.setup(client, requests + warmup, auth)
+
+    async def send(i: int) -> httpx.Response:
+        path = scenario.path(i, scenario.ids) if scenario.setup is not None else scenario.path(i)
+        kwargs = {}
+        if scenario.json is not None:
+            kwargs["json"] = scenario.json(i)
+        elif scenario.data is not None:
+            kwargs["data"] = scenario.data(i)
+        elif scenario.content is not None:
+            kwargs["content"] = scenario.content(i)
+        return await client.request(scenario.method, path, headers=auth if scenario.auth else None, **kwargs)
+
+    for i in range(warmup):
+        await send(i)
+    before = (await scrape()).get((scenario.method, scenario.route), (0.0, 0.0))
+    latencies, errors = [], 0
+    next_index = warmup
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < warmup + requests:
+            i, next_index = next_index, next_index + 1
+            started = time.perf_counter()
+            try:
+                res = await send(i)
+                if res.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = (await scrape()).get((scenario.method, scenario.route), (0.0, 0.0))
+    counted = after[1] - before[1]
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "queries_per_request": round((after[0] - before[0]) / counted, 2) if counted else None,
+    }
+
+
+async def drive(client: httpx.AsyncClient, selected: List[Scenario], token: str, args) -> Dict[str, dict]:
+    auth = {"Authorization": f"Bearer {token}"}
+
+    async def scrape():
+        return statement_totals((await client.get("/metrics")).text)
+
+    results = {}
+    for scenario in selected:
+        results[scenario.name] = await run_scenario(
+            client, scenario, args.requests, args.warmup, args.concurrency, scrape, auth,
+        )
+        row = results[scenario.name]
+        print(f"  {scenario.name:<22} rps={row['rps']:>8}  p50={row['p50_ms']:>8}  p95={row['p95_ms']:>8}  "
+              f"p99={row['p99_ms']:>8} ms  queries={row['queries_per_request']}  errors={row['errors']}")
+    return results
+
+
+def run_inprocess(selected: List[Scenario], token: str, args) -> Dict[str, dict]:
+    from app.main import create_app
+
+    app = create_app(metrics_enabled=True)
+    transport = httpx.ASGITransport(app=app)
+
+    async def main():
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await drive(client, selected, token, args)
+
+    return asyncio.run(main())
+
+
+def run_server(selected: List[Scenario], token: str, database_url: str, args) -> Dict[str, dict]:
+    from benchmarks.bench_async import free_port, start_server
+
+    port = free_port()
+    server = start_server(database_url, port, METRICS_ENABLED="1")
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async def main():
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+            return await drive(client, selected, token, args)
+
+    try:
+        return asyncio.run(main())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Regressions of ``current`` against ``baseline``, one line each.
+
+    Latency and throughput get ``tolerance`` (and 1 ms of slack for very fast
+    endpoints); statement counts are deterministic, so any increase counts.
+    """
+    regressions = []
+    for mode, rows in current["results"].items():
+        for name, row in rows.items():
+            base = baseline.get("results", {}).get(mode, {}).get(name)
+            if base is None:
+                continue
+            label = f"{mode}/{name}"
+            if row["p95_ms"] > base["p95_ms"] * (1 + tolerance) and row["p95_ms"] - base["p95_ms"] > 1:
+                regressions.append(f"{label}: p95 {base['p95_ms']} -> {row['p95_ms']} ms")
+            if row["rps"] < base["rps"] * (1 - tolerance):
+                regressions.append(f"{label}: rps {base['rps']} -> {row['rps']}")
+            if (row["queries_per_request"] or 0) > (base["queries_per_request"] or 0) + 0.5:
+                regressions.append(f"{label}: queries/request {base['queries_per_request']} -> {row['queries_per_request']}")
+            if row["errors"] > base["errors"]:
+                regressions.append(f"{label}: errors {base['errors']} -> {row['errors']}")
+    return regressions
+
+
+def has_data(path: str) -> bool:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT count(*) FROM sqlite_master WHERE name = 'gym'").fetchone()[0] == 1 and \
+            conn.execute("SELECT 1 FROM gym LIMIT 1").fetchone() is not None
+    finally:
+        conn.close()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="tiny", help="Seeded data size")
+    for name in ("gyms", "users", "climbs", "ascents", "comments"):
+        parser.add_argument(f"--{name}", type=int, help=f"Override the scale's {name} count")
+    parser.add_argument("--db", help="SQLite file to seed, or reuse if it already has data (default: temporary)")
+    parser.add_argument("--mode", choices=("inprocess", "server", "both"), default="both")
+    parser.add_argument("--only", help="Comma-separated scenario names to run")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--compare", help="Compare this results JSON with --baseline instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95/RPS change (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        if not args.baseline:
+            parser.error("--compare needs --baseline")
+        with open(args.compare) as f:
+            current = json.load(f)
+    else:
+        current = run(args)
+        if current is None:
+            return 2
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+
+def run(args) -> Optional[dict]:
+    scale = dict(SCALES[args.scale])
+    scale.update({name: getattr(args, name) for name in scale if getattr(args, name) is not None})
+    path = args.db
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+    database_url = f"sqlite:///{path}"
+    # The app's engine is built from DATABASE_URL on import, so set it first
+    os.environ["DATABASE_URL"] = database_url
+    from sqlmodel import SQLModel
+    from app.auth import create_access_token
+    from app.db import engine
+    from app.main import create_app
+    from app.seed import seed_database
+
+    run_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    missing = uncovered_routes(create_app(metrics_enabled=True), scenarios(scale, run_id))
+    if missing:
+        print("Routes without a benchmark scenario:", ", ".join(f"{m} {p}" for m, p in missing))
+        return None
+
+    def selected(mode: str) -> List[Scenario]:
+        # Names created by each mode (gyms, usernames) must not collide
+        chosen = scenarios(scale, run_id + mode[0])
+        return [s for s in chosen if s.name in args.only.split(",")] if args.only else chosen
+
+    try:
+        if has_data(path):
+            print(f"Reusing {path}")
+        else:
+            SQLModel.metadata.create_all(engine)
+            started = time.perf_counter()
+            counts = seed_database(engine, **scale)
+            print({"seeded": counts, "seconds": round(time.perf_counter() - started, 1)})
+        engine.dispose()
+        token = create_access_token({"sub": USER})
+        results = {}
+        if args.mode in ("inprocess", "both"):
+            print("in-process (ASGI transport)")
+            results["inprocess"] = run_inprocess(selected("inprocess"), token, args)
+        if args.mode in ("server", "both"):
+            print("server (uvicorn main:app)")
+            results["server"] = run_server(selected("server"), token, database_url, args)
+    finally:
+        if args.db is None:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.unlink(path + suffix)
+    return {
+        "meta": {
+            "started": datetime.utcnow().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "scale": scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Shared fixtures: an empty in-memory database and a TestClient whose requests use it.
+
+A test module seeds its rows by overriding ``engine`` with a fixture of the same
+name that takes the shared one, adds its data and returns it:
+
+    @pytest.fixture(name="engine")
+    def engine_fixture(engine):
+        with Session(engine) as session:
+            session.add(User(username="ana", email="ana@example.com", hashed_password="x"))
+            session.commit()
+        return engine
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.pool import StaticPool
+from app.auth import principal_cache
+from app.db import get_session
+from app.main import app
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    # One shared connection, so every session sees the same in-memory database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="override_session")
+def override_session_fixture(engine):
+    """
+    Function that points an app's ``get_session`` at ``engine``; overrides are removed after the test.
+    """
+    apps = []
+    # Principals cached from an earlier test's database would outlive its users
+    principal_cache.clear()
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    def override(api: FastAPI) -> FastAPI:
+        api.dependency_overrides[get_session] = get_session_override
+        apps.append(api)
+        return api
+
+    yield override
+    for api in apps:
+        api.dependency_overrides.clear()
+
+
+@pytest.fixture(name="client")
+def client_fixture(override_session):
+    return TestClient(override_session(app))
@@ -0,0 +1,53 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from pathlib import Path
+from sqlalchemy import create_engine, event, inspect
+from sqlmodel import SQLModel
+import main
+import app.main
+from app import db
+from app.main import create_app
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_entry_points_share_one_app():
+    assert main.app is app.main.app
+    paths = {route.path for route in app.main.app.routes}
+    for path in ("/users/{username}", "/users/{username}/stats", "/ascents/", "/ascents/batch",
+                 "/climbs/{climb_id}/comments", "/gyms/{gym_id}/leaderboard", "/health/db"):
+        assert path in paths
+
+
+def test_create_app_runs_no_ddl():
+    statements = []
+
+    @event.listens_for(db.engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    try:
+        create_app()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert statements == []
+
+
+def test_migrations_match_models(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), SQLModel.metadata) == []
+            indexes = {tuple(index["column_names"]) for index in inspect(connection).get_indexes("ascent")}
+        assert {("user_id", "date"), ("climb_id", "date")} <= indexes
+    finally:
+        engine.dispose()
@@ -0,0 +1,89 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlmodel import Session, select
+from app.auth import create_access_token
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+from app.models.stats import ClimbStats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="batcher", email="batcher@example.com", hashed_password="x"))
+        session.add(Gym(name="Batch Gym", location="Here"))
+        session.commit()
+        for color in ("Blue", "Red"):
+            session.add(Climb(gym_id=1, color=color, setter="S", section="A", setter_grade="V2", date_added=datetime(2025, 1, 1)))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="headers")
+def headers_fixture():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'batcher'})}"}
+
+
+def test_batch_creates_all_and_updates_stats(client, engine, headers):
+    items = [
+        {"climb_id": 1, "grade": "V2", "quality_rating": 4},
+        {"climb_id": 1, "sent": False},
+        {"climb_id": 2, "notes": "flash", "date": "2025-03-01T18:00:00"},
+    ]
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(" ".join(statement.split()[:3]))
+
+    res = client.post("/ascents/batch", json={"items": items}, headers=headers)
+    event.remove(engine, "before_cursor_execute", record)
+    assert res.status_code == 201, res.text
+    body = res.json()
+    assert body["errors"] == []
+    assert [a["climb_id"] for a in body["created"]] == [1, 1, 2]
+    assert body["created"][2]["date"].startswith("2025-03-01")
+    assert all(a["user_id"] == 1 for a in body["created"])
+    # One bulk INSERT each for the stats, leaderboard and rollup rows, not one per item. SQLite
+    # can't order a multi-row RETURNING, so there SQLAlchemy sends the ascents one row at a time
+    inserts = [s for s in statements if s.startswith("INSERT")]
+    assert inserts.count("INSERT INTO ascent") == len(items)
+    assert len(inserts) - len(items) <= 3
+
+    with Session(engine) as session:
+        stats = session.get(ClimbStats, 1)
+        assert (stats.send_count, stats.attempt_count, stats.quality_count) == (1, 1, 1)
+        assert session.get(Climb, 1).ascent_count == 2
+        assert session.get(ClimbStats, 2).send_count == 1
+
+
+def test_atomic_batch_rejects_missing_climb(client, engine, headers):
+    items = [{"climb_id": 1}, {"climb_id": 99}, {"climb_id": 2}]
+    res = client.post("/ascents/batch", json={"items": items}, headers=headers)
+    assert res.status_code == 404
+    detail = res.json()["detail"]
+    assert detail["code"] == "climb_not_found"
+    assert [e["index"] for e in detail["errors"]] == [1]
+    with Session(engine) as session:
+        assert session.exec(select(Ascent)).all() == []
+
+
+def test_per_item_batch_saves_valid_items(client, engine, headers):
+    items = [{"climb_id": 99}, {"climb_id": 2}, {"climb_id": 100}]
+    res = client.post("/ascents/batch", json={"items": items, "atomic": False}, headers=headers)
+    assert res.status_code == 201
+    body = res.json()
+    assert [a["climb_id"] for a in body["created"]] == [2]
+    assert [(e["index"], e["code"]) for e in body["errors"]] == [(0, "climb_not_found"), (2, "climb_not_found")]
+    with Session(engine) as session:
+        assert len(session.exec(select(Ascent)).all()) == 1
+
+
+def test_batch_validation(client, headers):
+    assert client.post("/ascents/batch", json={"items": []}, headers=headers).status_code == 422
+    too_many = [{"climb_id": 1}] * 101
+    assert client.post("/ascents/batch", json={"items": too_many}, headers=headers).status_code == 422
+    bad = [{"climb_id": 1, "quality_rating": 9}]
+    assert client.post("/ascents/batch", json={"items": bad}, headers=headers).status_code == 422
+    assert client.post("/ascents/batch", json={"items": [{"climb_id": 1}]}).status_code == 401
@@ -0,0 +1,127 @@
+import json
+import re
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlmodel import Session, select
+from app import feed
+from app.ascent_import import AscentImporter, iter_lines, iter_records
+from app.auth import create_access_token
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+from app.models.stats import ClimbStats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="importer", email="importer@example.com", hashed_password="x"))
+        session.add(Gym(name="Import Gym", location="Here"))
+        session.commit()
+        # The blue cave climb by Ana was reset in March
+        session.add(Climb(gym_id=1, color="Blue", setter="Ana", section="Cave", setter_grade="V3", date_added=datetime(2025, 1, 1)))
+        session.add(Climb(gym_id=1, color="Blue", setter="Ana", section="Cave", setter_grade="V5", date_added=datetime(2025, 3, 1)))
+        session.add(Climb(gym_id=1, color="Red", setter="Bo", section="Slab", setter_grade="V1", date_added=datetime(2025, 1, 1)))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="headers")
+def headers_fixture():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'importer'})}"}
+
+
+CSV = (
+    "date,sent,grade,quality_rating,notes,climb_id,gym_name,color,setter,section\n"
+    "2025-02-10T18:00:00,true,V3,4,\"flash, finally\",,Import Gym,Blue,Ana,Cave\n"
+    "2025-03-05T18:00:00,false,,,,,Import Gym,Blue,Ana,Cave\n"
+    "2025-03-05T19:00:00,true,V1,,,3,,,,\n"
+    "2025-03-05T19:30:00,yes please,,,,3,,,,\n"
+    "2024-12-01T10:00:00,true,,,,,Import Gym,Blue,Ana,Cave\n"
+    "2025-03-06T10:00:00,true,,,,99,,,,\n"
+    "2025-03-06T11:00:00,true,,,,,,Blue,Ana,Cave\n"
+)
+
+
+def test_import_csv(client, headers, engine):
+    res = client.post("/ascents/import?format=csv", content=CSV, headers=headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["imported"] == 3 and body["failed"] == 4
+    assert [(e["line"], e["code"]) for e in body["errors"]] == [
+        (5, "invalid_row"), (6, "climb_not_found"), (7, "climb_not_found"), (8, "invalid_row"),
+    ]
+    assert body["errors"][0]["message"].startswith("sent:")
+    with Session(engine) as session:
+        ascents = session.exec(select(Ascent).order_by(Ascent.date)).all()
+        # Resolved to the climb on the wall at the time of each ascent
+        assert [a.climb_id for a in ascents] == [1, 2, 3]
+        assert ascents[0].notes == "flash, finally" and ascents[0].quality_rating == 4
+        assert ascents[1].sent is False and ascents[1].grade is None
+        stats = {s.climb_id: s for s in session.exec(select(ClimbStats)).all()}
+        assert stats[1].send_count == 1 and stats[2].attempt_count == 1
+        assert session.get(Climb, 1).ascent_count == 1
+
+
+def test_import_ndjson_round_trips_export(client, headers, engine):
+    lines = [
+        {"date": "2025-02-01T10:00:00Z", "climb_id": 1, "sent": True, "grade": "V3"},
+        {"date": "2025-02-02T10:00:00+02:00", "gym_id": 1, "color": "Red", "setter": "Bo", "section": "Slab"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n\n{not json\n[1, 2]\n"
+    res = client.post("/ascents/import", content=body, headers=headers)
+    assert res.json()["imported"] == 2
+    assert [(e["line"], e["code"]) for e in res.json()["errors"]] == [(4, "invalid_row"), (5, "invalid_row")]
+
+    exported = client.get("/ascents/export", headers=headers).text
+    assert client.post("/ascents/import", content=exported, headers=headers).json() == {
+        "imported": 2, "failed": 0, "errors": [], "errors_truncated": False,
+    }
+    with Session(engine) as session:
+        # Offsets are converted to naive UTC
+        dates = sorted(a.date for a in session.exec(select(Ascent)).all())
+        assert dates == [datetime(2025, 2, 1, 10)] * 2 + [datetime(2025, 2, 2, 8)] * 2
+
+
+def test_one_climb_lookup_per_chunk(engine):
+    rows = [{"date": f"2025-03-{d:02d}T10:00:00", "gym_name": "Import Gym", "color": "Blue", "setter": "Ana", "section": "Cave"}
+            for d in range(1, 29)] * 10
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with Session(engine) as session:
+        result = AscentImporter(session, 1, chunk_size=100).run(iter_records(map(json.dumps, rows), "ndjson"))
+    event.remove(engine, "before_cursor_execute", record)
+    assert result.imported == 280
+    climb_reads = [s for s in statements if re.search(r"FROM climb\b", s)]
+    ascent_inserts = [s for s in statements if s.startswith("INSERT INTO ascent")]
+    # Per chunk of 100: one climb lookup and one executemany, whatever the row count
+    assert len(climb_reads) == 3
+    assert len(ascent_inserts) == 3
+
+
+def test_errors_are_capped(engine):
+    lines = ["climb_id,sent"] + ["1,maybe"] * 20 + ["1,true"]
+    with Session(engine) as session:
+        result = AscentImporter(session, 1, max_errors=5).run(iter_records(lines, "csv"))
+    assert result.imported == 1 and result.failed == 20
+    assert len(result.errors) == 5 and result.errors_truncated
+
+
+def test_iter_lines_splits_across_chunks():
+    chunks = ["﻿a,b\r\n1,".encode(), b'"x\ny"\n2,', "é".encode()[:1], "é".encode()[1:]]
+    records = list(iter_records(iter_lines(chunks), "csv"))
+    assert records == [(3, {"a": "1", "b": "x\ny"}), (4, {"a": "2", "b": "é"})]
+
+
+def test_import_requires_auth_and_announces(client, headers):
+    assert client.post("/ascents/import", content="").status_code == 401
+    feed.bus.reset()
+    res = client.post("/ascents/import", content='{"climb_id": 1}\n{"climb_id": 3}\n', headers=headers)
+    assert res.json()["imported"] == 2
+    events = feed.bus.history(1)
+    assert [(e.type, e.data["count"]) for e in events] == [("ascents.imported", 2)]
+    feed.bus.reset()
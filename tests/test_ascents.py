@@ -1,7 +1,9 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.pool import StaticPool
 from app.main import app
+from app.auth import create_access_token
 from app.models.ascents import Ascent
 from app.models.core import User, Climb, Gym
 from app.db import get_session
@@ -10,7 +12,7 @@ from datetime import datetime
 @pytest.fixture(name="client")
 def client_fixture():
     # Use an in-memory SQLite database for testing
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
     SQLModel.metadata.create_all(engine)
     
     # Seed a user, gym, and climb
@@ -37,11 +39,11 @@ def client_fixture():
 
 def test_create_ascent(client):
     # Simulate login
-    token = "demo-token"  # This should match your app's demo bypass
+    token = create_access_token({"sub": "testuser"})
     headers = {"Authorization": f"Bearer {token}"}
     # Get climb id
-    response = client.get("/gyms/")
-    climb_id = response.json()[0]["climbs"][0]["id"] if response.json()[0]["climbs"] else 1
+    gym_id = client.get("/gyms/").json()[0]["id"]
+    climb_id = client.get(f"/gyms/{gym_id}/climbs/").json()[0]["id"]
     data = {
         "climb_id": climb_id,
         "grade": "V2",
@@ -55,24 +57,24 @@ def test_create_ascent(client):
     assert ascent["notes"] == "Felt soft"
 
 def test_list_user_ascents(client):
-    token = "demo-token"
+    token = create_access_token({"sub": "testuser"})
     headers = {"Authorization": f"Bearer {token}"}
     response = client.get("/ascents/", headers=headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
 def test_list_ascents_for_climb(client):
-    token = "demo-token"
+    token = create_access_token({"sub": "testuser"})
     headers = {"Authorization": f"Bearer {token}"}
     # Get climb id
-    response = client.get("/gyms/")
-    climb_id = response.json()[0]["climbs"][0]["id"] if response.json()[0]["climbs"] else 1
+    gym_id = client.get("/gyms/").json()[0]["id"]
+    climb_id = client.get(f"/gyms/{gym_id}/climbs/").json()[0]["id"]
     response = client.get(f"/ascents/climb/{climb_id}", headers=headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
 def test_ascent_edge_cases(client):
-    token = "demo-token"
+    token = create_access_token({"sub": "testuser"})
     headers = {"Authorization": f"Bearer {token}"}
     # Missing climb_id
     response = client.post("/ascents/", json={"grade": "V3"}, headers=headers)
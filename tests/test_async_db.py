@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.pool import StaticPool
+from app.aio import async_router
+from app.auth import create_access_token
+from app.db import get_async_session, is_async_url, sync_url
+from app import suggest
+from app.models.core import User
+from app.routes import ascents, auth, climbs, comments, gyms, users
+
+
+@pytest.fixture(name="client")
+def client_fixture():
+    engine = create_async_engine("sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    app = FastAPI()
+    for module in (gyms, auth, ascents, climbs, comments, users):
+        app.include_router(async_router(module.router))
+
+    async def get_async_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    with TestClient(app) as client:
+        async def setup():
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all)
+            async with AsyncSession(engine) as session:
+                session.add(User(username="async", email="async@example.com", hashed_password="x"))
+                await session.commit()
+
+        client.portal.call(setup)
+        yield client
+
+
+def test_async_url_detection():
+    assert is_async_url("sqlite+aiosqlite:///./db.sqlite")
+    assert is_async_url("postgresql+asyncpg://u:p@host/db")
+    assert not is_async_url("sqlite:///./db.sqlite")
+    assert sync_url("sqlite+aiosqlite:///./db.sqlite") == "sqlite:///./db.sqlite"
+    assert sync_url("postgresql+asyncpg://u:p@host/db") == "postgresql://u:p@host/db"
+
+
+def test_async_routes_are_coroutines(client):
+    endpoints = {route.path: route.endpoint for route in client.app.routes if hasattr(route, "endpoint")}
+    assert asyncio.iscoroutinefunction(endpoints["/ascents/"])
+    assert asyncio.iscoroutinefunction(endpoints["/gyms/{gym_id}/climbs/"])
+
+
+def test_async_crud_flow(client):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'async'})}"}
+    gym = client.post("/gyms/", json={"name": "Async Gym", "location": "Loop"})
+    assert gym.status_code == 201
+    climb = client.post("/gyms/1/climbs/", json={
+        "gym_id": 1, "color": "Teal", "setter": "async", "section": "A", "setter_grade": "V2", "date_added": "2025-04-01T00:00:00"
+    }, headers=headers)
+    assert climb.status_code == 201
+    assert client.post("/ascents/", json={"climb_id": 1, "grade": "V2", "quality_rating": 4}, headers=headers).status_code == 201
+    assert client.post("/climbs/1/comments", json={"text": "crimpy"}, headers=headers).status_code == 201
+    assert len(client.get("/ascents/", headers=headers).json()) == 1
+    assert client.get("/climbs/1/stats").json()["quality_average"] == 4.0
+    assert client.get("/users/async").json()["climbs_set"] == [1]
+    assert client.get("/auth/me", headers=headers).json()["username"] == "async"
+    assert client.get("/ascents/", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert client.get("/gyms/42").status_code == 404
+
+
+def test_suggest_indexes_off_the_event_loop(client, monkeypatch):
+    on_loop = []
+
+    def index_climbs(climbs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return suggest.GymClimbIndex()
+
+    monkeypatch.setattr(suggest, "index_climbs", index_climbs)
+    suggest.reset()
+    assert client.post("/gyms/", json={"name": "Async Gym", "location": "Loop"}).status_code == 201
+    try:
+        res = client.get("/gyms/1/climbs/suggest", params={"q": "blue"})
+    finally:
+        suggest.reset()
+    assert res.status_code == 200 and res.json() == []
+    assert on_loop == [False]
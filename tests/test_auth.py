@@ -1,20 +1,29 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
-from app.db import init_db
-from sqlmodel import SQLModel, create_engine
+from app.auth import principal_cache
+from app.db import get_session
+from sqlmodel import SQLModel, Session, create_engine
 import os
 import tempfile
 
 @pytest.fixture(scope="function")
 def client():
+    # The app does no DDL at startup, so the test database gets its schema here
     db_fd, db_path = tempfile.mkstemp()
-    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
-    engine = create_engine(os.environ["DATABASE_URL"])
+    engine = create_engine(f"sqlite:///{db_path}")
     SQLModel.metadata.create_all(engine)
-    init_db()
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    principal_cache.clear()
     with TestClient(app) as c:
         yield c
+    app.dependency_overrides.clear()
+    engine.dispose()
     os.close(db_fd)
     os.unlink(db_path)
 
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+from app.auth import create_access_token
+from app.cache import TTLCache
+from app.models.core import User
+from main import app
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="cached", email="cached@example.com", hashed_password="x"))
+        session.commit()
+    return engine
+
+
+def count_user_selects(engine):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("SELECT") and ("FROM user" in statement or 'FROM "user"' in statement):
+            statements.append(statement)
+
+    return statements
+
+
+def test_principal_cached_between_requests(client, engine):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'cached'})}"}
+    selects = count_user_selects(engine)
+    for _ in range(3):
+        assert client.get("/auth/me", headers=headers).json()["username"] == "cached"
+    assert len(selects) == 1
+    stats = client.get("/health/caches").json()["principals"]
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+def test_user_update_invalidates(client, engine):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'cached'})}"}
+    assert client.get("/auth/me", headers=headers).json()["is_public"] is True
+    with Session(engine) as session:
+        user = session.get(User, 1)
+        user.is_public = False
+        session.add(user)
+        session.commit()
+    assert client.get("/auth/me", headers=headers).json()["is_public"] is False
+
+
+def test_ttl_cache_expiry_and_lru(monkeypatch):
+    lookups = []
+    cache = TTLCache("test", maxsize=2, ttl=10, on_lookup=lambda name, hit: lookups.append(hit))
+    now = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts least recently used "b"
+    assert cache.get("b") is None
+    now[0] += 11
+    assert cache.get("a") is None
+    assert lookups == [True, False, False]
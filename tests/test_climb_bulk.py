@@ -0,0 +1,110 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlmodel import Session, select
+from app import feed, suggest
+from app.ascent_import import AscentImporter
+from app.auth import create_access_token
+from app.models.core import Climb, Gym, User, climb_difficulty
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="setter", email="setter@example.com", hashed_password="x"))
+        session.add(Gym(name="Reset Gym", location="Here"))
+        session.commit()
+        for color in ("Blue", "Red"):
+            session.add(Climb(gym_id=1, color=color, setter="Old", section="Cave", setter_grade="V2", date_added=datetime(2025, 1, 1)))
+        session.add(Climb(gym_id=1, color="Green", setter="Old", section="Slab", setter_grade="V1", date_added=datetime(2025, 1, 1)))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="client")
+def client_fixture(client):
+    suggest.reset()
+    feed.bus.reset()
+    yield client
+    feed.bus.reset()
+
+
+@pytest.fixture(name="headers")
+def headers_fixture():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'setter'})}"}
+
+
+def new_climbs(count, section="Cave"):
+    return [
+        {"gym_id": 99, "color": f"Color{i}", "setter": "New", "section": section, "setter_grade": f"V{i}",
+         "date_added": datetime(2025, 6, 1).isoformat()}
+        for i in range(count)
+    ]
+
+
+def test_bulk_reset_archives_section(client, headers, engine):
+    # Load the suggestion index so the reset has to update it in place
+    assert len(client.get("/gyms/1/climbs/suggest?section=cave").json()) == 2
+    res = client.post("/gyms/1/climbs/bulk", json={"climbs": new_climbs(3), "replace_section": "Cave"}, headers=headers)
+    assert res.status_code == 201
+    body = res.json()
+    assert body["archived"] == [1, 2]
+    assert [c["id"] for c in body["created"]] == [4, 5, 6]
+    assert all(c["gym_id"] == 1 and c["archived_at"] is None for c in body["created"])
+    with Session(engine) as session:
+        # Core inserts skip the ORM listener, so the route fills difficulty itself
+        difficulties = [c.difficulty for c in session.exec(select(Climb).where(Climb.id > 3))]
+        assert difficulties == [climb_difficulty(f"V{i}") for i in range(3)] and difficulties[0] > 0
+
+    listed = client.get("/gyms/1/climbs/?all_time=true").json()
+    assert sorted(c["id"] for c in listed) == [3, 4, 5, 6]
+    with_archived = client.get("/gyms/1/climbs/?all_time=true&include_archived=true").json()
+    assert len(with_archived) == 6
+    suggestions = client.get("/gyms/1/climbs/suggest?section=cave").json()
+    assert sorted(c["id"] for c in suggestions) == [4, 5, 6]
+
+    events = feed.bus.history(1)
+    assert [e.type for e in events] == ["climbs.created"]
+    assert events[0].data["archived"] == [1, 2] and len(events[0].data["climbs"]) == 3
+
+
+def test_bulk_is_one_insert(client, headers, engine):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    res = client.post("/gyms/1/climbs/bulk", json={"climbs": new_climbs(40)}, headers=headers)
+    event.remove(engine, "before_cursor_execute", record)
+    assert res.status_code == 201 and len(res.json()["created"]) == 40
+    assert res.json()["archived"] == []
+    # One statement where the database can order a multi-row RETURNING; SQLite can't,
+    # so SQLAlchemy sends the rows one at a time there
+    inserts = [s for s in statements if s.startswith("INSERT INTO climb")]
+    assert len(inserts) == (40 if engine.dialect.name == "sqlite" else 1)
+    assert not any(s.startswith("UPDATE") for s in statements)
+
+
+def test_bulk_validation_and_errors(client, headers):
+    assert client.post("/gyms/1/climbs/bulk", json={"climbs": new_climbs(1)}).status_code == 401
+    assert client.post("/gyms/9/climbs/bulk", json={"climbs": new_climbs(1)}, headers=headers).status_code == 404
+    assert client.post("/gyms/1/climbs/bulk", json={"climbs": []}, headers=headers).status_code == 422
+    assert client.post("/gyms/1/climbs/bulk", json={"climbs": new_climbs(101)}, headers=headers).status_code == 422
+    bad = new_climbs(2)
+    del bad[1]["setter_grade"]
+    assert client.post("/gyms/1/climbs/bulk", json={"climbs": bad}, headers=headers).status_code == 422
+    # Nothing was written by the rejected requests
+    assert len(client.get("/gyms/1/climbs/?all_time=true").json()) == 3
+
+
+def test_import_skips_climbs_archived_before_the_ascent(client, headers, engine):
+    client.post("/gyms/1/climbs/bulk", json={"climbs": new_climbs(1, "Slab"), "replace_section": "Slab"}, headers=headers)
+    key = {"gym_id": 1, "color": "Green", "setter": "Old", "section": "Slab"}
+    with Session(engine) as session:
+        result = AscentImporter(session, 1).run([
+            (1, {**key, "date": "2025-02-01T10:00:00"}),
+            (2, {**key, "date": datetime.utcnow().replace(year=datetime.utcnow().year + 1).isoformat()}),
+        ])
+    assert result.imported == 1
+    assert [(e.line, e.code) for e in result.errors] == [(2, "climb_not_found")]
@@ -0,0 +1,123 @@
+import itertools
+import re
+import pytest
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from app.auth import create_access_token
+from app.climb_stats import rebuild_climb_stats
+from app.models.core import Climb, Gym, User
+from app.pagination import encode_cursor, keyset_page
+from app.routes.gyms import CLIMB_SORT_KEYS, filter_climbs
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?climb\b")
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add(User(username="lister", email="lister@example.com", hashed_password="x"))
+        session.add(Gym(name="List Gym", location="Here"))
+        session.add(Gym(name="Other Gym", location="There"))
+        session.commit()
+        rows = [
+            ("Blue", "Ana", "Cave", "V3", now - timedelta(days=3)),
+            ("Red", "Ben", "Slab", "V5", now - timedelta(days=10)),
+            ("Blue", "Ben", "Cave", "v10", now - timedelta(days=20)),
+            ("Green", "Ana", "Roof", "V1", now - timedelta(days=400)),
+            ("Pink", "Cy", "Slab", "project", now - timedelta(days=1)),
+        ]
+        for color, setter, section, grade, added in rows:
+            session.add(Climb(gym_id=1, color=color, setter=setter, section=section, setter_grade=grade, date_added=added))
+        session.add(Climb(gym_id=2, color="Blue", setter="Ana", section="Cave", setter_grade="V3", date_added=now))
+        session.commit()
+    return engine
+
+
+def ids(res):
+    assert res.status_code == 200, res.text
+    return [c["id"] for c in res.json()]
+
+
+def test_default_window_excludes_old_climbs(client):
+    assert ids(client.get("/gyms/1/climbs/")) == [5, 1, 2, 3]
+    assert ids(client.get("/gyms/1/climbs/?all_time=true")) == [5, 1, 2, 3, 4]
+    since = (datetime.utcnow() - timedelta(days=15)).isoformat()
+    assert ids(client.get(f"/gyms/1/climbs/?since={since}")) == [5, 1, 2]
+
+
+def test_filters(client):
+    assert ids(client.get("/gyms/1/climbs/?color=Blue")) == [1, 3]
+    assert ids(client.get("/gyms/1/climbs/?setter=Ben&section=Cave")) == [3]
+    # Recognised grades match regardless of spelling; others match exactly
+    assert ids(client.get("/gyms/1/climbs/?grade=V10")) == [3]
+    assert ids(client.get("/gyms/1/climbs/?grade=v 3")) == [1]
+    assert ids(client.get("/gyms/1/climbs/?grade=project")) == [5]
+
+
+def test_grade_range(client):
+    assert ids(client.get("/gyms/1/climbs/?min_grade=V3&max_grade=V5")) == [1, 2]
+    # Bounds may be given on another scale of the same discipline
+    assert ids(client.get("/gyms/1/climbs/?min_grade=6C&all_time=true")) == [2, 3]
+    assert ids(client.get("/gyms/1/climbs/?max_grade=v1&all_time=true")) == [5, 4]
+    assert client.get("/gyms/1/climbs/?min_grade=hard").status_code == 422
+
+
+def test_sort_by_grade(client):
+    assert ids(client.get("/gyms/1/climbs/?sort=grade")) == [3, 2, 1, 5]
+    assert ids(client.get("/gyms/1/climbs/?sort=grade&order=asc&all_time=true")) == [5, 4, 1, 2, 3]
+
+
+def test_sort_by_popularity_and_quality_follows_ascents(client, engine):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'lister'})}"}
+    for climb_id, quality in ((2, 3), (2, 3), (1, 5)):
+        res = client.post("/ascents/", json={"climb_id": climb_id, "quality_rating": quality}, headers=headers)
+        assert res.status_code == 201
+    assert ids(client.get("/gyms/1/climbs/?sort=popularity"))[:2] == [2, 1]
+    assert ids(client.get("/gyms/1/climbs/?sort=quality"))[:2] == [1, 2]
+    listed = client.get("/gyms/1/climbs/?sort=popularity").json()[0]
+    assert listed["ascent_count"] == 2 and listed["quality_average"] == 3.0
+
+    with Session(engine) as session:
+        session.get(Climb, 2).ascent_count = 99
+        session.commit()
+        rebuild_climb_stats(session)
+        assert session.get(Climb, 2).ascent_count == 2
+
+
+def test_cursor_walk_per_sort(client):
+    for sort in ("date", "grade", "popularity", "quality"):
+        expected = ids(client.get(f"/gyms/1/climbs/?sort={sort}&all_time=true"))
+        walked, cursor = [], None
+        while True:
+            suffix = f"&cursor={cursor}" if cursor else ""
+            res = client.get(f"/gyms/1/climbs/?sort={sort}&all_time=true&limit=2{suffix}")
+            walked += ids(res)
+            cursor = res.headers.get("x-next-cursor")
+            if not cursor:
+                break
+        assert walked == expected, sort
+
+
+def test_invalid_sort(client):
+    assert client.get("/gyms/1/climbs/?sort=height").status_code == 422
+
+
+def test_every_filter_and_sort_uses_an_index(engine):
+    filters = ("grade", "setter", "section", "color", "min_difficulty")
+    values = {"grade": "V3", "setter": "Ana", "section": "Cave", "color": "Blue", "min_difficulty": 103.0}
+    since = datetime.utcnow() - timedelta(days=183)
+    with engine.connect() as connection:
+        for sort, descending, windowed, paged in itertools.product(CLIMB_SORT_KEYS, (True, False), (True, False), (True, False)):
+            key_column, key_attr = CLIMB_SORT_KEYS[sort]
+            cursor = encode_cursor(since if key_attr == "date_added" else 1, 1) if paged else None
+            for size in range(len(filters) + 1):
+                for chosen in itertools.combinations(filters, size):
+                    statement = keyset_page(
+                        filter_climbs(1, since if windowed else None, **{name: values[name] for name in chosen}),
+                        key_column, Climb.id, cursor, 20, descending=descending,
+                    )
+                    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+                    plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+                    assert not any(FULL_SCAN.match(step) for step in plan), (sort.value, chosen, windowed, paged, plan)
+                    assert any("USING INDEX" in step for step in plan), (sort.value, chosen, plan)
@@ -1,22 +1,19 @@
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
-from app.db import init_db
-from sqlmodel import SQLModel, Session, create_engine
-import os
-import tempfile
+from app.auth import create_access_token
+from app.models.core import User
+from sqlmodel import Session
 
-@pytest.fixture(scope="function")
-def client():
-    db_fd, db_path = tempfile.mkstemp()
-    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
-    engine = create_engine(os.environ["DATABASE_URL"])
-    SQLModel.metadata.create_all(engine)
-    init_db()
-    with TestClient(app) as c:
-        yield c
-    os.close(db_fd)
-    os.unlink(db_path)
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="rater", email="rater@example.com", hashed_password="x"))
+        session.commit()
+    return engine
+
+@pytest.fixture(name="client")
+def client_fixture(client):
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'rater'})}"
+    return client
 
 def test_update_climb_rating_success(client):
     # Create gym and climb
@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlmodel import Session
+from app.auth import create_access_token
+from app.climb_stats import rebuild_climb_stats
+from app.models.core import Climb, Gym, User
+from app.models.stats import ClimbStats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="statsuser", email="s@example.com", hashed_password="x"))
+        session.add(Gym(name="Stats Gym", location="Here"))
+        session.commit()
+        session.add(Climb(gym_id=1, color="Red", setter="S", section="A", setter_grade="V3", date_added=datetime(2025, 1, 1)))
+        session.commit()
+    return engine
+
+
+def log(client, **fields):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'statsuser'})}"}
+    res = client.post("/ascents/", json={"climb_id": 1, **fields}, headers=headers)
+    assert res.status_code == 201
+    return res.json()
+
+
+def test_stats_updated_on_ascent_write(client):
+    assert client.get("/climbs/1/stats").json()["send_count"] == 0
+    log(client, grade="V3", quality_rating=4)
+    log(client, grade="V4", quality_rating=3, sent=True)
+    log(client, grade="V3", sent=False)
+    stats = client.get("/climbs/1/stats").json()
+    assert stats["send_count"] == 2
+    assert stats["attempt_count"] == 1
+    assert stats["quality_average"] == 3.5
+    assert stats["consensus_grade"] == "V3"
+    assert stats["consensus_difficulty"] == round((103 + 104 + 103) / 3, 2)
+    assert stats["grade_histogram"] == {"V3": 2, "V4": 1}
+
+
+def test_histogram_counts_spellings_of_a_grade_together(client, engine):
+    for grade in ("v 7", "V7", "v7", "V6", "V6", "font 7a"):
+        log(client, grade=grade)
+    stats = client.get("/climbs/1/stats").json()
+    assert stats["grade_histogram"] == {"V7": 3, "V6": 2, "7A": 1}
+    assert stats["consensus_grade"] == "V7"
+    with Session(engine) as session:
+        assert rebuild_climb_stats(session) == 1
+    assert client.get("/climbs/1/stats").json()["grade_histogram"] == stats["grade_histogram"]
+
+
+def test_stats_missing_climb(client):
+    assert client.get("/climbs/999/stats").status_code == 404
+
+
+def test_rebuild_matches_incremental(client, engine):
+    log(client, grade="V2", quality_rating=5)
+    log(client, grade="V3", sent=False, quality_rating=2)
+    before = client.get("/climbs/1/stats").json()
+    with Session(engine) as session:
+        session.delete(session.get(ClimbStats, 1))
+        session.commit()
+        assert rebuild_climb_stats(session) == 1
+    assert client.get("/climbs/1/stats").json() == before
+
+
+def test_stats_row_created_concurrently_is_not_inserted_twice(client, engine):
+    # Another transaction creates the climb's stats row after this write found none
+    created = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def race(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO climbstats") and not created:
+            created.append(True)
+            conn.exec_driver_sql(
+                "INSERT INTO climbstats (climb_id, send_count, attempt_count, quality_sum, quality_count, "
+                "grade_histogram, difficulty_sum, difficulty_count) VALUES (1, 5, 0, 0, 0, '{}', 0, 0)"
+            )
+
+    try:
+        log(client, grade="V3")
+    finally:
+        event.remove(engine, "before_cursor_execute", race)
+    assert created
+    assert client.get("/climbs/1/stats").json()["send_count"] == 6
@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event, update
+from sqlmodel import Session, delete, select
+from app.auth import create_access_token
+from app.comment_summary import PREVIEW_LENGTH, reconcile_comment_summaries, record_comment
+from app.models.comment import Comment
+from app.models.core import Climb, Gym, User
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        for name in ("ana", "bo"):
+            session.add(User(username=name, email=f"{name}@example.com", hashed_password="x"))
+        session.add(Gym(name="Beta Gym", location="Here"))
+        session.commit()
+        for color in ("Blue", "Red", "Green"):
+            session.add(Climb(gym_id=1, color=color, setter="Ana", section="Cave", setter_grade="V3",
+                              date_added=datetime.utcnow()))
+        session.commit()
+    return engine
+
+
+def auth(username):
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+def comment(client, climb_id, username, text):
+    res = client.post(f"/climbs/{climb_id}/comments", json={"text": text}, headers=auth(username))
+    assert res.status_code == 201, res.text
+    return res.json()["id"]
+
+
+def summaries(client):
+    res = client.get("/gyms/1/climbs/")
+    assert res.status_code == 200
+    return {
+        c["id"]: (c["comment_count"], c["last_comment_username"], c["last_comment_preview"])
+        for c in res.json()
+    }
+
+
+def test_comment_writes_keep_listing_summary(client, engine):
+    comment(client, 1, "ana", "Heel hook the lip")
+    latest = comment(client, 1, "bo", "x" * 300)
+    comment(client, 2, "ana", "Soft for the grade")
+    listed = summaries(client)
+    assert listed[1][:2] == (2, "bo") and len(listed[1][2]) == PREVIEW_LENGTH and listed[1][2].endswith("…")
+    assert listed[2] == (1, "ana", "Soft for the grade")
+    assert listed[3] == (0, None, None)
+
+    # Deleting the latest comment brings back the one before it
+    assert client.delete(f"/climbs/comments/{latest}", headers=auth("bo")).status_code == 204
+    assert summaries(client)[1] == (1, "ana", "Heel hook the lip")
+    only = client.get("/climbs/2/comments").json()[0]["id"]
+    assert client.delete(f"/climbs/comments/{only}", headers=auth("ana")).status_code == 204
+    assert summaries(client)[2] == (0, None, None)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    client.get("/gyms/1/climbs/?all_time=true&sort=popularity")
+    event.remove(engine, "before_cursor_execute", record)
+    assert not any("FROM comment" in s for s in statements)
+
+
+def test_reconcile_repairs_drift(client, engine):
+    comment(client, 1, "ana", "first")
+    comment(client, 1, "bo", "second")
+    with Session(engine) as session:
+        assert reconcile_comment_summaries(session) == 0
+        # Drift: a comment removed behind the API's back and a wrong counter
+        session.exec(delete(Comment).where(Comment.text == "second"))
+        session.execute(update(Climb).where(Climb.id == 3).values(comment_count=5))
+        session.commit()
+        assert reconcile_comment_summaries(session) == 2
+        climbs = {c.id: c for c in session.exec(select(Climb))}
+        assert (climbs[1].comment_count, climbs[1].last_comment_preview) == (1, "first")
+        assert (climbs[3].comment_count, climbs[3].last_comment_id) == (0, None)
+        assert reconcile_comment_summaries(session, climb_id=1) == 0
+
+
+def test_older_comment_committed_last_does_not_take_the_preview(engine):
+    with Session(engine) as session:
+        newer = Comment(climb_id=1, user_id=2, username="bo", text="newer", created_at=datetime(2025, 5, 2))
+        older = Comment(climb_id=1, user_id=1, username="ana", text="older", created_at=datetime(2025, 5, 1))
+        # Both written, then recorded in commit order: the newer one finished first
+        for row in (newer, older):
+            session.add(row)
+            session.flush()
+            record_comment(session, row)
+        session.commit()
+        climb = session.get(Climb, 1)
+        assert (climb.comment_count, climb.last_comment_preview) == (2, "newer")
+        assert reconcile_comment_summaries(session) == 0
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+from app.db import TimedQueuePool, engine_options, make_engine, pool_metrics
+from app.settings import DatabaseSettings
+from main import app
+
+
+@pytest.fixture(name="db_path")
+def db_path_fixture():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    yield path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "12")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    monkeypatch.setenv("DB_ECHO", "debug")
+    settings = DatabaseSettings.from_env()
+    assert settings.pool_size == 12
+    assert settings.pool_pre_ping is False
+    assert settings.echo_flag == "debug"
+    assert DatabaseSettings(echo="false").echo_flag is False
+
+
+def test_engine_options():
+    settings = DatabaseSettings(pool_size=7, statement_timeout_ms=2500)
+    pg = engine_options(settings, "postgresql://u:p@db/app")
+    assert pg["pool_size"] == 7 and pg["poolclass"] is TimedQueuePool
+    assert pg["connect_args"] == {"options": "-c statement_timeout=2500"}
+    # In-memory SQLite keeps its single shared connection
+    assert "pool_size" not in engine_options(settings, "sqlite://")
+    assert engine_options(settings, "sqlite://")["echo"] is False
+
+
+def test_sqlite_pragmas_and_pool_metrics(db_path):
+    engine = make_engine(DatabaseSettings(url=f"sqlite:///{db_path}", sqlite_cache_size=-2048))
+    pool_metrics.reset()
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -2048
+    with engine.connect():
+        pass
+    snapshot = pool_metrics.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 2 and snapshot["checkins"] == 2
+    assert snapshot["connects"] == 1
+    assert snapshot["checked_out"] == 0
+    assert snapshot["wait_seconds_total"] >= 0
+    engine.dispose()
+
+
+def test_health_endpoint():
+    res = TestClient(app).get("/health/db")
+    assert res.status_code == 200
+    assert "checkouts" in res.json()["pool"]
@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlmodel import Session
+from app.auth import create_access_token, principal_cache
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+from app.routes import ascents as ascent_routes
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    base = datetime(2025, 1, 1)
+    with Session(engine) as session:
+        session.add(User(username="exporter", email="exporter@example.com", hashed_password="x"))
+        session.add(User(username="other", email="other@example.com", hashed_password="x"))
+        session.add(Gym(name="Export Gym", location="Here"))
+        session.commit()
+        session.add(Climb(gym_id=1, color="Blue", setter="Ana", section="Cave", setter_grade="V3", date_added=base))
+        session.commit()
+        session.execute(insert(Ascent), [
+            {"user_id": 1, "climb_id": 1, "date": base + timedelta(hours=i), "sent": i % 2 == 0,
+             "grade": "V3", "notes": "crimps, then a \"dyno\"" if i == 0 else None, "quality_rating": None}
+            for i in range(25)
+        ] + [{"user_id": 2, "climb_id": 1, "date": base, "sent": True, "grade": None, "notes": None, "quality_rating": None}])
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="client")
+def client_fixture(client, monkeypatch):
+    # Small batches so the export spans several cursor partitions
+    monkeypatch.setattr(ascent_routes, "EXPORT_BATCH_SIZE", 10)
+    return client
+
+
+@pytest.fixture(name="headers")
+def headers_fixture():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'exporter'})}"}
+
+
+def test_export_ndjson(client, headers):
+    res = client.get("/ascents/export", headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="ascents-exporter.ndjson"' in res.headers["content-disposition"]
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert len(rows) == 25
+    assert [r["id"] for r in rows] == sorted(r["id"] for r in rows)
+    assert rows[0]["gym_name"] == "Export Gym" and rows[0]["setter"] == "Ana"
+    assert rows[0]["date"] == "2025-01-01T00:00:00"
+    assert rows[1]["sent"] is False
+
+
+def test_export_csv(client, headers):
+    res = client.get("/ascents/export?format=csv", headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert len(rows) == 25
+    assert rows[0]["notes"] == 'crimps, then a "dyno"'
+    assert rows[0]["color"] == "Blue" and rows[0]["setter_grade"] == "V3"
+
+
+def test_export_requires_auth_and_valid_format(client, headers):
+    assert client.get("/ascents/export").status_code == 401
+    assert client.get("/ascents/export?format=xml", headers=headers).status_code == 422
+
+
+def test_export_only_includes_current_user(client):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'other'})}"}
+    principal_cache.clear()
+    res = client.get("/ascents/export?format=csv", headers=headers)
+    assert res.text.splitlines()[0].startswith("id,date,sent")
+    assert len(res.text.splitlines()) == 2
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from main import app as root_app
+from app.main import app
+from app import feed
+from app.auth import create_access_token
+from app.feed import FeedBus, sse_stream
+from app.models.core import Climb, Gym, User
+
+
+def parse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+    return fields.get("event"), fields.get("id"), json.loads(fields["data"]) if "data" in fields else None
+
+
+async def collect(stream, count):
+    chunks = []
+    async for chunk in stream:
+        if chunk.startswith("retry:") or chunk.startswith(":"):
+            continue
+        chunks.append(parse(chunk))
+        if len(chunks) == count:
+            break
+    await stream.aclose()
+    return chunks
+
+
+async def connected():
+    return False
+
+
+def test_publish_and_resume():
+    async def scenario():
+        bus = FeedBus(history=10)
+        for i in range(3):
+            bus.publish(1, "climb.created", {"n": i})
+        bus.publish(2, "climb.created", {"n": 99})
+        subscriber, backlog, gap = bus.subscribe(1, last_event_id=1)
+        assert [e.id for e in backlog] == [2, 3] and not gap
+        stream = sse_stream(subscriber, backlog, gap, connected, feed=bus)
+        # A write from a worker thread while the client is connected
+        threading.Thread(target=bus.publish, args=(1, "comment.created", {"text": "hi"})).start()
+        events = await collect(stream, 3)
+        assert [(e[0], e[1]) for e in events] == [("climb.created", "2"), ("climb.created", "3"), ("comment.created", "4")]
+        assert events[2][2]["data"] == {"text": "hi"}
+        assert bus.subscriber_count(1) == 0
+
+    asyncio.run(scenario())
+
+
+def test_resume_beyond_history_signals_reset():
+    async def scenario():
+        bus = FeedBus(history=2)
+        for i in range(5):
+            bus.publish(1, "climb.created", {"n": i})
+        subscriber, backlog, gap = bus.subscribe(1, last_event_id=1)
+        assert gap and [e.id for e in backlog] == [4, 5]
+        events = await collect(sse_stream(subscriber, backlog, gap, connected, feed=bus), 1)
+        assert events[0][0] == "reset"
+        # An id from before a restart is also unrecoverable
+        assert bus.subscribe(1, last_event_id=50)[2]
+        assert not bus.subscribe(1, last_event_id=5)[2]
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_is_dropped():
+    async def scenario():
+        bus = FeedBus(queue_size=2)
+        subscriber, backlog, gap = bus.subscribe(1)
+        for i in range(5):
+            bus.publish(1, "ascent.created", {"n": i})
+        await asyncio.sleep(0)
+        assert subscriber.dropped
+        events = await collect(sse_stream(subscriber, backlog, gap, connected, feed=bus), 1)
+        assert events[0][0] == "dropped"
+        assert bus.dropped == 1 and bus.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_heartbeat_on_idle_stream():
+    async def scenario():
+        bus = FeedBus()
+        subscriber, backlog, gap = bus.subscribe(1)
+        stream = sse_stream(subscriber, backlog, gap, connected, heartbeat=0.01, feed=bus)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="feeder", email="feeder@example.com", hashed_password="x"))
+        session.add(Gym(name="Feed Gym", location="Here"))
+        session.commit()
+    return engine
+
+
+def test_write_handlers_publish(override_session):
+    feed.bus.reset()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'feeder'})}"}
+    root, client = TestClient(override_session(root_app)), TestClient(override_session(app))
+    climb = root.post("/gyms/1/climbs/", json={
+        "gym_id": 1, "color": "Blue", "setter": "S", "section": "A", "setter_grade": "V2",
+        "date_added": datetime.utcnow().isoformat(),
+    }, headers=headers).json()
+    root.patch(f"/gyms/climbs/{climb['id']}/rating", json={"rating": 4}, headers=headers)
+    comment = root.post(f"/climbs/{climb['id']}/comments", json={"text": "juggy"}, headers=headers).json()
+    root.delete(f"/climbs/comments/{comment['id']}", headers=headers)
+    client.post("/ascents/", json={"climb_id": climb["id"]}, headers=headers)
+    client.post("/ascents/batch", json={"items": [{"climb_id": climb["id"]}, {"climb_id": 404}], "atomic": False}, headers=headers)
+
+    history = feed.bus.history(1)
+    assert [e.type for e in history] == [
+        "climb.created", "climb.rated", "comment.created", "comment.deleted", "ascent.created", "ascent.created",
+    ]
+    assert [e.id for e in history] == [1, 2, 3, 4, 5, 6]
+    assert history[0].data["color"] == "Blue"
+    assert history[2].data["text"] == "juggy"
+    feed.bus.reset()
@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime
+from sqlmodel import Session, select
+from app.ascent_import import AscentImporter
+from app.auth import create_access_token
+from app.grades import convert_grade, grade_rank, normalize_grade, parse_grade
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="grader", email="grader@example.com", hashed_password="x"))
+        session.add(Gym(name="Grade Gym", location="Here"))
+        session.commit()
+        session.add(Climb(gym_id=1, color="Blue", setter="Ana", section="Cave", setter_grade="f6b+", date_added=datetime(2025, 1, 1)))
+        session.commit()
+    return engine
+
+
+@pytest.mark.parametrize("text, scale, canonical", [
+    ("v 3", "v", "V3"), ("VB", "v", "VB"), ("V3-4", "v", "V3-4"), ("v5+", "v", "V5+"),
+    ("5.11A", "yds", "5.11a"), ("5.10a/b", "yds", "5.10a/b"), ("5.9+", "yds", "5.9+"),
+    ("6A+", "font", "6A+"), ("Font 7a", "font", "7A"), ("f5+", "font", "5+"),
+    ("6a+", "french", "6a+"), ("8c", "french", "8c"),
+])
+def test_parse_grade(text, scale, canonical):
+    grade = parse_grade(text)
+    assert (grade.scale, grade.text) == (scale, canonical)
+    assert normalize_grade(text) == canonical
+
+
+def test_unrecognised_grades():
+    for text in (None, "", "project", "5+", "6D", "5.16x", "V", "10a"):
+        assert parse_grade(text) is None, text
+
+
+def test_difficulty_orders_across_scales():
+    assert grade_rank("V3") < grade_rank("V3+") < grade_rank("V3-4") < grade_rank("V4")
+    assert grade_rank("6A") == grade_rank("V3") and grade_rank("7A") == grade_rank("V6")
+    assert grade_rank("5.10a") < grade_rank("5.10-") < grade_rank("5.10b") < grade_rank("5.10+") < grade_rank("5.10d")
+    assert grade_rank("6a") == grade_rank("5.10a") and grade_rank("7a+") == grade_rank("5.12a")
+    # Every boulder grade ranks above every route grade
+    assert grade_rank("VB") > grade_rank("9c")
+
+
+def test_convert_grade():
+    assert convert_grade("6B+", "v") == "V4"
+    assert convert_grade("V6", "font") == "7A"
+    assert convert_grade("5.12a", "french") == "7a+"
+    assert convert_grade("6c", "yds") == "5.11a"
+    assert convert_grade("5.8", "french") == "5a"
+    assert convert_grade("V3", "v") == "V3"
+    assert convert_grade("V3", "yds") is None
+    assert convert_grade("project", "v") is None
+
+
+def test_difficulty_stored_on_every_write_path(client, engine):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'grader'})}"}
+    assert client.post("/ascents/", json={"climb_id": 1, "grade": "V4"}, headers=headers).json()["difficulty"] == 104
+    res = client.post("/ascents/batch", json={"items": [{"climb_id": 1, "grade": "6C"}, {"climb_id": 1}]}, headers=headers)
+    assert [a["difficulty"] for a in res.json()["created"]] == [105, None]
+    with Session(engine) as session:
+        AscentImporter(session, 1).run([(1, {"climb_id": 1, "grade": "sandbag"}), (2, {"climb_id": 1, "grade": "v 7"})])
+        stored = session.exec(select(Ascent.grade, Ascent.difficulty).order_by(Ascent.id)).all()
+        assert stored == [("V4", 104), ("6C", 105), (None, None), ("sandbag", None), ("v 7", 107)]
+        assert session.get(Climb, 1).difficulty == grade_rank("6B+")
+
+    stats = client.get("/climbs/1/stats").json()
+    assert stats["consensus_difficulty"] == round((104 + 105 + 107) / 3, 2)
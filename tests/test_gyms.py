@@ -1,24 +1,19 @@
 import pytest
-from fastapi.testclient import TestClient
-from sqlmodel import SQLModel, Session
-from app.main import app
-from app.db import engine, get_session
+from sqlmodel import Session
+from app.auth import create_access_token
+from app.models.core import User
 
-@pytest.fixture(name="session")
-def session_fixture():
-    SQLModel.metadata.create_all(engine)
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
     with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
+        session.add(User(username="setter", email="setter@example.com", hashed_password="x"))
+        session.commit()
+    return engine
 
 @pytest.fixture(name="client")
-def client_fixture(session):
-    def override_get_session():
-        yield session
-    app.dependency_overrides[get_session] = override_get_session
-    with TestClient(app) as c:
-        yield c
-    app.dependency_overrides.clear()
+def client_fixture(client):
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'setter'})}"
+    return client
 
 def test_create_and_list_gym(client):
     # Test gym creation
@@ -59,7 +54,7 @@ def test_create_and_list_climb(client):
     assert climb["color"] == "Blue"
     assert climb["setter"] == "Alex"
     # List climbs for gym with pagination
-    resp = client.get(f"/gyms/{gym_id}/climbs/?skip=0&limit=1")
+    resp = client.get(f"/gyms/{gym_id}/climbs/?skip=0&limit=1&all_time=true")
     assert resp.status_code == 200
     climbs = resp.json()
     assert isinstance(climbs, list)
@@ -0,0 +1,68 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+from app.hashing import PasswordHasher, crypt_context, hasher
+from app.models.core import User
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine, monkeypatch):
+    # Cheap cost factors keep the test fast; 4 is bcrypt's minimum
+    monkeypatch.setattr(hasher, "rounds", 5)
+    with Session(engine) as session:
+        session.add(User(username="legacy", email="legacy@example.com", hashed_password=crypt_context(4).hash("oldpassword")))
+        session.commit()
+    return engine
+
+
+def test_register_hashes_with_configured_cost(client, engine):
+    res = client.post("/auth/register", json={"username": "fresh", "email": "fresh@example.com", "password": "password123"})
+    assert res.status_code == 201
+    with Session(engine) as session:
+        assert session.get(User, 2).hashed_password.startswith("$2b$05$")
+    duplicate = client.post("/auth/register", json={"username": "fresh", "email": "other@example.com", "password": "password123"})
+    assert duplicate.status_code == 400
+
+
+def test_login_rehashes_outdated_cost(client, engine):
+    assert client.post("/auth/login", data={"username": "legacy", "password": "wrong"}).status_code == 400
+    res = client.post("/auth/login", data={"username": "legacy", "password": "oldpassword"})
+    assert res.status_code == 200
+    with Session(engine) as session:
+        assert session.get(User, 1).hashed_password.startswith("$2b$05$")
+    assert client.post("/auth/login", data={"username": "legacy", "password": "oldpassword"}).status_code == 200
+
+
+def test_backpressure_rejects_when_saturated():
+    busy = PasswordHasher(rounds=4, workers=1, max_pending=1)
+
+    async def storm():
+        return await asyncio.gather(*(busy._run(time.sleep, 0.2) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(storm())
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    assert busy.rejected == 1
+    busy.shutdown()
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_job_ends():
+    busy = PasswordHasher(rounds=4, workers=1, max_pending=0)
+
+    async def cancel_then_retry():
+        first = asyncio.ensure_future(busy._run(time.sleep, 0.3))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0)
+        # The sleep is still running on the executor, so there is no free slot yet
+        with pytest.raises(HTTPException):
+            await busy._run(time.sleep, 0)
+        await asyncio.sleep(0.4)
+        return await busy._run(sum, [1, 2])
+
+    assert asyncio.run(cancel_then_retry()) == 3
+    assert busy.rejected == 1
+    busy.shutdown()
@@ -0,0 +1,159 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlmodel import Session
+from app.auth import create_access_token
+from app.http_cache import (
+    FakeRedis, LocalBackend, NullBackend, RedisBackend, ResponseCache, backend_from_env, response_cache,
+)
+from app.models.comment import Comment
+from app.models.core import Climb, Gym, User
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="cacher", email="cacher@example.com", hashed_password="x"))
+        session.add(Gym(name="Cache Gym", location="Here"))
+        session.add(Gym(name="Quiet Gym", location="There"))
+        session.commit()
+        session.add(Climb(gym_id=1, color="Blue", setter="S", section="A", setter_grade="V2", date_added=datetime.utcnow()))
+        session.add(Climb(gym_id=2, color="Red", setter="S", section="A", setter_grade="V2", date_added=datetime.utcnow()))
+        session.commit()
+        session.add(Comment(climb_id=1, user_id=1, username="cacher", text="first"))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="headers")
+def headers_fixture():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'cacher'})}"}
+
+
+def revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    again = client.get(url, headers={"If-None-Match": etag})
+    return first, again
+
+
+@pytest.mark.parametrize("url", ["/gyms/", "/gyms/1", "/gyms/1/climbs/", "/climbs/1/comments"])
+def test_etag_and_not_modified(client, url):
+    first, again = revalidate(client, url)
+    assert first.headers["etag"].startswith('"')
+    assert "max-age" in first.headers["cache-control"]
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_cached_response_skips_database(client, engine):
+    client.get("/gyms/1/climbs/?limit=1")
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    res = client.get("/gyms/1/climbs/?limit=1")
+    event.remove(engine, "before_cursor_execute", record)
+    assert res.status_code == 200 and len(res.json()) == 1
+    assert statements == []
+
+
+def test_cursor_header_is_cached(client, engine):
+    with Session(engine) as session:
+        session.add(Gym(name="Third Gym", location="Far"))
+        session.commit()
+    first = client.get("/gyms/?limit=2")
+    second = client.get("/gyms/?limit=2")
+    assert first.headers["x-next-cursor"] == second.headers["x-next-cursor"]
+
+
+def test_writes_bump_gym_version(client, headers):
+    _, climbs = revalidate(client, "/gyms/1/climbs/")
+    etag = climbs.headers["etag"]
+    other = client.get("/gyms/2/climbs/").headers["etag"]
+
+    new = client.post("/gyms/1/climbs/", json={
+        "gym_id": 1, "color": "Green", "setter": "S", "section": "B", "setter_grade": "V1",
+        "date_added": datetime.utcnow().isoformat(),
+    }, headers=headers)
+    assert new.status_code == 201
+    res = client.get("/gyms/1/climbs/", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+    # Other gyms keep their cached representation
+    assert client.get("/gyms/2/climbs/", headers={"If-None-Match": other}).status_code == 304
+
+    etag = res.headers["etag"]
+    assert client.patch("/gyms/climbs/1/rating", json={"rating": 5}, headers=headers).status_code == 200
+    res = client.get("/gyms/1/climbs/", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert {c["id"]: c["rating"] for c in res.json()}[1] == 5
+
+
+def test_comment_writes_bump_comment_listing(client, headers):
+    etag = client.get("/climbs/1/comments").headers["etag"]
+    created = client.post("/climbs/1/comments", json={"text": "second"}, headers=headers)
+    assert created.status_code == 201
+    res = client.get("/climbs/1/comments", headers={"If-None-Match": etag})
+    assert [c["text"] for c in res.json()] == ["first", "second"]
+
+    etag = res.headers["etag"]
+    assert client.delete(f"/climbs/comments/{created.json()['id']}", headers=headers).status_code == 204
+    res = client.get("/climbs/1/comments", headers={"If-None-Match": etag})
+    assert [c["text"] for c in res.json()] == ["first"]
+
+
+def test_new_gym_bumps_gym_list(client):
+    etag = client.get("/gyms/").headers["etag"]
+    assert client.post("/gyms/", json={"name": "Fresh Gym", "location": "New"}).status_code == 201
+    res = client.get("/gyms/", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and len(res.json()) == 3
+
+
+def test_ascents_bump_climb_listing(client, headers):
+    etag = client.get("/gyms/1/climbs/").headers["etag"]
+    assert client.post("/ascents/", json={"climb_id": 1}, headers=headers).status_code == 201
+    res = client.get("/gyms/1/climbs/", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.json()[0]["ascent_count"] == 1
+    etag = res.headers["etag"]
+    assert client.post("/ascents/batch", json={"items": [{"climb_id": 1}]}, headers=headers).status_code == 201
+    assert client.get("/gyms/1/climbs/", headers={"If-None-Match": etag}).json()[0]["ascent_count"] == 2
+
+
+def test_shared_backend_across_workers(client, engine, monkeypatch):
+    # Two workers sharing one (fake) Redis see each other's version bumps
+    shared = FakeRedis()
+    worker_a = ResponseCache(RedisBackend(shared))
+    worker_b = ResponseCache(RedisBackend(shared))
+    monkeypatch.setattr(response_cache, "backend", worker_a.backend)
+    entries = lambda: sorted(k for k in shared._data if k.startswith("cgl:r:"))
+
+    etag = client.get("/gyms/1").headers["etag"]
+    assert client.get("/gyms/1", headers={"If-None-Match": etag}).status_code == 304
+    assert len(entries()) == 1
+    with Session(engine) as session:
+        worker_b.bump(session, "gym:1")
+    # Worker A recomputes under the new version; the body, and so the ETag, is unchanged
+    assert client.get("/gyms/1", headers={"If-None-Match": etag}).status_code == 304
+    assert len(entries()) == 2
+
+
+
+def test_local_backend_refuses_several_workers(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["uvicorn", "main:app", "--workers", "4"])
+    with pytest.raises(RuntimeError, match="4 workers"):
+        backend_from_env()
+    monkeypatch.setenv("RESPONSE_CACHE_BACKEND", "off")
+    assert isinstance(backend_from_env(), NullBackend)
+    monkeypatch.delenv("RESPONSE_CACHE_BACKEND")
+    monkeypatch.setattr("sys.argv", ["gunicorn", "-k", "uvicorn.workers.UvicornWorker", "main:app"])
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    with pytest.raises(RuntimeError):
+        backend_from_env()
+    monkeypatch.setattr("sys.argv", ["uvicorn", "main:app", "--workers=1"])
+    assert isinstance(backend_from_env(), LocalBackend)
@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlmodel import SQLModel, Session, create_engine, select
+from app import ingest
+from app.main import create_app
+from app.auth import create_access_token
+from app.ingest import AscentIngestor, Journal, worker_journal_path, worker_journal_pattern
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+from app.models.stats import ClimbStats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(tmp_path):
+    # A file database: the writer thread and the requests use separate connections
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(username="ana", email="ana@example.com", hashed_password="x"))
+        session.add(Gym(name="Queue Gym", location="Here"))
+        session.commit()
+        session.add(Climb(gym_id=1, color="Blue", setter="Ana", section="Cave", setter_grade="V3",
+                          date_added=datetime.utcnow()))
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="journal")
+def journal_fixture(tmp_path):
+    return tmp_path / "journal.ndjson"
+
+
+@pytest.fixture(name="make_client")
+def make_client_fixture(engine, journal, override_session):
+    def make_client(**options):
+        app = override_session(create_app(ingest_enabled=True))
+        app.state.ingestor = AscentIngestor(engine, str(journal), **options)
+        return TestClient(app)
+
+    return make_client
+
+
+def headers(key=None):
+    result = {"Authorization": f"Bearer {create_access_token({'sub': 'ana'})}"}
+    if key:
+        result["Idempotency-Key"] = key
+    return result
+
+
+def drain(ingestor):
+    deadline = time.monotonic() + 5
+    while ingestor.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ingestor.pending() == 0
+
+
+def ascent_count(engine):
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(Ascent)).one()
+
+
+def test_ingest_acknowledges_then_writes_in_batches(engine, journal, make_client):
+    # Only a full batch of 6 is written; the flush interval is too long to fire during the test
+    with make_client(flush_ms=60000, batch_rows=6) as client:
+        ingestor = client.app.state.ingestor
+        for i in range(5):
+            res = client.post("/ascents/ingest", json={"climb_id": 1, "grade": "V4", "sent": i % 2 == 0},
+                              headers=headers(f"k{i}"))
+            assert res.status_code == 202, res.text
+            assert res.json() == {"idempotency_key": f"k{i}", "status": "queued", "id": None}
+        # Acknowledged from the journal before anything was committed
+        assert len(journal.read_text().splitlines()) == 5
+        assert ingestor.committed == 0
+        assert client.post("/ascents/ingest", json={"climb_id": 99}, headers=headers()).status_code == 404
+        generated = client.post("/ascents/ingest", json={"climb_id": 1}, headers=headers())
+        assert generated.status_code == 202 and generated.json()["idempotency_key"]
+        drain(ingestor)
+        assert (ingestor.committed, ingestor.batches) == (6, 1)
+        assert journal.read_text() == ""
+        assert client.post("/ascents/ingest", json={"climb_id": 1, "sent": False}, headers=headers()).status_code == 202
+    # Shutdown writes what is still queued
+    assert ascent_count(engine) == 7
+    with Session(engine) as session:
+        stats = session.get(ClimbStats, 1)
+        assert (stats.send_count, stats.attempt_count) == (4, 3)
+
+
+def test_retried_key_is_stored_once(engine, make_client):
+    with make_client(flush_ms=100) as client:
+        ingestor = client.app.state.ingestor
+        payload = {"climb_id": 1, "grade": "V3"}
+        first = client.post("/ascents/ingest", json=payload, headers=headers("retry-me"))
+        again = client.post("/ascents/ingest", json=payload, headers=headers("retry-me"))
+        assert first.status_code == again.status_code == 202
+        assert (ingestor.accepted, ingestor.duplicates) == (1, 1)
+        drain(ingestor)
+        stored = client.post("/ascents/ingest", json=payload, headers=headers("retry-me"))
+        assert stored.status_code == 200
+        with Session(engine) as session:
+            ascent = session.exec(select(Ascent)).one()
+        assert stored.json() == {"idempotency_key": "retry-me", "status": "stored", "id": ascent.id}
+        too_long = client.post("/ascents/ingest", json=payload, headers=headers("x" * 256))
+        assert too_long.status_code == 422
+    assert ascent_count(engine) == 1
+
+
+def test_journal_is_replayed_after_crash(engine, journal, make_client):
+    with Session(engine) as session:
+        # Written before the crash, but the journal was not truncated yet
+        session.add(Ascent(user_id=1, climb_id=1, idempotency_key="done"))
+        session.commit()
+    lines = [
+        {"key": "done", "user_id": 1, "climb_id": 1, "date": "2025-05-01T10:00:00", "grade": None,
+         "notes": None, "sent": True, "quality_rating": None},
+        {"key": "lost", "user_id": 1, "climb_id": 1, "date": "2025-05-01T10:05:00", "grade": "V5",
+         "notes": "acked, never committed", "sent": True, "quality_rating": 4},
+    ]
+    # The last write was torn mid-line and never acknowledged
+    journal.write_text("".join(json.dumps(line) + "\n" for line in lines) + '{"key": "tor')
+
+    with make_client(flush_ms=10) as client:
+        ingestor = client.app.state.ingestor
+        assert ingestor.replayed == 2
+        drain(ingestor)
+        assert (ingestor.committed, ingestor.duplicates) == (1, 1)
+    with Session(engine) as session:
+        keys = sorted(session.exec(select(Ascent.idempotency_key)).all())
+        assert keys == ["done", "lost"]
+        assert session.exec(select(Ascent).where(Ascent.idempotency_key == "lost")).one().notes == "acked, never committed"
+    # A drained journal is removed on shutdown
+    assert not journal.exists()
+
+
+def test_journal_is_compacted_to_pending_tail(engine, journal):
+    ingestor = AscentIngestor(engine, str(journal), flush_ms=10_000, batch_rows=2, journal_max_bytes=1)
+    journal.write_text("".join(
+        json.dumps({"key": f"k{i}", "user_id": 1, "climb_id": 1, "date": "2025-05-01T10:00:00", "grade": None,
+                    "notes": None, "sent": True, "quality_rating": None}) + "\n"
+        for i in range(3)
+    ))
+    ingestor.start()
+    # A full batch is written at once; the one left waits out the flush interval
+    deadline = time.monotonic() + 5
+    while ingestor.committed < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert [json.loads(line)["key"] for line in journal.read_text().splitlines()] == ["k2"]
+    ingestor.stop()
+    assert ascent_count(engine) == 3
+    assert not journal.exists()
+
+
+def test_writer_survives_side_effect_failures(engine, journal, monkeypatch, make_client):
+    def broken_bump(*args, **kwargs):
+        raise ConnectionError("cache is down")
+
+    monkeypatch.setattr(ingest.response_cache, "bump", broken_bump)
+    with make_client(flush_ms=10) as client:
+        ingestor = client.app.state.ingestor
+        for i in range(2):
+            assert client.post("/ascents/ingest", json={"climb_id": 1}, headers=headers(f"k{i}")).status_code == 202
+            drain(ingestor)
+        assert ingestor.alive() and ingestor.committed == 2
+        assert journal.read_text() == ""
+    assert ascent_count(engine) == 2
+
+
+def test_ingest_refuses_work_without_writer(engine, make_client):
+    # Not entered as a context manager: the lifespan that starts the writer never runs
+    client = make_client()
+    res = client.post("/ascents/ingest", json={"climb_id": 1}, headers=headers("k"))
+    assert res.status_code == 503
+    assert ascent_count(engine) == 0
+
+
+def test_worker_takes_over_orphaned_journals(engine, tmp_path):
+    base = str(tmp_path / "ascent_journal.ndjson")
+    record = {"user_id": 1, "climb_id": 1, "date": "2025-05-01T10:00:00", "grade": None, "notes": None,
+              "sent": True, "quality_rating": None}
+    # A worker that crashed, and one that is still running (it holds its journal's lock)
+    orphan = tmp_path / "ascent_journal.101.ndjson"
+    orphan.write_text(json.dumps({**record, "key": "orphaned"}) + "\n")
+    live = Journal(worker_journal_path(base, pid=102))
+    live.open()
+    live.append({**record, "key": "live"})
+    live.sync(1)
+
+    ingestor = AscentIngestor(engine, worker_journal_path(base, pid=103), flush_ms=10,
+                              adopt=worker_journal_pattern(base))
+    assert ingestor.start() == 1
+    drain(ingestor)
+    ingestor.stop()
+    live.close()
+    with Session(engine) as session:
+        assert session.exec(select(Ascent.idempotency_key)).all() == ["orphaned"]
+    assert sorted(p.name for p in tmp_path.glob("ascent_journal.*")) == ["ascent_journal.102.ndjson"]
+
+
+def test_unreadable_journal_lines_are_dropped_on_replay(engine, journal):
+    good = {"key": "good", "user_id": 1, "climb_id": 1, "date": "2025-05-01T10:00:00", "grade": None,
+            "notes": None, "sent": True, "quality_rating": None}
+    lines = [{k: v for k, v in good.items() if k != "date"} | {"key": "no-date"},
+             {**good, "key": "bad-date", "date": "yesterday"}, ["not", "a", "record"], good]
+    journal.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    ingestor = AscentIngestor(engine, str(journal), flush_ms=10)
+    assert ingestor.start() == 1
+    drain(ingestor)
+    ingestor.stop()
+    assert (ingestor.committed, ingestor.rejected) == (1, 3)
+    with Session(engine) as session:
+        assert session.exec(select(Ascent.idempotency_key)).all() == ["good"]
+
+
+def test_record_that_fails_outside_the_database_does_not_block_the_queue(engine, monkeypatch, make_client):
+    def grade_rank(grade):
+        if grade == "boom":
+            raise ValueError("unparseable grade")
+        return None
+
+    monkeypatch.setattr(ingest, "grade_rank", grade_rank)
+    with make_client(flush_ms=200) as client:
+        ingestor = client.app.state.ingestor
+        for key, grade in (("k0", "V3"), ("k1", "boom"), ("k2", "V4")):
+            res = client.post("/ascents/ingest", json={"climb_id": 1, "grade": grade}, headers=headers(key))
+            assert res.status_code == 202
+        drain(ingestor)
+        assert (ingestor.committed, ingestor.rejected) == (2, 1)
+    with Session(engine) as session:
+        assert sorted(session.exec(select(Ascent.idempotency_key)).all()) == ["k0", "k2"]
+
+
+def test_stop_leaves_journal_open_while_writer_is_busy(engine, journal, monkeypatch, make_client):
+    release = threading.Event()
+    write = AscentIngestor._write
+
+    def slow_write(self, batch):
+        release.wait(5)
+        write(self, batch)
+
+    monkeypatch.setattr(AscentIngestor, "_write", slow_write)
+    monkeypatch.setattr(ingest, "STOP_TIMEOUT_SECONDS", 0.05)
+    with make_client(flush_ms=10) as client:
+        ingestor = client.app.state.ingestor
+        assert client.post("/ascents/ingest", json={"climb_id": 1}, headers=headers("slow")).status_code == 202
+        time.sleep(0.05)
+    # Shutdown gave up waiting, but the writer can still finish and empty the journal
+    assert ingestor.alive() and ingestor.journal.is_open()
+    release.set()
+    ingestor._thread.join(5)
+    assert ascent_count(engine) == 1 and journal.read_text() == ""
+    ingestor.stop()
+    assert not journal.exists()
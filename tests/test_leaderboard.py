@@ -0,0 +1,213 @@
+import pytest
+import threading
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+from sqlmodel import Session, delete, select
+from app import leaderboard
+from app.ascent_import import AscentImporter
+from app.auth import create_access_token
+from app.leaderboard import RankedScores, compact, period_start, rebuild_leaderboards, record_ascent_rows
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User, climb_difficulty
+from app.models.stats import LeaderboardScore
+
+USERS = ("ana", "bo", "cy")
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        for name in USERS:
+            session.add(User(username=name, email=f"{name}@example.com", hashed_password="x"))
+        session.add(Gym(name="Board Gym", location="Here"))
+        session.add(Gym(name="Other Gym", location="There"))
+        session.commit()
+        for grade in ("V1", "V4", "V7"):
+            session.add(Climb(gym_id=1, color="Blue", setter="Ana", section="Cave", setter_grade=grade, date_added=datetime(2025, 1, 1)))
+        session.add(Climb(gym_id=2, color="Red", setter="Bo", section="Slab", setter_grade="V9", date_added=datetime(2025, 1, 1)))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="client")
+def client_fixture(client):
+    leaderboard.reset()
+    yield client
+    leaderboard.reset()
+
+
+def auth(username):
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+def log(client, username, *climbs, sent=True):
+    items = [{"climb_id": climb_id, "sent": sent} for climb_id in climbs]
+    res = client.post("/ascents/batch", json={"items": items}, headers=auth(username))
+    assert res.status_code == 201
+
+
+def test_ranked_scores_ties_and_paging():
+    scores = RankedScores(size=4)
+    for user_id, score in [(1, 5), (2, 9), (3, 5), (4, 1), (5, 300)]:
+        scores.set(user_id, score)
+    assert scores.top(10) == [(1, 5, 300), (2, 2, 9), (3, 1, 5), (3, 3, 5), (5, 4, 1)]
+    # Pages split inside a tie keep the shared rank
+    assert scores.top(2, offset=3) == [(3, 3, 5), (5, 4, 1)]
+    assert scores.rank(3) == (3, 5) and scores.rank(4) == (5, 1)
+    scores.set(5, 0)
+    scores.set(4, 7)
+    assert scores.rank(5) is None and len(scores) == 4
+    assert scores.top(3) == [(1, 2, 9), (2, 4, 7), (3, 1, 5)]
+
+
+def test_leaderboard_boards_and_my_rank(client):
+    log(client, "ana", 1, 2)
+    log(client, "bo", 3)
+    log(client, "bo", 1, 2, sent=False)
+    log(client, "cy", 4)  # another gym
+
+    res = client.get("/gyms/1/leaderboard")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["period_start"] == period_start("week", datetime.utcnow().date()).isoformat()
+    assert body["total"] == 2
+    assert [(e["rank"], e["username"], e["score"]) for e in body["entries"]] == [(1, "ana", 2), (2, "bo", 1)]
+
+    hardest = client.get("/gyms/1/leaderboard?board=hardest&window=all").json()["entries"]
+    assert [(e["username"], e["score"]) for e in hardest] == [("bo", climb_difficulty("V7")), ("ana", climb_difficulty("V4"))]
+    active = client.get("/gyms/1/leaderboard?board=active&window=month").json()["entries"]
+    assert [(e["username"], e["score"]) for e in active] == [("bo", 3), ("ana", 2)]
+
+    assert client.get("/gyms/1/leaderboard/me", headers=auth("bo")).json() == {
+        "rank": 2, "user_id": 2, "username": "bo", "score": 1,
+    }
+    assert client.get("/gyms/1/leaderboard/me", headers=auth("cy")).json()["rank"] is None
+    assert client.get("/gyms/1/leaderboard/me").status_code == 401
+    assert client.get("/gyms/9/leaderboard").status_code == 404
+    assert client.get("/gyms/1/leaderboard?window=year").status_code == 422
+
+
+def test_loaded_board_follows_writes_without_queries(client, engine):
+    log(client, "ana", 1)
+    assert client.get("/gyms/1/leaderboard").json()["entries"][0]["username"] == "ana"
+    res = client.post("/ascents/", json={"climb_id": 2}, headers=auth("bo"))
+    assert res.status_code == 201
+    with Session(engine) as session:
+        AscentImporter(session, 2).run([(1, {"climb_id": 3})])
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    entries = client.get("/gyms/1/leaderboard").json()["entries"]
+    event.remove(engine, "before_cursor_execute", record)
+    assert [(e["username"], e["score"]) for e in entries] == [("bo", 2), ("ana", 1)]
+    assert not any("leaderboardscore" in s for s in statements)
+
+
+def test_incremental_rows_match_rebuild(client, engine):
+    log(client, "ana", 1, 2, 3)
+    log(client, "bo", 3, 4, sent=False)
+    long_ago = datetime.utcnow() - timedelta(days=800)
+    with Session(engine) as session:
+        AscentImporter(session, 3).run([(1, {"climb_id": 2, "date": long_ago.isoformat()})])
+
+    def rows():
+        with Session(engine) as session:
+            return sorted(
+                (s.gym_id, s.window, s.period, s.user_id, s.sends, s.attempts, s.hardest)
+                for s in session.exec(select(LeaderboardScore))
+            )
+
+    incremental = rows()
+    # An ascent older than the week/month retention only counts toward all-time
+    assert [r[1] for r in incremental if r[3] == 3] == ["all"]
+    with Session(engine) as session:
+        assert rebuild_leaderboards(session) == len(incremental)
+    assert rows() == incremental
+
+
+def test_removed_ascent_recomputes_hardest(engine):
+    with Session(engine) as session:
+        now = datetime.utcnow()
+        ascents = [Ascent(user_id=1, climb_id=climb_id, date=now, sent=True) for climb_id in (1, 3)]
+        session.add_all(ascents)
+        rows = [a.model_dump() for a in ascents]
+        record_ascent_rows(session, rows)
+        session.commit()
+        session.exec(delete(Ascent).where(Ascent.climb_id == 3))
+        changes = record_ascent_rows(session, rows[1:], sign=-1)
+        session.commit()
+        assert {(c.window, c.sends, c.hardest) for c in changes} == {
+            (window, 1, climb_difficulty("V1")) for window in ("week", "month", "all")
+        }
+        # Rows whose last ascent is removed are deleted
+        session.exec(delete(Ascent))
+        record_ascent_rows(session, rows[:1], sign=-1)
+        session.commit()
+        assert session.exec(select(LeaderboardScore)).all() == []
+
+
+def test_compact_drops_expired_periods(engine):
+    with Session(engine) as session:
+        for window, period in [("week", date(2000, 1, 3)), ("month", date(2000, 1, 1)), ("all", date(1970, 1, 1))]:
+            session.add(LeaderboardScore(gym_id=1, window=window, period=period, user_id=1, sends=1))
+        session.commit()
+        assert compact(session) == 2
+        assert [s.window for s in session.exec(select(LeaderboardScore))] == ["all"]
+
+
+def write_ascents(engine, user_id, *climbs):
+    rows = [{"user_id": user_id, "climb_id": climb_id, "date": datetime.utcnow(), "sent": True} for climb_id in climbs]
+    with Session(engine) as session:
+        session.add_all(Ascent(**row) for row in rows)
+        scores = record_ascent_rows(session, rows)
+        session.commit()
+    return scores
+
+
+def test_updates_applied_out_of_commit_order_keep_latest_totals(client, engine):
+    with Session(engine) as session:
+        board = leaderboard.get_leaderboard(session, 1, "all")
+        first = write_ascents(engine, 1, 1)
+        second = write_ascents(engine, 1, 2)
+        # The later commit's thread announces first
+        leaderboard.scores_changed(session, second)
+        leaderboard.scores_changed(session, first)
+    assert board.rank("sends", 1) == (1, 2)
+
+
+def test_concurrent_misses_build_once_and_keep_updates_from_during_the_build(client, engine, monkeypatch):
+    builds = []
+    build = leaderboard.build_leaderboard
+
+    def slow_build(session, *args):
+        board = build(session, *args)
+        builds.append(board)
+        if len(builds) == 1:
+            # An ascent commits and is announced after the build's query, before the swap
+            writer.start()
+            time.sleep(0.1)
+        return board
+
+    def announce():
+        with Session(engine) as session:
+            leaderboard.scores_changed(session, write_ascents(engine, 2, 3))
+
+    def read():
+        with Session(engine) as session:
+            boards.append(leaderboard.get_leaderboard(session, 1, "all"))
+
+    monkeypatch.setattr(leaderboard, "build_leaderboard", slow_build)
+    writer = threading.Thread(target=announce)
+    boards = []
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    for thread in readers + [writer]:
+        thread.join(5)
+    assert len(builds) == 1 and all(board is builds[0] for board in boards)
+    assert builds[0].rank("sends", 2) == (1, 1)
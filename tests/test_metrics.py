@@ -0,0 +1,101 @@
+import json
+import logging
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+from app import metrics
+from app.db import get_session
+from app.main import create_app
+from app.models.core import Gym
+
+
+@pytest.fixture(name="api")
+def api_fixture(engine, override_session):
+    with Session(engine) as session:
+        session.add(Gym(name="Metric Gym", location="Here"))
+        session.commit()
+    api = create_app(metrics_enabled=True)
+
+    @api.get("/loop")
+    def loop(session: Session = Depends(get_session)):
+        # One query per id, the shape an N+1 takes
+        return [session.exec(select(Gym).where(Gym.id == i)).first() is not None for i in range(12)]
+
+    override_session(api)
+    metrics.metrics.reset()
+    yield api
+    metrics.uninstall()
+    metrics.metrics.reset()
+
+
+def sample(text, line_start):
+    lines = [line for line in text.splitlines() if line.startswith(line_start)]
+    assert len(lines) == 1, lines
+    return float(lines[0].rsplit(" ", 1)[1])
+
+
+def test_requests_are_timed_and_counted_per_route(api):
+    client = TestClient(api)
+    for gym_id in (1, 1, 9):
+        client.get(f"/gyms/{gym_id}")
+    client.get("/no/such/path")
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = res.text
+    route = 'method="GET",route="/gyms/{gym_id}"'
+    assert sample(text, f'climb_gym_http_requests_total{{{route},status="200"}}') == 2
+    assert sample(text, f'climb_gym_http_requests_total{{{route},status="404"}}') == 1
+    assert sample(text, 'climb_gym_http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert sample(text, f'climb_gym_http_request_duration_seconds_count{{{route}}}') == 3
+    assert sample(text, f'climb_gym_http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 3
+    assert sample(text, f'climb_gym_http_request_db_statements_count{{{route}}}') == 3
+    assert sample(text, f'climb_gym_http_request_db_statements_sum{{{route}}}') >= 2
+    assert sample(text, f'climb_gym_http_request_db_seconds_total{{{route}}}') > 0
+    assert "# TYPE climb_gym_http_request_duration_seconds histogram" in text
+
+
+def test_repeated_statement_is_flagged(api, caplog):
+    client = TestClient(api)
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        client.get("/loop")
+        client.get("/gyms/1")
+    events = [json.loads(record.message) for record in caplog.records]
+    assert [(e["event"], e["route"], e["count"]) for e in events] == [("n_plus_one", "/loop", 12)]
+    text = client.get("/metrics").text
+    assert sample(text, 'climb_gym_http_n_plus_one_total{method="GET",route="/loop"}') == 1
+    assert 'climb_gym_http_n_plus_one_total{method="GET",route="/gyms/{gym_id}"}' not in text
+
+
+def test_slow_queries_are_logged(api, caplog, monkeypatch):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        TestClient(api).get("/gyms/1")
+    slow = [json.loads(record.message) for record in caplog.records]
+    assert slow and all(e["event"] == "slow_query" and e["path"] == "/gyms/1" for e in slow)
+    assert "FROM gym" in slow[0]["statement"] and "\n" not in slow[0]["statement"]
+    assert metrics.metrics.slow_queries == len(slow)
+
+
+def test_disabled_adds_nothing():
+    api = create_app(metrics_enabled=False)
+    assert "/metrics" not in {route.path for route in api.routes}
+    assert all(m.cls is not metrics.MetricsMiddleware for m in api.user_middleware)
+
+
+def test_failed_statement_leaves_no_timing_behind(api, engine):
+    metrics.install()
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM no_such_table")
+        token = metrics._current.set(metrics.RequestStats())
+        try:
+            assert conn.exec_driver_sql("SELECT 1").scalar() == 1
+            stats = metrics._current.get()
+        finally:
+            metrics._current.reset(token)
+        assert not any(key.startswith("metrics") for key in conn.info)
+    assert stats.statements == 1 and stats.db_seconds > 0
@@ -0,0 +1,138 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, select
+from main import app as root_app
+from app.auth import create_access_token
+from app.models.comment import Comment
+from app.models.core import Climb, Gym, User
+from app.pagination import decode_cursor, encode_cursor, keyset_page
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    base = datetime(2025, 1, 1)
+    with Session(engine) as session:
+        session.add(User(username="pager", email="pager@example.com", hashed_password="x"))
+        for i in range(5):
+            session.add(Gym(name=f"Gym {i}", location="Somewhere"))
+        session.commit()
+        for i in range(7):
+            # Duplicate timestamps exercise the id tiebreaker
+            session.add(Climb(gym_id=1, color="Blue", setter="S", section="A", setter_grade="V1", date_added=base + timedelta(days=i // 2)))
+            session.add(Comment(climb_id=1, user_id=1, username="pager", text=f"c{i}", created_at=base + timedelta(hours=i // 2)))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="root_client")
+def root_client_fixture(override_session):
+    # Comments are only mounted on the root entry point
+    return TestClient(override_session(root_app))
+
+
+def walk(client, url, limit):
+    pages, cursor = [], None
+    while True:
+        suffix = f"&cursor={cursor}" if cursor else ""
+        sep = "&" if "?" in url else "?"
+        res = client.get(f"{url}{sep}limit={limit}{suffix}")
+        assert res.status_code == 200
+        pages.append(res.json())
+        cursor = res.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_cursor_roundtrip():
+    now = datetime(2025, 4, 16, 12, 30)
+    assert decode_cursor(encode_cursor(now, 42)) == (now, 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+
+def test_oversized_limit_is_clamped(client, engine):
+    with Session(engine) as session:
+        session.add_all(Gym(name=f"Extra {i}", location="Elsewhere") for i in range(100))
+        session.commit()
+    res = client.get("/gyms/?limit=500")
+    assert res.status_code == 200
+    assert len(res.json()) == 100 and res.headers.get("x-next-cursor")
+    assert client.get("/gyms/1/climbs/?all_time=true&limit=500").status_code == 200
+    assert client.get("/gyms/?limit=0").status_code == 422
+
+
+def test_gyms_cursor_walk(client):
+    pages = walk(client, "/gyms/", 2)
+    ids = [g["id"] for page in pages for g in page]
+    assert ids == [1, 2, 3, 4, 5]
+    assert [len(p) for p in pages] == [2, 2, 1]
+
+
+def test_climbs_cursor_walk_newest_first(client):
+    pages = walk(client, "/gyms/1/climbs/?all_time=true", 3)
+    climbs = [c for page in pages for c in page]
+    assert len(climbs) == 7
+    assert len({c["id"] for c in climbs}) == 7
+    keys = [(c["date_added"], c["id"]) for c in climbs]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_comments_cursor_matches_offset(root_client):
+    by_cursor = [c["id"] for page in walk(root_client, "/climbs/1/comments", 2) for c in page]
+    by_offset = [c["id"] for c in root_client.get("/climbs/1/comments?limit=100").json()]
+    assert by_cursor == by_offset
+    # Exactly full last page does not advertise another cursor
+    res = root_client.get("/climbs/1/comments?limit=7")
+    assert "x-next-cursor" not in res.headers
+
+
+def test_invalid_cursor(root_client):
+    res = root_client.get("/climbs/1/comments?cursor=not-a-cursor")
+    assert res.status_code == 400
+    assert res.json()["detail"]["code"] == "invalid_cursor"
+
+
+def test_user_ascents_cursor(client, engine):
+    token = create_access_token({"sub": "pager"})
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(3):
+        res = client.post("/ascents/", json={"climb_id": 1, "date": f"2025-02-0{i + 1}T00:00:00"}, headers=headers)
+        assert res.status_code == 201
+    first = client.get("/ascents/?limit=2", headers=headers)
+    assert [a["date"][:10] for a in first.json()] == ["2025-02-03", "2025-02-02"]
+    cursor = first.headers["x-next-cursor"]
+    second = client.get(f"/ascents/?limit=2&cursor={cursor}", headers=headers)
+    assert [a["date"][:10] for a in second.json()] == ["2025-02-01"]
+    assert "x-next-cursor" not in second.headers
+
+
+def test_comments_newest_first_walk(root_client):
+    oldest = [c["id"] for page in walk(root_client, "/climbs/1/comments", 3) for c in page]
+    newest = [c["id"] for page in walk(root_client, "/climbs/1/comments?order=desc", 3) for c in page]
+    assert newest == oldest[::-1] and len(newest) == 7
+
+
+def test_my_comments_cursor(root_client):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'pager'})}"}
+    assert root_client.post("/climbs/2/comments", json={"text": "latest"}, headers=headers).status_code == 201
+    pages, cursor = [], ""
+    while cursor is not None:
+        res = root_client.get(f"/climbs/comments/me?limit=3{cursor}", headers=headers)
+        assert res.status_code == 200
+        pages.append([c["text"] for c in res.json()])
+        cursor = f"&cursor={res.headers['x-next-cursor']}" if "x-next-cursor" in res.headers else None
+    assert pages == [["latest", "c6", "c5"], ["c4", "c3", "c2"], ["c1", "c0"]]
+    assert root_client.get("/climbs/comments/me").status_code == 401
+
+
+def test_comment_pages_seek_the_composite_index(engine):
+    thread = select(Comment).where(Comment.climb_id == 1)
+    cursor = encode_cursor(datetime(2025, 1, 1, 1), 3)
+    with Session(engine) as session:
+        for descending in (False, True):
+            statement = keyset_page(thread, Comment.created_at, Comment.id, cursor, 10, descending=descending)
+            compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+            plan = " ".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+            assert "ix_comment_climb_id_created_at (climb_id=? AND created_at" in plan
+            assert "TEMP B-TREE" not in plan
@@ -0,0 +1,186 @@
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+import main
+import app.main
+from app import leaderboard
+from app.ascent_import import AscentImporter
+from app.auth import create_access_token
+from app.grades import grade_for_difficulty
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User, climb_difficulty
+from app.models.stats import UserRollup
+from app.rollups import bucket_start, periods, rebuild_rollups
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        for name in ("ana", "bo"):
+            session.add(User(username=name, email=f"{name}@example.com", hashed_password="x"))
+        session.add(Gym(name="Home Gym", location="Here"))
+        session.add(Gym(name="Away Gym", location="There"))
+        session.commit()
+        for gym_id, grade in [(1, "V2"), (1, "V5"), (2, "V8")]:
+            session.add(Climb(gym_id=gym_id, color="Blue", setter="Ana", section="Cave", setter_grade=grade, date_added=datetime(2025, 1, 1)))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="clients")
+def clients_fixture(override_session):
+    leaderboard.reset()
+    # Ascents are logged through app.main, profiles are served by the root app
+    yield TestClient(override_session(app.main.app)), TestClient(override_session(main.app))
+    leaderboard.reset()
+
+
+def auth(username):
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+def at(day, hour=12):
+    return datetime.combine(day, datetime.min.time()).replace(hour=hour).isoformat()
+
+
+def rows(engine):
+    with Session(engine) as session:
+        return sorted(
+            (r.user_id, r.bucket, r.period, r.gym_id, r.sends, r.attempts, r.hardest)
+            for r in session.exec(select(UserRollup))
+        )
+
+
+def test_periods_cover_whole_buckets():
+    assert bucket_start("week", date(2025, 3, 9)) == MONDAY
+    assert periods("week", date(2025, 3, 5), date(2025, 3, 17)) == [MONDAY, date(2025, 3, 10), date(2025, 3, 17)]
+    assert periods("day", MONDAY, MONDAY) == [MONDAY]
+
+
+def test_stats_buckets_and_gym_volume(clients):
+    ascents, users = clients
+    items = [
+        {"climb_id": 1, "sent": True, "date": at(MONDAY)},
+        {"climb_id": 2, "sent": False, "date": at(MONDAY)},
+        {"climb_id": 2, "sent": True, "date": at(MONDAY + timedelta(days=2))},
+        {"climb_id": 3, "sent": True, "date": at(MONDAY + timedelta(days=8))},
+    ]
+    assert ascents.post("/ascents/batch", json={"items": items}, headers=auth("ana")).status_code == 201
+    res = ascents.post("/ascents/", json={"climb_id": 3, "sent": False, "date": at(MONDAY + timedelta(days=9))}, headers=auth("ana"))
+    assert res.status_code == 201
+
+    res = users.get("/users/ana/stats", params={"from": "2025-03-03", "to": "2025-03-23", "bucket": "week"})
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["sends"], body["attempts"], body["hardest_grade"]) == (3, 2, "V8")
+    assert [(b["period_start"], b["sends"], b["attempts"], b["hardest_grade"]) for b in body["buckets"]] == [
+        ("2025-03-03", 2, 1, "V5"), ("2025-03-10", 1, 1, "V8"), ("2025-03-17", 0, 0, None),
+    ]
+    assert body["buckets"][0]["gyms"] == [{"gym_id": 1, "sends": 2, "attempts": 1}]
+    assert body["buckets"][1]["gyms"] == [{"gym_id": 2, "sends": 1, "attempts": 1}]
+
+    # A mid-week range covers, and reports, the whole first and last weeks
+    res = users.get("/users/ana/stats", params={"from": "2025-03-05", "to": "2025-03-11", "bucket": "week"}).json()
+    assert (res["start"], res["end"], res["sends"], res["attempts"]) == ("2025-03-03", "2025-03-16", 3, 2)
+
+    days = users.get("/users/ana/stats", params={"from": "2025-03-03", "to": "2025-03-05", "bucket": "day"}).json()
+    assert (days["start"], days["end"]) == ("2025-03-03", "2025-03-05")
+    assert [(b["sends"], b["attempts"]) for b in days["buckets"]] == [(1, 1), (0, 0), (1, 0)]
+    assert days["buckets"][2]["hardest"] == climb_difficulty("V5")
+
+    assert users.get("/users/bo/stats").json()["buckets"][-1]["sends"] == 0
+    assert users.get("/users/nobody/stats").status_code == 404
+    assert users.get("/users/ana/stats", params={"from": "2025-03-10", "to": "2025-03-03"}).status_code == 422
+    assert users.get("/users/ana/stats", params={"from": "2020-01-01", "to": "2025-03-03", "bucket": "day"}).status_code == 422
+
+
+def test_stats_read_does_not_touch_ascents(clients, engine):
+    ascents, users = clients
+    items = [{"climb_id": 1, "sent": True, "date": at(MONDAY - timedelta(days=7 * i))} for i in range(20)]
+    ascents.post("/ascents/batch", json={"items": items}, headers=auth("ana"))
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    body = users.get("/users/ana/stats", params={"from": "2024-10-14", "to": "2025-03-09"}).json()
+    event.remove(engine, "before_cursor_execute", record)
+    assert sum(b["sends"] for b in body["buckets"]) == 20
+    assert not any("FROM ascent" in s for s in statements)
+
+
+def test_delete_and_import_keep_rollups_in_sync(clients, engine):
+    ascents, users = clients
+    items = [
+        {"climb_id": 1, "sent": True, "date": at(MONDAY)},
+        {"climb_id": 2, "sent": True, "date": at(MONDAY, 18)},
+        {"climb_id": 3, "sent": False, "date": at(MONDAY + timedelta(days=1))},
+    ]
+    created = ascents.post("/ascents/batch", json={"items": items}, headers=auth("ana")).json()["created"]
+    with Session(engine) as session:
+        AscentImporter(session, 2).run([(1, {"climb_id": 2, "date": at(MONDAY)})])
+
+    hardest = created[1]["id"]
+    assert ascents.delete(f"/ascents/{hardest}", headers=auth("bo")).status_code == 403
+    assert ascents.delete(f"/ascents/{hardest}", headers=auth("ana")).status_code == 204
+    assert ascents.delete(f"/ascents/{hardest}", headers=auth("ana")).status_code == 404
+    day = users.get("/users/ana/stats", params={"from": "2025-03-03", "to": "2025-03-03", "bucket": "day"}).json()
+    # The hardest send was removed, so the bucket falls back to the next hardest
+    assert (day["sends"], day["hardest_grade"]) == (1, "V2")
+    ascents.delete(f"/ascents/{created[2]['id']}", headers=auth("ana"))
+
+    incremental = rows(engine)
+    assert all(r[2] != MONDAY + timedelta(days=1) for r in incremental)
+    with Session(engine) as session:
+        assert rebuild_rollups(session) == len(incremental)
+        assert session.exec(select(Ascent).where(Ascent.id == hardest)).first() is None
+    assert rows(engine) == incremental
+
+
+def test_rebuild_single_user(engine):
+    with Session(engine) as session:
+        session.add_all([
+            Ascent(user_id=1, climb_id=1, date=datetime(2025, 3, 4), sent=True),
+            Ascent(user_id=2, climb_id=3, date=datetime(2025, 3, 4), sent=False),
+        ])
+        session.add(UserRollup(user_id=2, bucket="day", period=date(2000, 1, 1), gym_id=1, sends=5))
+        session.commit()
+        assert rebuild_rollups(session, user_id=1) == 2
+    assert rows(engine) == [
+        (1, "day", date(2025, 3, 4), 1, 1, 0, climb_difficulty("V2")),
+        (1, "week", MONDAY, 1, 1, 0, climb_difficulty("V2")),
+        (2, "day", date(2000, 1, 1), 1, 5, 0, 0.0),
+    ]
+
+
+def test_grade_for_difficulty():
+    assert grade_for_difficulty(climb_difficulty("V5")) == "V5"
+    assert grade_for_difficulty(climb_difficulty("5.11c")) == "5.11c"
+    assert grade_for_difficulty(0) is None
+
+
+def test_rollup_row_created_concurrently_is_not_inserted_twice(clients, engine):
+    log_client, _ = clients
+    created = []
+
+    # Another transaction creates ana's day rollup after this write found none
+    @event.listens_for(engine, "before_cursor_execute")
+    def race(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO userrollup") and not created:
+            created.append(True)
+            conn.exec_driver_sql(
+                "INSERT INTO userrollup (user_id, bucket, period, gym_id, sends, attempts, hardest) "
+                f"VALUES (1, 'day', '{MONDAY}', 1, 3, 0, 0.0)"
+            )
+
+    try:
+        res = log_client.post("/ascents/", json={"climb_id": 1, "date": at(MONDAY)}, headers=auth("ana"))
+    finally:
+        event.remove(engine, "before_cursor_execute", race)
+    assert res.status_code == 201 and created
+    assert (1, "day", MONDAY, 1, 4, 0, 102.0) in rows(engine)
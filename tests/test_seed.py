@@ -0,0 +1,57 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import func, inspect
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlmodel.pool import StaticPool
+from app.hashing import crypt_context
+from app.models.ascents import Ascent
+from app.models.comment import Comment
+from app.models.core import Climb, User
+from app.models.stats import ClimbStats, UserRollup
+from app.seed import PASSWORD, PASSWORD_HASH, seed_database
+
+SIZES = dict(gyms=2, users=30, climbs=40, ascents=500, comments=50)
+
+
+def make_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def dump(engine):
+    with Session(engine) as session:
+        return (
+            session.exec(select(Climb.gym_id, Climb.setter_grade, Climb.date_added).order_by(Climb.id)).all(),
+            session.exec(select(Ascent.user_id, Ascent.climb_id, Ascent.date, Ascent.sent, Ascent.difficulty)
+                         .order_by(Ascent.id)).all(),
+            session.exec(select(Comment.climb_id, Comment.username, Comment.created_at).order_by(Comment.id)).all(),
+        )
+
+
+def test_seed_is_deterministic_and_consistent():
+    first, second = make_engine(), make_engine()
+    now = datetime(2025, 6, 1)
+    counts = seed_database(first, **SIZES, chunk_size=64, now=now)
+    seed_database(second, **SIZES, chunk_size=64, now=now)
+    assert counts == {"gym": 2, "user": 30, "climb": 40, "ascent": 500, "comment": 50}
+    assert dump(first) == dump(second)
+
+    with Session(first) as session:
+        ascents = session.exec(select(Ascent, Climb).join(Climb, Climb.id == Ascent.climb_id)).all()
+        assert all(ascent.date >= climb.date_added for ascent, climb in ascents)
+        assert session.exec(select(func.sum(ClimbStats.send_count + ClimbStats.attempt_count))).one() == 500
+        assert session.exec(select(func.count()).select_from(UserRollup)).one() > 0
+        user = session.exec(select(User).where(User.username == "climber1")).one()
+        assert user.hashed_password == PASSWORD_HASH
+    assert crypt_context().verify(PASSWORD, PASSWORD_HASH)
+    # Indexes dropped for the load are back
+    indexes = {index["name"] for index in inspect(first).get_indexes("ascent")}
+    assert {index.name for index in Ascent.__table__.indexes} <= indexes
+
+
+def test_seed_refuses_populated_database():
+    engine = make_engine()
+    seed_database(engine, gyms=1, users=1, climbs=1, ascents=0, comments=0)
+    with pytest.raises(ValueError, match="already has rows"):
+        seed_database(engine, gyms=1, users=1, climbs=1, ascents=0, comments=0)
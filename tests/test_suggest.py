@@ -0,0 +1,72 @@
+import time
+import pytest
+from datetime import datetime
+from sqlmodel import Session
+from app import suggest
+from app.auth import create_access_token
+from app.models.core import Climb, Gym, User
+
+CLIMBS = [
+    ("Blue", "Sam", "Boulder Cave", "V3"),
+    ("Blue", "Alex", "Slab", "V5"),
+    ("Red", "Samantha", "Boulder Cave", "v3"),
+    ("Yellow", "Jo", "Lead Wall", "5.11A"),
+]
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="setter", email="setter@example.com", hashed_password="x"))
+        session.add(Gym(name="Suggest Gym", location="Here"))
+        session.add(Gym(name="Other Gym", location="There"))
+        session.commit()
+        for color, setter, section, grade in CLIMBS:
+            session.add(Climb(gym_id=1, color=color, setter=setter, section=section, setter_grade=grade, date_added=datetime(2025, 3, 1)))
+        session.add(Climb(gym_id=2, color="Blue", setter="Sam", section="Boulder Cave", setter_grade="V3", date_added=datetime(2025, 3, 1)))
+        session.commit()
+    return engine
+
+
+def test_free_text_suggestions(client):
+    res = client.get("/gyms/1/climbs/suggest", params={"q": "blu cave V3"})
+    assert res.status_code == 200
+    results = res.json()
+    assert results[0]["color"] == "Blue" and results[0]["section"] == "Boulder Cave"
+    assert all(r["gym_id"] == 1 for r in results)
+    assert results == sorted(results, key=lambda r: -r["score"])
+    # The index is not kept in step with comments, so suggestions carry no comment summary
+    assert "comment_count" not in results[0] and "last_comment_preview" not in results[0]
+
+
+def test_structured_and_grade_normalization(client):
+    results = client.get("/gyms/1/climbs/suggest", params={"setter": "sam", "grade": "V 3"}).json()
+    assert [r["setter"] for r in results[:2]] == ["Sam", "Samantha"]
+    yds = client.get("/gyms/1/climbs/suggest", params={"grade": "5.11a"}).json()
+    assert [r["color"] for r in yds] == ["Yellow"]
+    assert client.get("/gyms/1/climbs/suggest").json() == []
+
+
+def test_index_updated_on_create(client):
+    assert client.get("/gyms/1/climbs/suggest", params={"q": "purple"}).json() == []
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'setter'})}"}
+    res = client.post("/gyms/1/climbs/", json={
+        "gym_id": 1, "color": "Purple", "setter": "Kim", "section": "Roof", "setter_grade": "V7", "date_added": "2025-04-01T00:00:00"
+    }, headers=headers)
+    assert res.status_code == 201
+    results = client.get("/gyms/1/climbs/suggest", params={"q": "purpl"}).json()
+    assert results[0]["id"] == res.json()["id"]
+
+
+def test_keystroke_latency():
+    index = suggest.GymClimbIndex()
+    colors = ["Blue", "Red", "Green", "Yellow", "Purple", "Black", "White", "Orange"]
+    for i in range(5000):
+        index.add(suggest.ClimbSummary(
+            id=i, gym_id=1, color=colors[i % 8], setter=f"Setter {i % 40}", section=f"Wall {i % 25}",
+            setter_grade=f"V{i % 10}", date_added=datetime(2025, 1, 1),
+        ))
+    started = time.perf_counter()
+    for prefix in ("b", "bl", "blu", "blue", "blue w", "blue wall 1", "blue wall 1 v4"):
+        index.search(q=prefix)
+    assert (time.perf_counter() - started) / 7 < 0.05
@@ -0,0 +1,51 @@
+import pytest
+from datetime import datetime
+from sqlmodel import Session
+from app.auth import create_access_token
+from app.grades import grade_rank, hardest_grade
+from app.models.ascents import Ascent
+from app.models.core import Climb, Gym, User
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(engine):
+    with Session(engine) as session:
+        session.add(User(username="alex", email="alex@example.com", hashed_password="x"))
+        session.add(User(username="sam", email="sam@example.com", hashed_password="x"))
+        session.add(Gym(name="Profile Gym", location="Here"))
+        session.commit()
+        for setter in ("alex", "alex", "sam"):
+            session.add(Climb(gym_id=1, color="Red", setter=setter, section="A", setter_grade="V3", date_added=datetime(2025, 1, 1)))
+        session.commit()
+        session.add_all([
+            Ascent(user_id=1, climb_id=3, grade="V4", sent=True),
+            Ascent(user_id=1, climb_id=3, grade="V6", sent=False),
+            Ascent(user_id=1, climb_id=2, grade="VB", sent=True),
+            Ascent(user_id=2, climb_id=1, grade="V9", sent=True),
+        ])
+        session.commit()
+    return engine
+
+
+def test_profile_summary(client):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'alex'})}"}
+    assert client.patch("/gyms/climbs/3/rating", json={"rating": 2}, headers=headers).status_code == 200
+    assert client.patch("/gyms/climbs/3/rating", json={"rating": 5}, headers=headers).status_code == 200
+    profile = client.get("/users/alex").json()
+    assert profile["climbs_set"] == [1, 2]
+    assert profile["ratings"] == [{"climb_id": 3, "rating": 5}]
+    assert profile["ascent_count"] == 3
+    assert profile["send_count"] == 2
+    # The unsent V6 attempt does not count as the hardest send
+    assert profile["hardest_send"] == "V4"
+
+
+def test_profile_not_found(client):
+    assert client.get("/users/nobody").status_code == 404
+
+
+def test_grade_rank():
+    assert grade_rank("VB") < grade_rank("V0") < grade_rank("v10")
+    assert grade_rank("5.10d") < grade_rank("5.11a")
+    assert grade_rank("purple-ish") is None
+    assert hardest_grade(["5.12a", None, "V2", "V1", "??"]) == "V2"